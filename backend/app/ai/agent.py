@@ -3,6 +3,19 @@ from loguru import logger
 import os
 from typing import Optional
 from dotenv import load_dotenv
+from ai.tokens import (
+    OPERATION_BUDGETS,
+    PromptTooLargeError,
+    count_tokens,
+    fit_input,
+    fit_prompt,
+    truncate_job_description,
+    truncate_knowledge_graph,
+    truncate_requirements,
+    truncate_text,
+)
+from utils.metrics import metrics
+from services.ollama import OLLAMA_API_BASE, OLLAMA_NUM_CTX
 
 load_dotenv()
 
@@ -40,8 +53,8 @@ class ResumeAgent:
             logger.info("Initializing Ollama model")
             return LiteLLMModel(
                 model_id=model,
-                api_base="http://localhost:11434",
-                num_ctx=8192
+                api_base=OLLAMA_API_BASE,
+                num_ctx=OLLAMA_NUM_CTX
             )
         elif "gemini" in model:
             logger.info("Initializing Gemini model")
@@ -74,6 +87,11 @@ class ResumeAgent:
         try:
             logger.info("Analyzing job requirements...")
 
+            job_description = fit_input(
+                "analyze_job_requirements", "job_description", job_description,
+                OPERATION_BUDGETS["analyze_job_requirements"], truncate_job_description, self._count_tokens
+            )
+
             # Build prompt focused only on extracting requirements
             prompt = f"""
 You are a job requirements analysis expert. Analyze the job description and extract all requirements, qualifications, and key information.
@@ -115,7 +133,7 @@ IMPORTANT: Return ONLY the JSON object, no additional text or explanation.
             system_prompt = "You are a professional job requirements analyzer. Always return valid JSON responses."
 
             # Get response from LLM
-            response = self.run_prompt(prompt, system_prompt)
+            response = self.run_prompt(prompt, system_prompt, operation="analyze_job_requirements")
 
             # Parse JSON response
             import json
@@ -166,6 +184,17 @@ IMPORTANT: Return ONLY the JSON object, no additional text or explanation.
         try:
             logger.info("Comparing job requirements with user knowledge graph...")
 
+            # Requirements and knowledge graph share the operation budget
+            budget = OPERATION_BUDGETS["compare_and_find_missing_fields"]
+            parsed_requirements = fit_input(
+                "compare_and_find_missing_fields", "requirements", parsed_requirements,
+                budget // 3, truncate_requirements, self._count_tokens
+            )
+            user_knowledge_graph = fit_input(
+                "compare_and_find_missing_fields", "knowledge_graph", user_knowledge_graph,
+                budget - budget // 3, truncate_knowledge_graph, self._count_tokens
+            )
+
             # Build prompt for comparison
             prompt = f"""
 You are an expert at comparing job requirements against a candidate's profile.
@@ -228,7 +257,7 @@ IMPORTANT: Return ONLY the JSON object, no additional text or explanation.
             system_prompt = "You are a professional resume analyst. Always return valid JSON responses."
 
             # Get response from LLM
-            response = self.run_prompt(prompt, system_prompt)
+            response = self.run_prompt(prompt, system_prompt, operation="compare_and_find_missing_fields")
 
             # Parse JSON response
             import json
@@ -276,6 +305,11 @@ IMPORTANT: Return ONLY the JSON object, no additional text or explanation.
         try:
             logger.info(f"Generating questionnaire for {len(missing_fields)} missing fields...")
 
+            missing_fields = fit_input(
+                "generate_questionnaire", "missing_fields", missing_fields,
+                OPERATION_BUDGETS["generate_questionnaire"], truncate_requirements, self._count_tokens
+            )
+
             # Build prompt for questionnaire generation
             prompt = f"""
 You are an expert at creating targeted questions to fill in missing information for a resume.
@@ -330,7 +364,7 @@ IMPORTANT: Return ONLY the JSON object, no additional text or explanation. Keep
             system_prompt = "You are a professional questionnaire designer for resume building. Always return valid JSON responses."
 
             # Get response from LLM
-            response = self.run_prompt(prompt, system_prompt)
+            response = self.run_prompt(prompt, system_prompt, operation="generate_questionnaire")
 
             # Parse JSON response
             import json
@@ -378,6 +412,11 @@ IMPORTANT: Return ONLY the JSON object, no additional text or explanation. Keep
         try:
             logger.info(f"Processing answer for field: {related_field}")
 
+            answer = fit_input(
+                "process_answer", "answer", answer,
+                OPERATION_BUDGETS["process_answer"], truncate_text, self._count_tokens
+            )
+
             prompt = f"""
 You are an expert at processing resume information and structuring it for a knowledge graph.
 
@@ -393,11 +432,11 @@ You are an expert at processing resume information and structuring it for a know
 4. Assign a confidence score (0.0-1.0) based on answer quality and completeness
 
 **Knowledge Graph Categories and Schemas:**
-- **education**: {{"institution": str (required), "degree": str (required), "field": str (optional), "start_date": str (optional, YYYY-MM or YYYY), "end_date": str (optional, YYYY-MM or YYYY or "present"), "gpa": str (optional)}}
-- **work_experience**: {{"company": str (required), "position": str (required), "start_date": str (optional, YYYY-MM or YYYY), "end_date": str (optional, YYYY-MM or YYYY or "present"), "description": str (optional, SHORT BULLETED format)}}
-- **projects**: {{"name": str (required), "description": str (required, SHORT BULLETED format), "technologies": [str] (optional), "url": str (optional), "start_date": str (optional, YYYY-MM or YYYY), "end_date": str (optional, YYYY-MM or YYYY or "present")}}
-- **certifications**: {{"name": str (required), "issuer": str (optional), "date": str (optional, YYYY-MM or YYYY), "credential_id": str (optional), "url": str (optional)}}
-- **research_work**: {{"title": str (required), "venue": str (optional), "date": str (optional, YYYY-MM or YYYY), "description": str (optional, SHORT BULLETED format), "url": str (optional)}}
+- **education**: {{"institution": str (required), "degree": str (required), "field": str (optional), "start_date": str (optional), "end_date": str (optional), "gpa": str (optional)}}
+- **work_experience**: {{"company": str (required), "position": str (required), "start_date": str (optional), "end_date": str (optional), "description": str (optional, SHORT BULLETED format)}}
+- **projects**: {{"name": str (required), "description": str (required, SHORT BULLETED format), "technologies": [str] (optional), "url": str (optional), "start_date": str (optional), "end_date": str (optional)}}
+- **certifications**: {{"name": str (required), "issuer": str (optional), "date": str (optional), "credential_id": str (optional), "url": str (optional)}}
+- **research_work**: {{"title": str (required), "venue": str (optional), "date": str (optional), "description": str (optional, SHORT BULLETED format), "url": str (optional)}}
 - **skills**: [str] (array of skill names)
 - **misc**: {{}} (flexible dictionary for truly miscellaneous items)
 
@@ -478,7 +517,7 @@ IMPORTANT: Return ONLY the JSON object, no additional text or explanation.
             system_prompt = "You are a professional resume data processor. Always return valid JSON responses."
 
             # Get response from LLM
-            response = self.run_prompt(prompt, system_prompt)
+            response = self.run_prompt(prompt, system_prompt, operation="process_answer")
 
             # Parse JSON response
             import json
@@ -543,15 +582,15 @@ Analyze the knowledge graph and identify items that are in the wrong sections. M
   - institution (required): University/college name
   - degree (required): Degree type
   - field (optional): Field of study
-  - start_date (optional): YYYY-MM or YYYY
-  - end_date (optional): YYYY-MM or YYYY or "present"
+  - start_date (optional)
+  - end_date (optional)
   - gpa (optional): GPA or grade
 
 - **work_experience**: Array of objects with schema:
   - company (required): Company name
   - position (required): Job title
-  - start_date (optional): YYYY-MM or YYYY
-  - end_date (optional): YYYY-MM or YYYY or "present"
+  - start_date (optional)
+  - end_date (optional)
   - description (optional): SHORT BULLETED responsibilities and achievements
 
 - **projects**: Array of objects with schema:
@@ -559,20 +598,20 @@ Analyze the knowledge graph and identify items that are in the wrong sections. M
   - description (required): SHORT BULLETED project description
   - technologies (optional): Array of technology names
   - url (optional): Project URL or repository
-  - start_date (optional): YYYY-MM or YYYY
-  - end_date (optional): YYYY-MM or YYYY or "present"
+  - start_date (optional)
+  - end_date (optional)
 
 - **certifications**: Array of objects with schema:
   - name (required): Certification name
   - issuer (optional): Issuing organization
-  - date (optional): YYYY-MM or YYYY
+  - date (optional)
   - credential_id (optional): Credential ID
   - url (optional): Verification URL
 
 - **research_work**: Array of objects with schema:
   - title (required): Paper or research title
   - venue (optional): Conference or journal
-  - date (optional): YYYY-MM or YYYY
+  - date (optional)
   - description (optional): SHORT BULLETED summary
   - url (optional): Publication URL
 
@@ -634,7 +673,7 @@ IMPORTANT: Return ONLY the JSON object, no additional text or explanation. Prese
             system_prompt = "You are a professional resume data organizer. Always return valid JSON responses and preserve all user data."
 
             # Get response from LLM
-            response = self.run_prompt(prompt, system_prompt)
+            response = self.run_prompt(prompt, system_prompt, operation="optimize_knowledge_graph", truncate=False)
 
             # Parse JSON response
             import json
@@ -681,6 +720,11 @@ IMPORTANT: Return ONLY the JSON object, no additional text or explanation. Prese
         try:
             logger.info("Parsing free-form text into structured knowledge graph data...")
 
+            text = fit_input(
+                "parse_free_text_to_knowledge_graph", "text", text,
+                OPERATION_BUDGETS["parse_free_text_to_knowledge_graph"], truncate_text, self._count_tokens
+            )
+
             # Build prompt for parsing
             prompt = f"""
 You are an expert at parsing professional information from free-form text into structured resume data.
@@ -701,8 +745,8 @@ You are an expert at parsing professional information from free-form text into s
   "institution": "string (required)",
   "degree": "string (required)",
   "field": "string (optional)",
-  "start_date": "string (YYYY-MM or YYYY format, optional)",
-  "end_date": "string (YYYY-MM or YYYY or 'present', optional)",
+  "start_date": "string (optional)",
+  "end_date": "string (optional)",
   "gpa": "string (optional)"
 }}
 
@@ -710,8 +754,8 @@ You are an expert at parsing professional information from free-form text into s
 {{
   "company": "string (required)",
   "position": "string (required)",
-  "start_date": "string (YYYY-MM or YYYY format, optional)",
-  "end_date": "string (YYYY-MM or YYYY or 'present', optional)",
+  "start_date": "string (optional)",
+  "end_date": "string (optional)",
   "description": "string - SHORT, BULLETED format (optional)"
 }}
 
@@ -721,15 +765,15 @@ You are an expert at parsing professional information from free-form text into s
   "description": "string - SHORT, BULLETED format (required)",
   "technologies": ["array", "of", "strings"] (optional),
   "url": "string (optional)",
-  "start_date": "string (YYYY-MM or YYYY format, optional)",
-  "end_date": "string (YYYY-MM or YYYY or 'present', optional)"
+  "start_date": "string (optional)",
+  "end_date": "string (optional)"
 }}
 
 **Certifications:**
 {{
   "name": "string (required)",
   "issuer": "string (optional)",
-  "date": "string (YYYY-MM or YYYY format, optional)",
+  "date": "string (optional)",
   "credential_id": "string (optional)",
   "url": "string (optional)"
 }}
@@ -738,7 +782,7 @@ You are an expert at parsing professional information from free-form text into s
 {{
   "title": "string (required)",
   "venue": "string (optional)",
-  "date": "string (YYYY-MM or YYYY format, optional)",
+  "date": "string (optional)",
   "description": "string - SHORT, BULLETED format (optional)",
   "url": "string (optional)"
 }}
@@ -755,9 +799,8 @@ Example: ["Python", "FastAPI", "Docker", "Kubernetes"]
 5. For projects: Include what it does, key features, and impact
 6. For work experience: Include responsibilities and achievements
 7. Extract ALL technologies/tools mentioned
-8. Use proper date formats (YYYY-MM or YYYY)
-9. If dates are unclear, leave them empty
-10. Set confidence based on how much information was provided
+8. Copy dates as written; if dates are unclear, leave them empty
+9. Set confidence based on how much information was provided
 
 **Return Format:**
 Return ONLY a valid JSON object with this structure:
@@ -837,7 +880,7 @@ IMPORTANT:
             system_prompt = "You are a professional resume data parser. Always return valid JSON with structured data following the provided schemas. Keep descriptions concise and bulleted."
 
             # Get response from LLM
-            response = self.run_prompt(prompt, system_prompt)
+            response = self.run_prompt(prompt, system_prompt, operation="parse_free_text_to_knowledge_graph")
 
             # Parse JSON response
             import json
@@ -868,18 +911,46 @@ IMPORTANT:
             logger.error(f"Error parsing free text: {str(e)}")
             raise
 
-    def run_prompt(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+    def _count_tokens(self, text: str) -> int:
+        """Count tokens of text with this agent's model tokenizer"""
+        return count_tokens(self.model_id, text)
+
+    def run_prompt(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        operation: str = "custom",
+        truncate: bool = True
+    ) -> str:
         """
         Run an arbitrary prompt through the LLM and return the response.
 
+        Prompts that don't fit in the model's context window are truncated
+        (keeping the instructions at the end) before they reach the model.
+
         Args:
             prompt: The user prompt to send to the LLM
             system_prompt: Optional system prompt to set context
+            operation: Operation name used for prompt size metrics
+            truncate: Truncate oversized prompts instead of raising PromptTooLargeError
 
         Returns:
             The LLM's response as a string
         """
         try:
+            fitted_prompt, tokens_before, tokens_after = fit_prompt(self.model_id, prompt, system_prompt)
+            metrics.observe(f"prompt_tokens.{operation}.pre", tokens_before)
+            metrics.observe(f"prompt_tokens.{operation}.post", tokens_after)
+
+            if tokens_after < tokens_before:
+                if not truncate:
+                    raise PromptTooLargeError(
+                        f"Prompt for {operation} has {tokens_before} tokens, more than {self.model_id} can take"
+                    )
+                logger.warning(f"Truncated {operation} prompt from {tokens_before} to {tokens_after} tokens")
+                metrics.increment(f"prompt_tokens.{operation}.truncated")
+                prompt = fitted_prompt
+
             logger.debug(f"Running prompt: {prompt[:100]}...")
 
             # Prepare messages
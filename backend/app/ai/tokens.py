@@ -0,0 +1,330 @@
+from functools import lru_cache
+from loguru import logger
+from typing import Callable, List, Optional
+from services.ollama import OLLAMA_NUM_CTX
+from utils.metrics import metrics
+import json
+import re
+
+try:
+    from litellm import get_model_info, token_counter
+except ImportError:
+    get_model_info = token_counter = None
+
+# Context window per model family, in tokens, for models missing from
+# LiteLLM's model map
+CONTEXT_WINDOWS = {
+    "gemini": 1_000_000,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+
+# Tokens kept free in the context window for the model's answer
+RESERVED_OUTPUT_TOKENS = 2048
+
+# Token budget for the variable input of each operation (job description,
+# knowledge graph, answer text...). The fixed prompt template comes on top.
+# optimize_knowledge_graph has no budget: its input is written back, so it is
+# never truncated.
+OPERATION_BUDGETS = {
+    "analyze_job_requirements": 3000,
+    "compare_and_find_missing_fields": 3500,
+    "generate_questionnaire": 2000,
+    "process_answer": 1000,
+    "parse_free_text_to_knowledge_graph": 2000,
+    "job_questions": 4000,
+}
+
+# Job description sections worth keeping when the description has to be cut
+REQUIREMENT_SECTION = re.compile(
+    r'requirement|qualification|must have|nice to have|preferred|skills|experience|'
+    r'responsibilit|what you|you will|you\'ll|about the role|the role|tech stack',
+    re.IGNORECASE
+)
+BOILERPLATE_SECTION = re.compile(
+    r'about us|about the company|who we are|our mission|benefits|perks|equal opportunity|'
+    r'\beeo\b|diversity|accommodation|privacy|compensation|salary|why join|culture|disclaimer|'
+    r'how to apply',
+    re.IGNORECASE
+)
+
+TRUNCATION_MARKER = "\n[...truncated...]\n"
+
+
+class PromptTooLargeError(Exception):
+    """Raised when a prompt that must not be truncated exceeds the context window"""
+
+# Models whose tokenizer failed once, their token counts are estimated
+_models_without_tokenizer = set()
+
+
+def count_tokens(model_id: str, text: str) -> int:
+    """
+    Count tokens of text using the tokenizer of the model's family
+
+    Falls back to a 4 characters per token estimate when no tokenizer is
+    available for the model.
+
+    Args:
+        model_id: LiteLLM model identifier (e.g. "gemini/gemini-2.5-flash")
+        text: Text to count
+
+    Returns:
+        Number of tokens
+    """
+    if not text:
+        return 0
+    if token_counter is not None and model_id not in _models_without_tokenizer:
+        try:
+            return token_counter(model=model_id, text=text)
+        except Exception as e:
+            logger.warning(f"Tokenizer unavailable for {model_id}, estimating token counts: {str(e)}")
+            _models_without_tokenizer.add(model_id)
+    return len(text) // 4 + 1
+
+
+@lru_cache(maxsize=None)
+def context_window(model_id: str) -> int:
+    """
+    Get the context window of a model in tokens
+
+    Ollama models are capped by the num_ctx they are called with. Other
+    models are looked up in LiteLLM's model map, then in CONTEXT_WINDOWS.
+
+    Args:
+        model_id: LiteLLM model identifier
+
+    Returns:
+        Number of input tokens the model accepts
+    """
+    if "ollama" in model_id:
+        return OLLAMA_NUM_CTX
+    if get_model_info is not None:
+        try:
+            info = get_model_info(model_id)
+            window = info.get("max_input_tokens") or info.get("max_tokens")
+            if window:
+                return window
+        except Exception as e:
+            logger.warning(f"No context window known for {model_id}, using the family default: {str(e)}")
+    for family, window in CONTEXT_WINDOWS.items():
+        if family in model_id:
+            return window
+    return DEFAULT_CONTEXT_WINDOW
+
+
+def truncate_text(text: str, max_tokens: int, count: Callable[[str], int], keep_tail: bool = False) -> str:
+    """
+    Cut text down to max_tokens
+
+    Args:
+        text: Text to cut
+        max_tokens: Token budget
+        count: Token counting function
+        keep_tail: Keep the beginning and the end of the text and cut the middle
+            (used for whole prompts, whose instructions are at the end)
+
+    Returns:
+        Text within budget (unchanged if it already fits)
+    """
+    total = count(text)
+    if total <= max_tokens:
+        return text
+
+    # Scale by the observed characters per token, then tighten until it fits
+    keep_chars = int(len(text) * max_tokens / total)
+    while keep_chars > 0:
+        if keep_tail:
+            head = keep_chars // 2
+            candidate = text[:head] + TRUNCATION_MARKER + text[len(text) - (keep_chars - head):]
+        else:
+            candidate = text[:keep_chars] + TRUNCATION_MARKER
+        if count(candidate) <= max_tokens:
+            return candidate
+        keep_chars = int(keep_chars * 0.9)
+    return ""
+
+
+def truncate_job_description(text: str, max_tokens: int, count: Callable[[str], int]) -> str:
+    """
+    Fit a job description into max_tokens, keeping the requirement sections
+
+    Sections (separated by blank lines) are dropped in order: boilerplate
+    (about us, benefits, EEO...) first, then other sections, last sections first.
+    Requirement sections are only cut as a last resort.
+
+    Args:
+        text: Job description
+        max_tokens: Token budget
+        count: Token counting function
+
+    Returns:
+        Job description within budget
+    """
+    if count(text) <= max_tokens:
+        return text
+
+    sections = [section for section in re.split(r'\n\s*\n', text) if section.strip()]
+
+    def rank(section: str) -> int:
+        heading = section.strip().splitlines()[0][:80]
+        if BOILERPLATE_SECTION.search(heading):
+            return 0
+        if REQUIREMENT_SECTION.search(section):
+            return 2
+        return 1
+
+    # Drop the least useful sections, last ones first, until the rest fits
+    drop_order = sorted(range(len(sections)), key=lambda i: (rank(sections[i]), -i))
+    kept = set(range(len(sections)))
+    for index in drop_order:
+        if rank(sections[index]) == 2:
+            break
+        kept.discard(index)
+        if count("\n\n".join(sections[i] for i in sorted(kept))) <= max_tokens:
+            break
+
+    result = "\n\n".join(sections[i] for i in sorted(kept))
+    return truncate_text(result, max_tokens, count)
+
+
+def truncate_requirements(requirements: List[dict], max_tokens: int, count: Callable[[str], int]) -> List[dict]:
+    """
+    Fit a list of requirements/fields into max_tokens, dropping the lowest priority ones
+
+    Args:
+        requirements: FieldMetadata-like dicts with a priority
+        max_tokens: Token budget
+        count: Token counting function
+
+    Returns:
+        Requirements within budget, in their original order
+    """
+    def priority(item) -> int:
+        value = item.get('priority') if isinstance(item, dict) else None
+        return value if isinstance(value, int) else 1
+
+    total = count(str(requirements))
+    if total <= max_tokens:
+        return list(requirements)
+
+    # Count each item once and subtract the ones dropped (plus their ", ")
+    by_priority = sorted(requirements, key=priority)
+    dropped = set()
+    for item in by_priority:
+        if total <= max_tokens:
+            break
+        dropped.add(id(item))
+        total -= count(str(item)) + 1
+    kept = [item for item in requirements if id(item) not in dropped]
+
+    # Token counts are not exactly additive, make sure the result fits
+    remaining = [item for item in by_priority if id(item) not in dropped]
+    while kept and count(str(kept)) > max_tokens:
+        kept.remove(remaining.pop(0))
+    return kept
+
+
+def truncate_knowledge_graph(knowledge_graph: dict, max_tokens: int, count: Callable[[str], int]) -> dict:
+    """
+    Fit a knowledge graph into max_tokens for read-only comparisons
+
+    Long descriptions are cut to their first bullet first, then the oldest
+    entries (at the end of each list) are dropped.
+
+    Args:
+        knowledge_graph: The user's knowledge graph
+        max_tokens: Token budget
+        count: Token counting function
+
+    Returns:
+        Knowledge graph within budget
+    """
+    if count(str(knowledge_graph)) <= max_tokens:
+        return knowledge_graph
+
+    graph = json.loads(json.dumps(knowledge_graph, default=str))
+    for items in graph.values():
+        if isinstance(items, list):
+            for item in items:
+                if isinstance(item, dict) and isinstance(item.get('description'), str):
+                    item['description'] = item['description'].strip().split('\n')[0]
+
+    def longest_list() -> Optional[list]:
+        return max(
+            (items for items in graph.values() if isinstance(items, list) and items),
+            key=len,
+            default=None
+        )
+
+    # Count each dropped entry once and subtract it (plus its ", ")
+    total = count(str(graph))
+    while total > max_tokens:
+        longest = longest_list()
+        if not longest:
+            break
+        total -= count(str(longest.pop())) + 1
+
+    # Token counts are not exactly additive, make sure the result fits
+    while count(str(graph)) > max_tokens:
+        longest = longest_list()
+        if not longest:
+            break
+        longest.pop()
+    return graph
+
+
+def fit_input(operation: str, name: str, value, max_tokens: int, truncate: Callable, count: Callable[[str], int]):
+    """
+    Fit one variable input of an operation into its token budget
+
+    Records the input size before and after as input_tokens.{operation}.{name}.pre
+    and .post, and counts truncations in input_tokens.{operation}.{name}.truncated.
+
+    Args:
+        operation: Operation name (e.g. "analyze_job_requirements")
+        name: Input name (e.g. "job_description")
+        value: Text, or list/dict counted by its str()
+        max_tokens: Token budget
+        truncate: Truncation function taking (value, max_tokens, count)
+        count: Token counting function
+
+    Returns:
+        Value within budget (unchanged if it already fits)
+    """
+    metric = f"input_tokens.{operation}.{name}"
+    before = count(value if isinstance(value, str) else str(value))
+    metrics.observe(f"{metric}.pre", before)
+    if before <= max_tokens:
+        metrics.observe(f"{metric}.post", before)
+        return value
+
+    value = truncate(value, max_tokens, count)
+    after = count(value if isinstance(value, str) else str(value))
+    metrics.observe(f"{metric}.post", after)
+    metrics.increment(f"{metric}.truncated")
+    logger.info(f"Truncated {name} of {operation} from {before} to {after} tokens")
+    return value
+
+
+def fit_prompt(model_id: str, prompt: str, system_prompt: Optional[str] = None) -> tuple:
+    """
+    Make sure a whole prompt fits in the model's context window
+
+    Args:
+        model_id: LiteLLM model identifier
+        prompt: User prompt
+        system_prompt: Optional system prompt
+
+    Returns:
+        Tuple of (prompt within the context window, tokens before, tokens after)
+    """
+    count = lambda text: count_tokens(model_id, text)
+    system_tokens = count(system_prompt or "")
+    before = system_tokens + count(prompt)
+    limit = context_window(model_id) - RESERVED_OUTPUT_TOKENS
+
+    if before <= limit:
+        return prompt, before, before
+
+    prompt = truncate_text(prompt, limit - system_tokens, count, keep_tail=True)
+    return prompt, before, system_tokens + count(prompt)
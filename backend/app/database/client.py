@@ -1,32 +1,70 @@
-from pymongo import MongoClient
+from pymongo import AsyncMongoClient, MongoClient
 from dotenv import load_dotenv
 from loguru import logger
+from database.monitoring import RoundTripListener
 import os
 
 load_dotenv()
 
+# Connection pool settings, shared by the async and sync clients
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "50"))
+MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "5"))
+# How long a request waits for a free connection before failing
+MONGODB_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", "5000"))
+# How long to wait for a reachable server (pymongo's default is 30s)
+MONGODB_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+
+
 class MongoDB:
+    """
+    MongoDB connection.
+
+    `async_db` is used by the database operations on the app's event loop.
+    `db` is a blocking client for code that runs in its own threads (e.g. the
+    scraper cache on the HTTP client's loop).
+    """
+
     def __init__(self):
         self.uri = os.getenv("MONGODB_URI")
         self.client = None
         self.db = None
+        self.async_client = None
+        self.async_db = None
+
+    def _pool_options(self) -> dict:
+        return {
+            "maxPoolSize": MONGODB_MAX_POOL_SIZE,
+            "minPoolSize": MONGODB_MIN_POOL_SIZE,
+            "waitQueueTimeoutMS": MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+            "serverSelectionTimeoutMS": MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+            "event_listeners": [RoundTripListener()],
+        }
 
-    def connect(self):
+    async def connect(self):
         """Connect to MongoDB and send a ping to verify connection"""
         try:
-            self.client = MongoClient(self.uri)
+            self.async_client = AsyncMongoClient(self.uri, **self._pool_options())
+            self.async_db = self.async_client["data"]
+            # Rarely used, so it keeps no idle connections
+            self.client = MongoClient(self.uri, connect=False, **dict(self._pool_options(), minPoolSize=0))
             self.db = self.client["data"]
             # Send ping to verify connection
-            self.client.admin.command('ping')
-            logger.info("Successfully connected to MongoDB")
+            await self.async_client.admin.command('ping')
+            logger.info(
+                f"Successfully connected to MongoDB "
+                f"(pool {MONGODB_MIN_POOL_SIZE}-{MONGODB_MAX_POOL_SIZE})"
+            )
         except Exception as e:
             logger.error(f"Failed to connect to MongoDB: {e}")
             raise
 
-    def close(self):
+    async def close(self):
         """Close MongoDB connection"""
+        if self.async_client:
+            await self.async_client.close()
         if self.client:
             self.client.close()
+        if self.async_client or self.client:
             logger.info("MongoDB connection closed")
 
 mongodb = MongoDB()
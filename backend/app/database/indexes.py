@@ -0,0 +1,252 @@
+"""
+Declarative registry of the MongoDB indexes the app relies on.
+
+Unique indexes are built at startup before the app serves requests, and
+startup fails if one can't be built: signup relies on the unique email to
+reject existing users, and resume data on the unique session_id ($merge
+requires it). The other indexes are applied in a background task.
+
+Missing indexes are created, ones whose definition changed (drift) are
+rebuilt next to the old one before it is dropped, and indexes that are not
+in the registry are reported but left alone, except retired ones, which are
+dropped.
+"""
+import asyncio
+import time
+from loguru import logger
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import PyMongoError
+from typing import Any, Dict, List, Optional
+from database.client import mongodb
+from utils.metrics import metrics
+
+# Index options compared to detect drift
+COMPARED_OPTIONS = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression")
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("email", ASCENDING)], unique=True),
+        IndexModel([("user_id", ASCENDING)], unique=True),
+    ],
+    "sessions": [
+        IndexModel([("session_id", ASCENDING)], unique=True),
+        # Listing a user's sessions, most recently active first (keyset pagination)
+        IndexModel([("user_id", ASCENDING), ("last_active", DESCENDING), ("session_id", DESCENDING)]),
+    ],
+    "resume_data": [
+        # Point lookups, and the key $merge matches materialized documents on
+        IndexModel([("session_id", ASCENDING)], unique=True),
+        # Setting a new profile on all of a user's documents
+        IndexModel([("user_id", ASCENDING)]),
+    ],
+    "question_library": [
+        IndexModel([("key", ASCENDING)], unique=True),
+        # Eviction of the least used entries
+        IndexModel([("usage_count", ASCENDING), ("last_used", ASCENDING)]),
+    ],
+    "scraper_cache": [
+        IndexModel([("key", ASCENDING)], unique=True),
+        # Entries past the hard TTL are removed by MongoDB
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+    ],
+}
+
+# Indexes superseded by a registry entry, dropped once the new one exists
+RETIRED_INDEXES: Dict[str, List[str]] = {
+    "sessions": ["user_id_1_last_active_-1"],
+}
+
+
+def _definition(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce an index spec, from the registry or from the server, to what is compared"""
+    definition = {"key": [(field, int(direction)) for field, direction in dict(spec["key"]).items()]}
+    for option in COMPARED_OPTIONS:
+        if spec.get(option) not in (None, False):
+            definition[option] = spec[option]
+    return definition
+
+
+def is_unique(index: IndexModel) -> bool:
+    """Whether an index enforces uniqueness, which correctness depends on"""
+    return bool(index.document.get("unique"))
+
+
+async def rebuild_index(collection_name: str, index: IndexModel) -> None:
+    """
+    Replace an index with a new definition without a moment where neither exists
+
+    MongoDB only allows two indexes on the same keys if their partial filters
+    differ, so the new definition is first built under a temporary name with
+    a filter every document matches, then takes over the index's name.
+
+    Args:
+        collection_name: Name of the collection
+        index: New definition of the index
+    """
+    collection = mongodb.async_db[collection_name]
+    document = dict(index.document)
+    name = document.pop("name")
+    keys = document.pop("key")
+
+    every_document = {"_id": {"$exists": True}}
+    partial = document.get("partialFilterExpression")
+    temporary = IndexModel(
+        list(keys.items()),
+        **{
+            **document,
+            "name": f"{name}_rebuild",
+            "partialFilterExpression": {"$and": [partial, every_document]} if partial else every_document,
+        }
+    )
+
+    await collection.create_indexes([temporary])
+    await collection.drop_index(name)
+    await collection.create_indexes([index])
+    await collection.drop_index(temporary.document["name"])
+
+
+async def ensure_indexes(
+    collection_name: str,
+    indexes: List[IndexModel],
+    retired: Optional[List[str]] = None,
+    report_unknown: bool = True
+) -> Dict[str, List[str]]:
+    """
+    Bring a collection's indexes in line with the registry
+
+    Args:
+        collection_name: Name of the collection
+        indexes: Indexes the collection should have
+        retired: Names of superseded indexes to drop
+        report_unknown: Warn about indexes that are not in indexes
+
+    Returns:
+        Names of the created, rebuilt, dropped and unknown indexes
+    """
+    collection = mongodb.async_db[collection_name]
+    existing = await collection.index_information()
+
+    missing, drifted = [], []
+    for index in indexes:
+        name = index.document["name"]
+        if name not in existing:
+            missing.append(index)
+        elif _definition(existing[name]) != _definition(index.document):
+            drifted.append(index)
+
+    if missing:
+        await collection.create_indexes(missing)
+    for index in drifted:
+        logger.warning(f"Index {collection_name}.{index.document['name']} differs from its definition, rebuilding it")
+        await rebuild_index(collection_name, index)
+
+    dropped = [name for name in retired or [] if name in existing]
+    for name in dropped:
+        await collection.drop_index(name)
+
+    known = {index.document["name"] for index in indexes} | set(dropped)
+    # Left over by an interrupted rebuild, which the next one recreates
+    known |= {f"{name}_rebuild" for name in known}
+    unknown = [name for name in existing if name != "_id_" and name not in known]
+    if unknown and report_unknown:
+        logger.warning(f"Indexes on {collection_name} not in the registry: {', '.join(unknown)}")
+
+    return {
+        "created": [index.document["name"] for index in missing],
+        "rebuilt": [index.document["name"] for index in drifted],
+        "dropped": dropped,
+        "unknown": unknown,
+    }
+
+
+class IndexManager:
+    """
+    Builds the unique indexes at startup and applies the rest of the registry
+    in the background, so startup does not wait for index builds on large
+    collections that only make queries faster.
+    """
+
+    def __init__(
+        self,
+        indexes: Dict[str, List[IndexModel]] = INDEXES,
+        retired: Dict[str, List[str]] = RETIRED_INDEXES
+    ):
+        """
+        Args:
+            indexes: Indexes per collection name
+            retired: Superseded index names per collection name
+        """
+        self.indexes = indexes
+        self.retired = retired
+        self._ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        """Whether every collection has been brought in line with the registry"""
+        return self._ready.is_set()
+
+    async def start(self) -> None:
+        """
+        Build the unique indexes, then start applying the rest of the registry
+        in the background
+
+        Raises:
+            PyMongoError: If a unique index can't be built (e.g. duplicate
+                values): the app must not serve requests without it
+        """
+        started = time.monotonic()
+        try:
+            await asyncio.gather(*(
+                ensure_indexes(name, [index for index in indexes if is_unique(index)], report_unknown=False)
+                for name, indexes in self.indexes.items()
+            ))
+        except PyMongoError as e:
+            logger.error(f"Failed to build unique indexes: {str(e)}")
+            metrics.increment("mongodb.indexes.failed")
+            raise
+        metrics.observe("mongodb.indexes.unique_duration", time.monotonic() - started)
+        logger.info("MongoDB unique indexes are up to date")
+
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop applying the registry (index builds already sent keep running on the server)"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        started = time.monotonic()
+        results = await asyncio.gather(
+            *(self._ensure(name, indexes) for name, indexes in self.indexes.items())
+        )
+        metrics.observe("mongodb.indexes.duration", time.monotonic() - started)
+        if all(results):
+            self._ready.set()
+            logger.info("MongoDB indexes are up to date")
+
+    async def _ensure(self, collection_name: str, indexes: List[IndexModel]) -> bool:
+        try:
+            result = await ensure_indexes(collection_name, indexes, self.retired.get(collection_name))
+        except PyMongoError as e:
+            # Unique indexes are already built, the others only make queries faster
+            logger.error(f"Failed to build indexes on {collection_name}: {str(e)}")
+            metrics.increment("mongodb.indexes.failed")
+            return False
+
+        if result["created"] or result["rebuilt"]:
+            logger.info(
+                f"Built indexes on {collection_name}: "
+                f"{', '.join(result['created'] + result['rebuilt'])}"
+            )
+        if result["dropped"]:
+            logger.info(f"Dropped retired indexes on {collection_name}: {', '.join(result['dropped'])}")
+        return True
+
+
+index_manager = IndexManager()
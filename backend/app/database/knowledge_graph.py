@@ -0,0 +1,183 @@
+from loguru import logger
+from database.client import mongodb
+from database.resume_data import PROFILE_PROJECTION, ResumeDataOperations, resume_data_refresher
+from pymongo import ReturnDocument
+from typing import Dict, Any, List, Optional
+from utils.normalize import ITEM_CATEGORIES
+
+
+def misc_field(key: Any) -> str:
+    """
+    Make a misc key safe to use in a dotted update path
+
+    Args:
+        key: Key of the knowledge graph's misc dictionary
+
+    Returns:
+        Key without dots or a leading "$", which MongoDB would read as a
+        nested path or an operator
+    """
+    return str(key).replace(".", "_").lstrip("$") or "item"
+
+
+class KnowledgeGraphBatch:
+    """
+    Collects knowledge graph additions and merges them per category, so a
+    batch of answers is written with a single update.
+
+    - skills: new skills are added with $addToSet, so existing ones are kept
+      in their order and not duplicated
+    - education, work_experience, ...: items are appended with $push
+    - misc: every key is set on its own, leaving the other keys untouched
+    """
+
+    def __init__(self):
+        self.skills: List[str] = []
+        self.items: Dict[str, List[Dict[str, Any]]] = {}
+        self.misc: Dict[str, Any] = {}
+
+    def add(self, category: str, data: Any) -> bool:
+        """
+        Add data to a knowledge graph category
+
+        Args:
+            category: Knowledge graph category
+            data: Normalized item data for that category
+
+        Returns:
+            False if there is nothing to add for this category and data
+        """
+        if not data:
+            return False
+
+        if category == "skills" and isinstance(data, list):
+            self.skills.extend(skill for skill in data if skill not in self.skills)
+        elif category in ITEM_CATEGORIES and isinstance(data, dict):
+            self.items.setdefault(category, []).append(data)
+        elif category == "misc" and isinstance(data, dict):
+            self.misc.update({misc_field(key): value for key, value in data.items()})
+        else:
+            return False
+        return True
+
+    def update(self) -> Optional[Dict[str, Any]]:
+        """
+        Build the MongoDB update applying every addition
+
+        Returns:
+            Update document, or None if nothing was added
+        """
+        update = {}
+        if self.skills:
+            update["$addToSet"] = {"knowledge_graph.skills": {"$each": self.skills}}
+        if self.items:
+            update["$push"] = {
+                f"knowledge_graph.{category}": {"$each": items}
+                for category, items in self.items.items()
+            }
+        if self.misc:
+            update["$set"] = {f"knowledge_graph.misc.{key}": value for key, value in self.misc.items()}
+        return update or None
+
+    def changes(self) -> Dict[str, Any]:
+        """
+        Build a filter matching the users the batch would change
+
+        Returns:
+            Filter document, empty if every user is changed (items are always appended)
+        """
+        if self.items:
+            return {}
+        conditions = []
+        if self.skills:
+            conditions.append({"knowledge_graph.skills": {"$not": {"$all": self.skills}}})
+        conditions.extend(
+            {f"knowledge_graph.misc.{key}": {"$ne": value}} for key, value in self.misc.items()
+        )
+        return {"$or": conditions} if conditions else {}
+
+
+class KnowledgeGraphOperations:
+    """
+    Knowledge graph updates applied by MongoDB in a single round-trip, so
+    concurrent requests don't overwrite each other's additions.
+    """
+
+    @staticmethod
+    async def add_item(user_id: str, category: str, data: Any) -> bool:
+        """
+        Add data to a category of the user's knowledge graph
+
+        Args:
+            user_id: User ID
+            category: Knowledge graph category
+            data: Normalized item data for that category (see KnowledgeGraphBatch)
+
+        Returns:
+            True if the knowledge graph changed
+        """
+        batch = KnowledgeGraphBatch()
+        batch.add(category, data)
+        return await KnowledgeGraphOperations.apply(user_id, batch)
+
+    @staticmethod
+    async def apply(user_id: str, batch: KnowledgeGraphBatch) -> bool:
+        """
+        Write every addition collected in a batch with one update
+
+        Args:
+            user_id: User ID
+            batch: Collected knowledge graph additions
+
+        Returns:
+            True if the knowledge graph changed
+        """
+        update = batch.update()
+        if not update:
+            return False
+
+        # Only a user the batch changes is matched, so its version is bumped only then
+        user = await mongodb.async_db.users.find_one_and_update(
+            {"user_id": user_id, **batch.changes()},
+            {**update, "$inc": {"version": 1}},
+            projection=PROFILE_PROJECTION,
+            return_document=ReturnDocument.AFTER
+        )
+        if not user:
+            if not await mongodb.async_db.users.find_one({"user_id": user_id}, {"_id": 1}):
+                logger.warning(f"User with id {user_id} not found")
+                raise ValueError("User not found")
+            return False
+
+        resume_data_refresher.schedule(ResumeDataOperations.refresh_profile(user))
+
+        logger.info(f"Knowledge graph updated for user {user_id}: {', '.join(update)}")
+        return True
+
+    @staticmethod
+    async def replace(user_id: str, expected: Dict[str, Any], knowledge_graph: Dict[str, Any]) -> bool:
+        """
+        Replace the whole knowledge graph, unless it changed since it was read
+
+        Args:
+            user_id: User ID
+            expected: Knowledge graph as it was read from the user
+            knowledge_graph: New knowledge graph
+
+        Returns:
+            False if the knowledge graph was modified by someone else in the meantime
+        """
+        user = await mongodb.async_db.users.find_one_and_update(
+            {"user_id": user_id, "knowledge_graph": expected},
+            {"$set": {"knowledge_graph": knowledge_graph}, "$inc": {"version": 1}},
+            projection=PROFILE_PROJECTION,
+            return_document=ReturnDocument.AFTER
+        )
+        if not user:
+            logger.warning(f"Knowledge graph of user {user_id} changed concurrently, not replacing it")
+            return False
+
+        resume_data_refresher.schedule(ResumeDataOperations.refresh_profile(user))
+
+        logger.info(f"Knowledge graph replaced for user: {user_id}")
+        return True
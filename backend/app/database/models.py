@@ -46,6 +46,7 @@ class QuestionItem(BaseModel):
     id: str
     question: str
     related_field: str
+    field_type: Optional[str] = None
     answer: Optional[str] = None
     confidence: Optional[float] = None
     status: str = "unanswered"  # or "answered", "reviewed"
@@ -0,0 +1,71 @@
+"""
+Counts the MongoDB commands (round-trips) sent on behalf of each request.
+
+    with track_round_trips() as round_trips:
+        await UserOperations.get_user(email)
+    round_trips.count  # 1
+
+Work scheduled to run after the response (see untracked_context) is not
+counted, so the count is what the request itself waited on.
+"""
+from contextlib import contextmanager
+from contextvars import Context, ContextVar, copy_context
+from typing import Iterator, Optional
+from pymongo import monitoring
+from utils.metrics import metrics
+
+
+class RoundTrips:
+    """Number of commands sent within a track_round_trips() block"""
+
+    def __init__(self):
+        self.count = 0
+
+
+_round_trips: ContextVar[Optional[RoundTrips]] = ContextVar("mongodb_round_trips", default=None)
+
+
+@contextmanager
+def track_round_trips() -> Iterator[RoundTrips]:
+    """
+    Count the commands sent from the current context, including tasks and
+    threads started from it (they inherit a copy of the context)
+
+    Yields:
+        RoundTrips updated as commands are sent
+    """
+    round_trips = RoundTrips()
+    token = _round_trips.set(round_trips)
+    try:
+        yield round_trips
+    finally:
+        _round_trips.reset(token)
+
+
+def untracked_context() -> Context:
+    """
+    Copy of the current context in which commands are not counted, for tasks
+    that outlive the request that started them
+
+    Returns:
+        Context to run the task in
+    """
+    context = copy_context()
+    context.run(_round_trips.set, None)
+    return context
+
+
+class RoundTripListener(monitoring.CommandListener):
+    """Command listener registered on the MongoDB clients"""
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        metrics.increment("mongodb.commands")
+        round_trips = _round_trips.get()
+        if round_trips is not None:
+            round_trips.count += 1
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        pass
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        metrics.increment("mongodb.commands.failed")
@@ -1,16 +1,130 @@
+import asyncio
 from loguru import logger
 from database.client import mongodb
 from database.models import User, Session, ResumeState, Questionnaire, KnowledgeGraph, ResumeStage, JobDetails
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
 from uuid import uuid4
-from typing import Dict, Any, Optional
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
 from datetime import datetime
-from utils.auth import hash_password, verify_password
+from utils.passwords import password_hasher
+from utils.questions import normalize_field_key
+from utils.user_cache import principal_cache
+from utils.pagination import decode_cursor, encode_cursor
+from database.resume_data import PROFILE_PROJECTION, SESSION_RESUME_DATA_PROJECTION, ResumeDataOperations, resume_data_refresher, resume_profile
+import os
+
+# Maximum number of entries kept in the global question library before the
+# least used ones are evicted
+QUESTION_LIBRARY_MAX_ENTRIES = int(os.getenv("QUESTION_LIBRARY_MAX_ENTRIES", "5000"))
+
+# Fields returned when listing a user's sessions
+SESSION_SUMMARY_PROJECTION = {
+    "_id": 0,
+    "session_id": 1,
+    "resume_name": 1,
+    "job_details.job_role": 1,
+    "job_details.company_name": 1,
+    "resume_state.stage": 1,
+    "last_active": 1,
+}
+
+
+class VersionMismatchError(Exception):
+    """Raised when a document is not at one of the versions a write expects (If-Match)"""
+
+
+def version_filter(versions: List[int]) -> Dict[str, Any]:
+    """
+    Filter matching documents at one of the given versions
+
+    Args:
+        versions: Expected versions, 0 also matches documents written before
+            versions were kept
+
+    Returns:
+        Filter on the version field
+    """
+    return {"version": {"$in": versions + [None] if 0 in versions else versions}}
+
+
+def _path_step(expression: Any, part: str, depth: int) -> Any:
+    """Expression reading one part of an update path, numeric parts index arrays as in $set"""
+    name = f"value{depth}"
+    field = {"$let": {"vars": {name: expression}, "in": f"$${name}.{part}"}}
+    if not part.isdigit():
+        return field
+    return {"$cond": [{"$isArray": expression}, {"$arrayElemAt": [expression, int(part)]}, field]}
+
+
+def _set_path(expression: Any, parts: List[str], value: Any, depth: int = 1) -> Any:
+    """Expression of a document or array with value set at the path, padding arrays with nulls as in $set"""
+    if not parts:
+        return value
+    part = parts[0]
+    child = _set_path(_path_step(expression, part, depth), parts[1:], value, depth + 1)
+    field = {"$mergeObjects": [{"$ifNull": [expression, {}]}, {part: child}]}
+    if not part.isdigit():
+        return field
+
+    index, name = int(part), f"index{depth}"
+    element = {"$map": {
+        "input": {"$range": [0, {"$max": [{"$size": expression}, index + 1]}]},
+        "as": name,
+        "in": {"$cond": [{"$eq": [f"$${name}", index]}, child, {"$arrayElemAt": [expression, f"$${name}"]}]},
+    }}
+    return {"$cond": [{"$isArray": expression}, element, field]}
+
+
+def conditional_update(
+    updates: Dict[str, Any],
+    expected_versions: Optional[List[int]] = None
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Build a pipeline update that sets the given paths and bumps the version,
+    only if one of the values differs and the version is expected
+
+    Values are compared as a whole, arrays included (unlike a {field: {"$ne": value}}
+    filter, which matches arrays containing value), so a no-op update keeps the version.
+
+    Args:
+        updates: Dotted paths to set, as for $set
+        expected_versions: Versions the document must be at (If-Match), any if None
+
+    Returns:
+        Tuple of (expression telling whether a value differs, update pipeline)
+    """
+    changed = {"$or": [
+        {"$ne": [_path_value(path), {"$literal": value}]} for path, value in updates.items()
+    ]}
+    apply = changed
+    if expected_versions is not None:
+        apply = {"$and": [changed, {"$in": [{"$ifNull": ["$version", 0]}, expected_versions]}]}
+
+    fields: Dict[str, Any] = {}
+    for path, value in updates.items():
+        field, *parts = path.split(".")
+        fields[field] = _set_path(fields.get(field, f"${field}"), parts, {"$literal": value})
+
+    stage = {field: {"$cond": [apply, expression, f"${field}"]} for field, expression in fields.items()}
+    stage["version"] = {"$cond": [apply, {"$add": [{"$ifNull": ["$version", 0]}, 1]}, "$version"]}
+    return changed, [{"$set": stage}]
+
+
+def _path_value(path: str) -> Any:
+    """Expression reading a dotted update path, numeric parts index arrays as in $set"""
+    field, *parts = path.split(".")
+    expression: Any = f"${field}"
+    for depth, part in enumerate(parts, 1):
+        expression = _path_step(expression, part, depth)
+    return expression
+
 
 class UserOperations:
     @staticmethod
-    def get_user(email: str) -> Dict[str, Any]:
+    async def get_user(email: str) -> Dict[str, Any]:
         """Get user by email"""
-        user = mongodb.db.users.find_one({"email": email})
+        user = await mongodb.async_db.users.find_one({"email": email})
         if not user:
             logger.warning(f"User with email {email} not found")
             raise ValueError("User not found")
@@ -22,9 +136,9 @@ class UserOperations:
         return user
 
     @staticmethod
-    def get_user_by_id(user_id: str) -> Dict[str, Any]:
+    async def get_user_by_id(user_id: str) -> Dict[str, Any]:
         """Get user by user_id"""
-        user = mongodb.db.users.find_one({"user_id": user_id})
+        user = await mongodb.async_db.users.find_one({"user_id": user_id})
         if not user:
             logger.warning(f"User with id {user_id} not found")
             raise ValueError("User not found")
@@ -36,17 +150,39 @@ class UserOperations:
         return user
 
     @staticmethod
-    def create_user_with_password(email: str, password: str) -> Dict[str, str]:
+    async def get_principal(user_id: str) -> Dict[str, Any]:
+        """Get only the user_id and email of a user, enough to authenticate a request"""
+        principal = await mongodb.async_db.users.find_one(
+            {"user_id": user_id},
+            {"_id": 0, "user_id": 1, "email": 1}
+        )
+        if not principal:
+            logger.warning(f"User with id {user_id} not found")
+            raise ValueError("User not found")
+
+        return principal
+
+    @staticmethod
+    async def get_resume_profile(user_id: str) -> Dict[str, Any]:
+        """Get the user-specific part of the resume data, shared by all of the user's sessions"""
+        user = await mongodb.async_db.users.find_one({"user_id": user_id}, {"_id": 0, "hashed_password": 0})
+        if not user:
+            logger.warning(f"User with id {user_id} not found")
+            raise ValueError("User not found")
+
+        return resume_profile(user)
+
+    @staticmethod
+    async def create_user_with_password(email: str, password: str) -> Dict[str, str]:
         """Create a new user with email and password"""
-        # Check if user already exists
-        existing_user = mongodb.db.users.find_one({"email": email})
-        if existing_user:
+        # Reject existing users before paying for the password hash
+        if await mongodb.async_db.users.find_one({"email": email}, {"_id": 1}):
             logger.warning(f"User with email {email} already exists")
             raise ValueError("User with this email already exists")
 
         # Generate user_id and hash password
         user_id = str(uuid4())
-        hashed_password = hash_password(password)
+        hashed_password = await password_hasher.hash(password)
 
         # Create user with default values including empty knowledge_graph
         user = User(
@@ -60,9 +196,14 @@ class UserOperations:
             knowledge_graph=KnowledgeGraph()
         )
 
-        # Insert user into database
+        # Insert user into database, the unique email index (built before the app
+        # serves requests) rejects users created concurrently since the check
         user_dict = user.model_dump()
-        mongodb.db.users.insert_one(user_dict)
+        try:
+            await mongodb.async_db.users.insert_one(user_dict)
+        except DuplicateKeyError:
+            logger.warning(f"User with email {email} already exists")
+            raise ValueError("User with this email already exists")
 
         logger.info(f"User created successfully with id: {user_id}")
 
@@ -72,18 +213,34 @@ class UserOperations:
         }
 
     @staticmethod
-    def authenticate_user(email: str, password: str) -> Optional[Dict[str, Any]]:
+    async def authenticate_user(email: str, password: str) -> Optional[Dict[str, Any]]:
         """Authenticate user with email and password"""
-        user = mongodb.db.users.find_one({"email": email})
+        user = await mongodb.async_db.users.find_one({"email": email})
         if not user:
             logger.warning(f"User with email {email} not found")
             return None
 
         # Verify password
-        if not verify_password(password, user["hashed_password"]):
+        if not await password_hasher.verify(password, user["hashed_password"]):
             logger.warning(f"Invalid password for user {email}")
             return None
 
+        # Upgrade hashes made with a previous BCRYPT_ROUNDS while the password is at hand
+        if password_hasher.needs_rehash(user["hashed_password"]):
+            try:
+                rehashed = await mongodb.async_db.users.find_one_and_update(
+                    {"user_id": user["user_id"]},
+                    {"$set": {"hashed_password": await password_hasher.hash(password)}, "$inc": {"version": 1}},
+                    projection=PROFILE_PROJECTION,
+                    return_document=ReturnDocument.AFTER
+                )
+                if rehashed:
+                    resume_data_refresher.schedule(ResumeDataOperations.refresh_profile(rehashed))
+                logger.info(f"Password rehashed for user {email}")
+            except Exception as e:
+                # Retried on the next login
+                logger.warning(f"Failed to rehash password for user {email}: {str(e)}")
+
         # Remove MongoDB _id and hashed_password from response
         user.pop("_id", None)
         user.pop("hashed_password", None)
@@ -92,44 +249,81 @@ class UserOperations:
         return user
 
     @staticmethod
-    def update_user(email: str, updates: Dict[str, Any]) -> Dict[str, Any]:
-        """Update user fields by email"""
-        # Check if user exists
-        existing_user = mongodb.db.users.find_one({"email": email})
-        if not existing_user:
-            logger.warning(f"User with email {email} not found")
-            raise ValueError("User not found")
-
+    async def update_user(
+        email: str,
+        updates: Dict[str, Any],
+        expected_versions: Optional[List[int]] = None
+    ) -> Dict[str, Any]:
+        """
+        Update user fields by email
+
+        The user's version is bumped with the update, unless nothing changes.
+
+        Args:
+            email: User email
+            updates: Fields to set
+            expected_versions: Versions the user must be at (If-Match), any if None
+
+        Returns:
+            Dictionary with the modified count and the user's version
+
+        Raises:
+            ValueError: If the user does not exist
+            VersionMismatchError: If the user is not at one of the expected versions
+        """
         # Remove protected fields from updates if present
-        protected_fields = ["email", "user_id", "hashed_password"]
+        protected_fields = ["email", "user_id", "hashed_password", "version"]
         for field in protected_fields:
             if field in updates:
                 del updates[field]
 
-        # Update user in database
-        result = mongodb.db.users.update_one(
+        # One command: the update only applies (and bumps the version) if a value
+        # differs and the version is expected, and the user as it was before
+        # tells which case it was
+        changed, pipeline = conditional_update(updates, expected_versions)
+        user = await mongodb.async_db.users.find_one_and_update(
             {"email": email},
-            {"$set": updates}
+            pipeline,
+            projection={"_id": 0, "user_id": 1, "version": 1, "changed": changed},
+            return_document=ReturnDocument.BEFORE
         )
+        if not user:
+            logger.warning(f"User with email {email} not found")
+            raise ValueError("User not found")
 
+        version = user.get("version") or 0
+        if expected_versions is not None and version not in expected_versions:
+            logger.warning(f"User {email} is at version {version}, not updating it")
+            raise VersionMismatchError("User was modified since it was read")
+
+        if not user["changed"]:
+            return {
+                "message": "User updated successfully",
+                "email": email,
+                "modified_count": 0,
+                "version": version
+            }
+
+        principal_cache.invalidate(email=email)
+        resume_data_refresher.schedule(ResumeDataOperations.refresh_user(user["user_id"]))
         logger.info(f"User updated successfully: {email}")
 
         return {
             "message": "User updated successfully",
             "email": email,
-            "modified_count": result.modified_count
+            "modified_count": 1,
+            "version": version + 1
         }
 
 class SessionOperations:
     @staticmethod
-    def create_session(user_id: str) -> Dict[str, str]:
-        """Create a new blank session for a user"""
-        # Check if user exists
-        user = mongodb.db.users.find_one({"user_id": user_id})
-        if not user:
-            logger.warning(f"User with id {user_id} not found")
-            raise ValueError("User not found")
+    async def create_session(user_id: str) -> Dict[str, str]:
+        """
+        Create a new blank session for a user
 
+        The user is not looked up again: user_id must come from an
+        authenticated user (see utils.dependencies.get_current_user).
+        """
         # Generate session_id
         session_id = str(uuid4())
 
@@ -166,7 +360,7 @@ class SessionOperations:
 
         # Insert session into database
         session_dict = session.model_dump()
-        mongodb.db.sessions.insert_one(session_dict)
+        await mongodb.async_db.sessions.insert_one(session_dict)
 
         logger.info(f"Blank session created successfully with id: {session_id}")
 
@@ -177,39 +371,70 @@ class SessionOperations:
         }
 
     @staticmethod
-    def update_session(session_id: str, updates: Dict[str, Any]) -> Dict[str, Any]:
-        """Update session fields by session_id"""
-        # Check if session exists
-        existing_session = mongodb.db.sessions.find_one({"session_id": session_id})
-        if not existing_session:
-            logger.warning(f"Session with id {session_id} not found")
-            raise ValueError("Session not found")
-
-        # Remove session_id from updates if present (can't update session_id)
-        if "session_id" in updates:
-            del updates["session_id"]
+    async def update_session(
+        session_id: str,
+        updates: Dict[str, Any],
+        expected_versions: Optional[List[int]] = None
+    ) -> Dict[str, Any]:
+        """
+        Update session fields by session_id, bumping the session's version
+
+        Args:
+            session_id: Session ID
+            updates: Fields to set
+            expected_versions: Versions the session must be at (If-Match), any if None
+
+        Returns:
+            Dictionary with the modified count and the session's new version
+
+        Raises:
+            ValueError: If the session does not exist
+            VersionMismatchError: If the session is not at one of the expected versions
+        """
+        # Remove session_id and version from updates if present (can't update them)
+        for field in ("session_id", "version"):
+            updates.pop(field, None)
 
         # Update last_active timestamp
         updates["last_active"] = datetime.utcnow()
 
-        # Update session in database
-        result = mongodb.db.sessions.update_one(
-            {"session_id": session_id},
-            {"$set": updates}
+        query: Dict[str, Any] = {"session_id": session_id}
+        if expected_versions is not None:
+            query.update(version_filter(expected_versions))
+
+        # Update session in database, bumping its version for ETags and the materialized resume data
+        session = await mongodb.async_db.sessions.find_one_and_update(
+            query,
+            {"$set": updates, "$inc": {"version": 1}},
+            projection={"_id": 0, "version": 1},
+            return_document=ReturnDocument.AFTER
         )
+        if not session:
+            # Nothing was written: with If-Match, a second round-trip tells a missing
+            # session (404) from an outdated version (412)
+            if expected_versions is not None and await mongodb.async_db.sessions.find_one(
+                {"session_id": session_id}, {"_id": 1}
+            ):
+                logger.warning(f"Session {session_id} was modified since it was read, not updating it")
+                raise VersionMismatchError("Session was modified since it was read")
+            logger.warning(f"Session with id {session_id} not found")
+            raise ValueError("Session not found")
+
+        resume_data_refresher.schedule(ResumeDataOperations.refresh_session(session_id))
 
         logger.info(f"Session updated successfully: {session_id}")
 
         return {
             "message": "Session updated successfully",
             "session_id": session_id,
-            "modified_count": result.modified_count
+            "modified_count": 1,
+            "version": session["version"]
         }
 
     @staticmethod
-    def get_session(session_id: str) -> Dict[str, Any]:
+    async def get_session(session_id: str) -> Dict[str, Any]:
         """Get session by session_id"""
-        session = mongodb.db.sessions.find_one({"session_id": session_id})
+        session = await mongodb.async_db.sessions.find_one({"session_id": session_id})
         if not session:
             logger.warning(f"Session with id {session_id} not found")
             raise ValueError("Session not found")
@@ -221,25 +446,208 @@ class SessionOperations:
         return session
 
     @staticmethod
-    def get_user_sessions(user_id: str) -> Dict[str, Any]:
-        """Get all sessions for a user"""
-        # Check if user exists
-        user = mongodb.db.users.find_one({"user_id": user_id})
-        if not user:
-            logger.warning(f"User with id {user_id} not found")
-            raise ValueError("User not found")
-
-        # Get all sessions for the user, sorted by last_active descending
-        sessions = list(mongodb.db.sessions.find({"user_id": user_id}).sort("last_active", -1))
-
-        # Remove MongoDB _id from all sessions
-        for session in sessions:
-            session.pop("_id", None)
+    async def list_user_sessions(user_id: str, limit: int, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        List a page of a user's session summaries, most recently active first
+
+        Pages are read with a keyset on (last_active, session_id), so every
+        page costs the same however many sessions the user has.
+
+        Args:
+            user_id: User ID
+            limit: Maximum number of sessions in the page
+            cursor: next_cursor of the previous page
+
+        Returns:
+            Dictionary with the session summaries and the cursor of the next
+            page (None on the last page)
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        query: Dict[str, Any] = {"user_id": user_id}
+        if cursor:
+            position = decode_cursor(cursor)
+            if not isinstance(position.get("last_active"), datetime) or "session_id" not in position:
+                raise ValueError("Invalid cursor")
+            query["$or"] = [
+                {"last_active": {"$lt": position["last_active"]}},
+                {"last_active": position["last_active"], "session_id": {"$lt": position["session_id"]}},
+            ]
+
+        # One extra session tells whether there is a next page
+        sessions = await (
+            mongodb.async_db.sessions
+            .find(query, SESSION_SUMMARY_PROJECTION)
+            .sort([("last_active", -1), ("session_id", -1)])
+            .limit(limit + 1)
+            .to_list()
+        )
 
-        logger.info(f"Retrieved {len(sessions)} sessions for user: {user_id}")
+        next_cursor = None
+        if len(sessions) > limit:
+            sessions = sessions[:limit]
+            last = sessions[-1]
+            next_cursor = encode_cursor({"last_active": last["last_active"], "session_id": last["session_id"]})
+
+        summaries = [
+            {
+                "session_id": session["session_id"],
+                "resume_name": session.get("resume_name", ""),
+                "job_role": session.get("job_details", {}).get("job_role", ""),
+                "company_name": session.get("job_details", {}).get("company_name", ""),
+                "stage": session.get("resume_state", {}).get("stage", ResumeStage.INIT.value),
+                "last_active": session["last_active"],
+            }
+            for session in sessions
+        ]
+
+        logger.info(f"Listed {len(summaries)} sessions for user: {user_id}")
 
         return {
             "user_id": user_id,
-            "sessions": sessions,
-            "total_sessions": len(sessions)
+            "sessions": summaries,
+            "next_cursor": next_cursor
         }
+
+    @staticmethod
+    async def iter_user_resume_data(user_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Iterate the session-specific part of the resume data of all of a
+        user's sessions, most recently active first, without loading them all
+
+        Args:
+            user_id: User ID
+
+        Yields:
+            Resume data shaped by MongoDB
+        """
+        cursor = await mongodb.async_db.sessions.aggregate([
+            {"$match": {"user_id": user_id}},
+            {"$sort": {"last_active": -1, "session_id": -1}},
+            {"$project": SESSION_RESUME_DATA_PROJECTION},
+        ])
+        async with cursor:
+            async for resume_data in cursor:
+                yield resume_data
+
+
+class QuestionLibraryOperations:
+    @staticmethod
+    async def get_questions(keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get library questions for the given normalized field keys.
+
+        Every hit has its usage count bumped so frequently shared fields
+        survive eviction.
+
+        Args:
+            keys: Normalized field keys (see utils.questions.normalize_field_key)
+
+        Returns:
+            Dictionary mapping each known key to its library entry
+        """
+        if not keys:
+            return {}
+
+        unique_keys = list(set(keys))
+
+        # The usage bump matches only known keys, so it is sent alongside the
+        # lookup instead of after it
+        entries, _ = await asyncio.gather(
+            mongodb.async_db.question_library.find(
+                {"key": {"$in": unique_keys}},
+                {"_id": 0}
+            ).to_list(),
+            mongodb.async_db.question_library.update_many(
+                {"key": {"$in": unique_keys}},
+                {"$inc": {"usage_count": 1}, "$set": {"last_used": datetime.utcnow()}}
+            )
+        )
+        hits = {entry["key"]: entry for entry in entries}
+
+        logger.info(f"Question library hits: {len(hits)}/{len(unique_keys)}")
+        return hits
+
+    @staticmethod
+    async def save_questions(questions: List[Dict[str, Any]], keys: Optional[List[str]] = None) -> int:
+        """
+        Learn LLM-generated questions into the library.
+
+        Existing entries keep their question text and only have their usage
+        stats updated.
+
+        Args:
+            questions: Question objects as returned by ResumeAgent.generate_questionnaire
+            keys: Library key of the missing field each question was asked for,
+                derived from the question's related_field if None
+
+        Returns:
+            Number of newly added library entries
+        """
+        if keys is None:
+            keys = [
+                normalize_field_key(question.get("related_field", ""), question.get("field_type"))
+                if question.get("related_field") else None
+                for question in questions
+            ]
+
+        now = datetime.utcnow()
+        operations = {}
+        for question, key in zip(questions, keys):
+            text = question.get("question", "")
+            if not key or not text:
+                continue
+
+            operations[key] = UpdateOne(
+                {"key": key},
+                {
+                    "$setOnInsert": {
+                        "key": key,
+                        "question": text,
+                        "field_type": question.get("field_type"),
+                        "suggested_format": question.get("suggested_format", ""),
+                        "created_at": now
+                    },
+                    "$set": {"last_used": now},
+                    "$inc": {"usage_count": 1}
+                },
+                upsert=True
+            )
+
+        if not operations:
+            return 0
+
+        result = await mongodb.async_db.question_library.bulk_write(list(operations.values()), ordered=False)
+        logger.info(f"Question library learned {result.upserted_count} new questions")
+
+        if result.upserted_count:
+            await QuestionLibraryOperations.evict()
+
+        return result.upserted_count
+
+    @staticmethod
+    async def evict(max_entries: int = QUESTION_LIBRARY_MAX_ENTRIES) -> int:
+        """
+        Evict the least used library entries once the library exceeds max_entries
+
+        Args:
+            max_entries: Maximum number of entries to keep
+
+        Returns:
+            Number of evicted entries
+        """
+        overflow = await mongodb.async_db.question_library.count_documents({}) - max_entries
+        if overflow <= 0:
+            return 0
+
+        stale_keys = [
+            entry["key"] async for entry in mongodb.async_db.question_library
+            .find({}, {"_id": 0, "key": 1})
+            .sort([("usage_count", 1), ("last_used", 1)])
+            .limit(overflow)
+        ]
+        result = await mongodb.async_db.question_library.delete_many({"key": {"$in": stale_keys}})
+
+        logger.info(f"Evicted {result.deleted_count} question library entries")
+        return result.deleted_count
@@ -0,0 +1,361 @@
+"""
+Materialized resume data: one document per session in the resume_data
+collection, so reading a session's resume data is a single point lookup.
+
+A document combines the user's profile (personal_info, professional_profile)
+with the session's part (target_job, resume_metadata, analysis,
+questionnaire), and records the version of the user and of the session it was
+built from. Writes keep it up to date incrementally:
+
+- a session update bumps sessions.version and MongoDB merges the new session
+  part into the document ($merge)
+- a profile update bumps users.version and the profile as written (or read
+  back, for updates of arbitrary fields) is set on all of the user's documents
+
+Each part is only replaced by a newer version. The refreshes run in the
+background (resume_data_refresher), so a write still costs its request a
+single round-trip and the documents catch up shortly after the response.
+Documents are built on the first read of a session, and a document whose
+versions are behind the user's or the session's is stale: reads verify the
+versions in the same command and rebuild stale documents, so a read right
+after a write (or after a failed refresh) is never behind it (see
+ResumeDataOperations.get).
+"""
+import asyncio
+from loguru import logger
+from pymongo.errors import DuplicateKeyError
+from typing import Any, Coroutine, Dict, List, Set
+from database.client import mongodb
+from database.models import ResumeStage
+from database.monitoring import untracked_context
+from utils.metrics import metrics
+
+# Shapes a session into the session-specific part of its resume data
+SESSION_RESUME_DATA_PROJECTION = {
+    "_id": 0,
+    "session_id": 1,
+    "user_id": 1,
+    "target_job": {
+        "job_role": {"$ifNull": ["$job_details.job_role", ""]},
+        "company_name": {"$ifNull": ["$job_details.company_name", ""]},
+        "company_url": {"$ifNull": ["$job_details.company_url", ""]},
+        "job_description": {"$ifNull": ["$job_details.job_description", ""]},
+        "parsed_requirements": {"$ifNull": ["$job_details.parsed_requirements", []]},
+        "extracted_keywords": {"$ifNull": ["$job_details.extracted_keywords", []]},
+    },
+    "resume_metadata": {
+        "resume_name": {"$ifNull": ["$resume_name", ""]},
+        "resume_description": {"$ifNull": ["$resume_description", ""]},
+        "session_id": {"$ifNull": ["$session_id", ""]},
+        "created_at": "$created_at",
+        "last_active": "$last_active",
+    },
+    "analysis": {
+        "stage": {"$ifNull": ["$resume_state.stage", ResumeStage.INIT.value]},
+        "missing_fields": {"$ifNull": ["$resume_state.missing_fields", []]},
+        "required_fields": {"$ifNull": ["$resume_state.required_fields", []]},
+        "ai_context": {"$ifNull": ["$resume_state.ai_context", {}]},
+        "last_action": {"$ifNull": ["$resume_state.last_action", ""]},
+    },
+    "questionnaire": {
+        "questions": {"$ifNull": ["$questionnaire.questions", []]},
+        "completion": {"$ifNull": ["$questionnaire.completion", 0.0]},
+    },
+}
+
+# Session part of a materialized document, with the session version it comes from
+SESSION_VIEW_PROJECTION = {
+    **SESSION_RESUME_DATA_PROJECTION,
+    "session_version": {"$ifNull": ["$version", 0]},
+}
+
+# User fields the profile part of the resume data is built from
+PROFILE_PROJECTION = {
+    "_id": 0,
+    "user_id": 1,
+    "version": 1,
+    "name": 1,
+    "email": 1,
+    "resume_email": 1,
+    "phone": 1,
+    "address": 1,
+    "current_job_title": 1,
+    "socials": 1,
+    "knowledge_graph": 1,
+}
+
+# Fields of a materialized document that are not part of the resume data
+VIEW_FIELDS = ("session_id", "user_version", "session_version")
+
+
+def resume_profile(user: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Shape a user into the user-specific part of the resume data, shared by
+    all of the user's sessions
+
+    Args:
+        user: User document
+
+    Returns:
+        Dictionary with personal_info and professional_profile
+    """
+    knowledge_graph = user.get('knowledge_graph', {})
+    return {
+        "personal_info": {
+            "name": user.get('name', ''),
+            "email": user.get('resume_email', '') or user.get('email', ''),
+            "phone": user.get('phone', ''),
+            "address": user.get('address', ''),
+            "current_job_title": user.get('current_job_title', ''),
+            "socials": user.get('socials', {})
+        },
+        "professional_profile": {
+            "education": knowledge_graph.get('education', []),
+            "work_experience": knowledge_graph.get('work_experience', []),
+            "projects": knowledge_graph.get('projects', []),
+            "skills": knowledge_graph.get('skills', []),
+            "certifications": knowledge_graph.get('certifications', []),
+            "research_work": knowledge_graph.get('research_work', []),
+            "misc": knowledge_graph.get('misc', {})
+        }
+    }
+
+
+def verified_resume_data_pipeline(session_id: str) -> List[Dict[str, Any]]:
+    """
+    Read a session's materialized document along with the current versions
+    of its user and its session, in one command
+
+    Args:
+        session_id: Session ID
+
+    Returns:
+        Aggregation pipeline on resume_data, whose document has current_user
+        and current_session lists with the version of the user and of the
+        session (empty if they are gone)
+    """
+    return [
+        {"$match": {"session_id": session_id}},
+        {"$lookup": {"from": "users", "localField": "user_id", "foreignField": "user_id", "as": "current_user"}},
+        {"$lookup": {"from": "sessions", "localField": "session_id", "foreignField": "session_id", "as": "current_session"}},
+        {"$addFields": {
+            "current_user": {"$map": {"input": "$current_user", "in": {"$ifNull": ["$$this.version", 0]}}},
+            "current_session": {"$map": {"input": "$current_session", "in": {"$ifNull": ["$$this.version", 0]}}},
+        }},
+        {"$project": {"_id": 0}},
+    ]
+
+
+class ResumeDataOperations:
+    @staticmethod
+    async def get(session_id: str, verify: bool = True) -> Dict[str, Any]:
+        """
+        Get the materialized resume data of a session, building it if missing
+
+        Args:
+            session_id: Session ID
+            verify: Compare the document's versions with the user's and the
+                session's in the same command, and rebuild it if it is stale
+
+        Returns:
+            Materialized document: the resume data with user_id, session_id,
+            user_version and session_version
+
+        Raises:
+            ValueError: If the session or its user does not exist
+        """
+        if verify:
+            cursor = await mongodb.async_db.resume_data.aggregate(verified_resume_data_pipeline(session_id))
+            async with cursor:
+                documents = await cursor.to_list()
+            resume_data = documents[0] if documents else None
+        else:
+            resume_data = await mongodb.async_db.resume_data.find_one({"session_id": session_id}, {"_id": 0})
+
+        if resume_data is None:
+            metrics.increment("resume_data.misses")
+            return await ResumeDataOperations.build(session_id)
+
+        if verify and ResumeDataOperations.is_stale(
+            resume_data, resume_data.pop("current_user"), resume_data.pop("current_session")
+        ):
+            metrics.increment("resume_data.stale")
+            logger.warning(f"Resume data of session {session_id} is stale, rebuilding it")
+            return await ResumeDataOperations.build(session_id)
+
+        metrics.increment("resume_data.hits")
+        return resume_data
+
+    @staticmethod
+    def is_stale(resume_data: Dict[str, Any], user_versions: List[int], session_versions: List[int]) -> bool:
+        """
+        Whether a materialized document is behind its user or its session
+
+        Args:
+            resume_data: Materialized document
+            user_versions: Current version of the user, empty if the user is gone
+            session_versions: Current version of the session, empty if the session is gone
+
+        Returns:
+            True if the user or the session has a newer version (or is gone)
+        """
+        if not user_versions or not session_versions:
+            return True
+        return user_versions[0] > resume_data["user_version"] or session_versions[0] > resume_data["session_version"]
+
+    @staticmethod
+    async def build(session_id: str) -> Dict[str, Any]:
+        """
+        Build a session's materialized document from the session and its user
+
+        Args:
+            session_id: Session ID
+
+        Returns:
+            Materialized document
+
+        Raises:
+            ValueError: If the session or its user does not exist
+        """
+        cursor = await mongodb.async_db.sessions.aggregate([
+            {"$match": {"session_id": session_id}},
+            {"$project": SESSION_VIEW_PROJECTION},
+        ])
+        async with cursor:
+            sessions = await cursor.to_list()
+        if not sessions:
+            logger.warning(f"Session with id {session_id} not found")
+            raise ValueError("Session not found")
+
+        session = sessions[0]
+        user = await mongodb.async_db.users.find_one({"user_id": session["user_id"]}, PROFILE_PROJECTION)
+        if not user:
+            logger.warning(f"User with id {session['user_id']} not found")
+            raise ValueError("User not found")
+
+        # Same key order as the assembled resume data: profile first, then the session
+        resume_data = {
+            "session_id": session.pop("session_id"),
+            "user_id": session.pop("user_id"),
+            **resume_profile(user),
+            **session,
+            "user_version": user.get("version", 0),
+        }
+
+        # Replaces the stored document unless a part of it is newer, in which
+        # case the upsert collides with it on the unique session_id
+        try:
+            await mongodb.async_db.resume_data.replace_one(
+                {
+                    "session_id": session_id,
+                    "user_version": {"$lte": resume_data["user_version"]},
+                    "session_version": {"$lte": resume_data["session_version"]},
+                },
+                resume_data,
+                upsert=True
+            )
+        except DuplicateKeyError:
+            logger.info(f"Resume data of session {session_id} was updated concurrently, keeping it")
+
+        resume_data.pop("_id", None)
+        logger.info(f"Resume data materialized for session: {session_id}")
+        return resume_data
+
+    @staticmethod
+    async def refresh_session(session_id: str) -> None:
+        """
+        Merge a session's new version into its materialized document
+
+        The document is shaped and merged by MongoDB, without the session
+        leaving the server. Sessions without a document are skipped, it is
+        built on their first read.
+
+        Args:
+            session_id: Session ID
+        """
+        try:
+            cursor = await mongodb.async_db.sessions.aggregate([
+                {"$match": {"session_id": session_id}},
+                {"$project": SESSION_VIEW_PROJECTION},
+                {"$merge": {
+                    "into": "resume_data",
+                    "on": "session_id",
+                    "whenMatched": [{"$replaceWith": {"$cond": {
+                        "if": {"$gt": ["$$new.session_version", "$session_version"]},
+                        "then": {"$mergeObjects": ["$$ROOT", "$$new"]},
+                        "else": "$$ROOT",
+                    }}}],
+                    "whenNotMatched": "discard",
+                }},
+            ])
+            await cursor.close()
+        except Exception as e:
+            # The document stays at its previous version, which verify detects
+            logger.error(f"Failed to refresh resume data of session {session_id}: {str(e)}")
+            metrics.increment("resume_data.refresh_failed")
+
+    @staticmethod
+    async def refresh_profile(user: Dict[str, Any]) -> None:
+        """
+        Set a user's new profile on all of the user's materialized documents
+
+        Args:
+            user: User as written, with the fields of PROFILE_PROJECTION
+        """
+        try:
+            await mongodb.async_db.resume_data.update_many(
+                {"user_id": user["user_id"], "user_version": {"$lt": user["version"]}},
+                {"$set": {**resume_profile(user), "user_version": user["version"]}}
+            )
+        except Exception as e:
+            # The documents stay at their previous version, which verify detects
+            logger.error(f"Failed to refresh resume data of user {user['user_id']}: {str(e)}")
+            metrics.increment("resume_data.refresh_failed")
+
+
+    @staticmethod
+    async def refresh_user(user_id: str) -> None:
+        """
+        Set a user's current profile on all of the user's materialized documents
+
+        Args:
+            user_id: User ID
+        """
+        try:
+            user = await mongodb.async_db.users.find_one({"user_id": user_id}, PROFILE_PROJECTION)
+        except Exception as e:
+            logger.error(f"Failed to refresh resume data of user {user_id}: {str(e)}")
+            metrics.increment("resume_data.refresh_failed")
+            return
+        if user:
+            await ResumeDataOperations.refresh_profile(user)
+
+
+class ResumeDataRefresher:
+    """
+    Runs resume data refreshes off the request path, after the write that
+    needs them. Their commands are not counted in the request's round-trips.
+    """
+
+    def __init__(self):
+        self._tasks: Set[asyncio.Task] = set()
+
+    def schedule(self, refresh: Coroutine) -> None:
+        """
+        Start a refresh in the background
+
+        Args:
+            refresh: ResumeDataOperations.refresh_session, refresh_profile or refresh_user call
+        """
+        task = asyncio.create_task(refresh, context=untracked_context())
+        # The loop only keeps weak references to its tasks
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def wait(self) -> None:
+        """Wait for the scheduled refreshes to finish (they log their own failures)"""
+        while self._tasks:
+            await asyncio.gather(*self._tasks)
+
+
+resume_data_refresher = ResumeDataRefresher()
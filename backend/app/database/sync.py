@@ -0,0 +1,93 @@
+"""
+Blocking wrappers around the async database operations, for scripts and
+other code that runs without an event loop:
+
+    from database import sync
+
+    sync.connect()
+    user = sync.UserOperations.get_user("someone@example.com")
+    resume_data = sync.SessionOperations.iter_user_resume_data(user["user_id"])  # a list
+    sync.close()
+
+Every call runs on one private event loop, which the async MongoDB client is
+bound to. Never use this from the app itself: it would block the server's loop.
+"""
+import asyncio
+import functools
+import inspect
+import threading
+from typing import Any, AsyncIterator, Coroutine, List
+
+from database import operations
+from database.client import mongodb
+
+_loop = None
+_lock = threading.Lock()
+
+
+def run(coro: Coroutine) -> Any:
+    """
+    Run a coroutine to completion on the private event loop
+
+    Args:
+        coro: Coroutine using the database
+
+    Returns:
+        The coroutine's result
+    """
+    global _loop
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        coro.close()
+        raise RuntimeError("database.sync cannot be used from a running event loop, await the operations instead")
+
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+        return _loop.run_until_complete(coro)
+
+
+def connect() -> None:
+    """Connect to MongoDB"""
+    run(mongodb.connect())
+
+
+def close() -> None:
+    """Close the MongoDB connection"""
+    run(mongodb.close())
+
+
+class _SyncOperations:
+    """Exposes the async static methods of an operations class as blocking functions"""
+
+    def __init__(self, operations_class: type):
+        self._operations_class = operations_class
+
+    def __getattr__(self, name: str):
+        method = getattr(self._operations_class, name)
+        if inspect.isasyncgenfunction(method):
+            # Iterated to the end on the loop, returned as a list
+            @functools.wraps(method)
+            def collecting(*args, **kwargs):
+                return run(_collect(method(*args, **kwargs)))
+            return collecting
+        if not inspect.iscoroutinefunction(method):
+            return method
+
+        @functools.wraps(method)
+        def blocking(*args, **kwargs):
+            return run(method(*args, **kwargs))
+        return blocking
+
+
+async def _collect(iterator: AsyncIterator) -> List[Any]:
+    """Read an async iterator to the end"""
+    return [item async for item in iterator]
+
+
+UserOperations = _SyncOperations(operations.UserOperations)
+SessionOperations = _SyncOperations(operations.SessionOperations)
+QuestionLibraryOperations = _SyncOperations(operations.QuestionLibraryOperations)
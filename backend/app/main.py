@@ -1,32 +1,63 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from contextlib import asynccontextmanager
 from loguru import logger
 from database.client import mongodb
+from database.indexes import index_manager
+from database.monitoring import track_round_trips
+from database.resume_data import resume_data_refresher
+from database.models import JobQuestionsRequest
 from services.pipeline import JobQuestionsPipeline
+from services.ollama import OllamaWarmer
+from services.http_client import http_client
 from ai.agent import ResumeAgent
-from routers import users, sessions, auth, ai
+from routers import users, sessions, auth, ai, scraper
+from utils.metrics import metrics
+from utils.passwords import password_hasher
+from utils.responses import ORJSONResponse
 import uvicorn
+import json
+import os
+
+AI_MODEL = os.getenv("AI_MODEL", "gemini/gemini-2.5-flash")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup: Initialize connections and agents
     logger.info("Starting up application...")
-    mongodb.connect()
+
+    # Fork the password hashing workers before any other thread is started
+    password_hasher.start()
+
+    await mongodb.connect()
+
+    # Build the unique MongoDB indexes, and the others in the background
+    await index_manager.start()
 
     # Initialize AI agent
-    app.state.agent = ResumeAgent(model="gemini/gemini-2.5-flash")
+    app.state.agent = ResumeAgent(model=AI_MODEL)
     logger.info("AI agent initialized")
 
+    # Load Ollama models in the background so no user request pays for it
+    app.state.warmer = OllamaWarmer([AI_MODEL])
+    await app.state.warmer.start()
+
     yield
 
     # Shutdown: Clean up resources
     logger.info("Shutting down application...")
-    mongodb.close()
+    await app.state.warmer.stop()
+    await index_manager.stop()
+    http_client.close()
+    password_hasher.close()
+    # Let pending resume data refreshes reach MongoDB before disconnecting
+    await resume_data_refresher.wait()
+    await mongodb.close()
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
-pipeline = JobQuestionsPipeline(model="gemini/gemini-2.5-flash")
+pipeline = JobQuestionsPipeline(model=AI_MODEL)
 
 # Add CORS middleware BEFORE including routers
 app.add_middleware(
@@ -35,17 +66,81 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],  # Used for If-None-Match / If-Match
 )
 
+@app.middleware("http")
+async def count_mongodb_round_trips(request: Request, call_next):
+    """
+    Report the MongoDB round-trips each request cost
+
+    Resume data refreshes run after the response and are not included.
+    """
+    with track_round_trips() as round_trips:
+        response = await call_next(request)
+    # Streamed responses are counted up to their first byte
+    response.headers["X-MongoDB-Round-Trips"] = str(round_trips.count)
+    metrics.observe("mongodb.round_trips_per_request", round_trips.count)
+    return response
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(sessions.router)
 app.include_router(ai.router)
+app.include_router(scraper.router)
 
 @app.get("/")
 def root():
     return {"message": "Ping Pong!"}
+
+
+@app.get("/ready")
+def ready():
+    """Readiness probe: not ready until the configured models are warmed up"""
+    if not app.state.warmer.ready:
+        return JSONResponse(status_code=503, content={"status": "warming_up"})
+    return {"status": "ready"}
+
+
+@app.post("/api/v1/job-questions")
+async def job_questions(request: JobQuestionsRequest, prefetch: bool = True, stream: bool = False):
+    """
+    Generate tailored questions based on job details.
+
+    By default the company website is crawled up front and injected into the
+    prompt, so a single LLM completion is needed. prefetch=false lets the agent
+    fetch it with a tool call instead. stream=true streams the questions as
+    NDJSON while the model is still generating.
+    """
+    if stream:
+        async def lines():
+            try:
+                async for question in pipeline.stream_questions(request):
+                    yield json.dumps({"question": question}) + "\n"
+            except Exception as e:
+                logger.error(f"Error streaming job questions: {str(e)}")
+                yield json.dumps({"error": f"Failed to generate questions: {str(e)}"}) + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    try:
+        questions = await pipeline.generate_questions(request, prefetch=prefetch)
+        return {
+            "questions": questions,
+            "total_questions": len(questions),
+            "job_role": request.job_role,
+            "company_url": request.company_url
+        }
+    except Exception as e:
+        logger.error(f"Error generating job questions: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to generate questions: {str(e)}")
+
+
+@app.get("/metrics")
+def get_metrics():
+    """Export process-wide counters and hit ratios"""
+    return metrics.snapshot()
     
 
 if __name__ == "__main__":
@@ -1,11 +1,19 @@
 from fastapi import APIRouter, HTTPException, Request, Depends
+from fastapi.concurrency import run_in_threadpool
 from loguru import logger
 from database.models import PromptRequest, JobDetails, KnowledgeGraph, FieldMetadata, ResumeStage
-from database.operations import UserOperations, SessionOperations
+from database.operations import UserOperations, SessionOperations, QuestionLibraryOperations
+from database.knowledge_graph import KnowledgeGraphBatch, KnowledgeGraphOperations
 from ai.agent import ResumeAgent
+from ai.tokens import PromptTooLargeError
 from typing import Dict, Optional
 from pydantic import BaseModel
 from utils.dependencies import get_current_user
+from utils.questions import match_questions_to_fields, normalize_field_key
+from utils.answers import classify_answer
+from utils.normalize import normalize_item, normalize_knowledge_graph
+import asyncio
+import time
 
 router = APIRouter(prefix="/api/v1/ai", tags=["ai"])
 
@@ -80,7 +88,7 @@ def run_custom_prompt(request: CustomPromptRequest, app_request: Request):
 
 
 @router.post("/analyze")
-def analyze_job_requirements(
+async def analyze_job_requirements(
     request: AnalyzeJobRequest,
     app_request: Request,
     current_user: dict = Depends(get_current_user)
@@ -102,7 +110,8 @@ def analyze_job_requirements(
         agent: ResumeAgent = app_request.app.state.agent
 
         # Analyze job requirements (without user comparison)
-        analysis = agent.analyze_job_requirements(
+        analysis = await run_in_threadpool(
+            agent.analyze_job_requirements,
             job_description=request.job_description
         )
 
@@ -135,7 +144,7 @@ def analyze_job_requirements(
                     "resume_state.last_action": "job_analyzed"
                 }
 
-                SessionOperations.update_session(request.session_id, session_updates)
+                await SessionOperations.update_session(request.session_id, session_updates)
                 session_updated = True
                 logger.info(f"Session {request.session_id} updated successfully")
 
@@ -167,7 +176,7 @@ def analyze_job_requirements(
 
 
 @router.post("/compare")
-def compare_with_user_profile(
+async def compare_with_user_profile(
     session_id: str,
     app_request: Request,
     current_user: dict = Depends(get_current_user)
@@ -184,7 +193,7 @@ def compare_with_user_profile(
         logger.info(f"Comparing session {session_id} with user profile for {current_user['email']}")
 
         # Get the session
-        session = SessionOperations.get_session(session_id)
+        session = await SessionOperations.get_session(session_id)
 
         # Verify session belongs to current user
         if session['user_id'] != current_user['user_id']:
@@ -200,14 +209,15 @@ def compare_with_user_profile(
             )
 
         # Get user's knowledge graph
-        user = UserOperations.get_user_by_id(current_user['user_id'])
+        user = await UserOperations.get_user_by_id(current_user['user_id'])
         user_knowledge_graph = user.get('knowledge_graph', {})
 
         # Get the agent from app state
         agent: ResumeAgent = app_request.app.state.agent
 
         # Compare requirements with user's knowledge graph
-        comparison = agent.compare_and_find_missing_fields(
+        comparison = await run_in_threadpool(
+            agent.compare_and_find_missing_fields,
             parsed_requirements=parsed_requirements,
             user_knowledge_graph=user_knowledge_graph
         )
@@ -272,7 +282,7 @@ def compare_with_user_profile(
         # Merge questionnaire updates if any
         session_updates.update(questionnaire_updates)
 
-        SessionOperations.update_session(session_id, session_updates)
+        await SessionOperations.update_session(session_id, session_updates)
         logger.info(f"Session {session_id} updated with comparison results")
 
         return {
@@ -299,7 +309,7 @@ def compare_with_user_profile(
 
 
 @router.post("/generate-questionnaire")
-def generate_questionnaire(
+async def generate_questionnaire(
     session_id: str,
     app_request: Request,
     current_user: dict = Depends(get_current_user)
@@ -317,7 +327,7 @@ def generate_questionnaire(
         logger.info(f"Generating questionnaire for session {session_id}")
 
         # Get the session
-        session = SessionOperations.get_session(session_id)
+        session = await SessionOperations.get_session(session_id)
 
         # Verify session belongs to current user
         if session['user_id'] != current_user['user_id']:
@@ -335,21 +345,75 @@ def generate_questionnaire(
         # Get the agent from app state
         agent: ResumeAgent = app_request.app.state.agent
 
-        # Generate questionnaire
-        questionnaire_data = agent.generate_questionnaire(missing_fields)
+        # One question per library key: fields that only differ in case or
+        # punctuation would get the same question twice
+        fields_by_key = {}
+        for field in missing_fields:
+            fields_by_key.setdefault(normalize_field_key(field.get('name', ''), field.get('type')), field)
+
+        # Reuse library questions for fields other sessions have already seen
+        try:
+            library_hits = await QuestionLibraryOperations.get_questions(list(fields_by_key))
+        except Exception as e:
+            logger.warning(f"Question library lookup failed: {str(e)}")
+            library_hits = {}
+
+        question_data = []
+        unseen_fields = []
+        for key, field in fields_by_key.items():
+            entry = library_hits.get(key)
+            if entry:
+                question_data.append({
+                    "question": entry.get('question', ''),
+                    "related_field": field.get('name', ''),
+                    "field_type": field.get('type') or entry.get('field_type'),
+                    "priority": field.get('priority', 1)
+                })
+            else:
+                unseen_fields.append(field)
+
+        # Only the unseen remainder goes to the LLM
+        if unseen_fields:
+            questionnaire_data = await run_in_threadpool(agent.generate_questionnaire, unseen_fields)
+            generated = questionnaire_data.get('questions', [])
+            question_data.extend(generated)
+
+            # Learn each question under the field it was asked for, not the
+            # model's wording of it, so the next lookup of that field hits
+            learned = [
+                (question, normalize_field_key(field.get('name', ''), field.get('type')))
+                for question, field in match_questions_to_fields(generated, unseen_fields)
+                if field is not None
+            ]
+            try:
+                await QuestionLibraryOperations.save_questions(
+                    [question for question, _ in learned], [key for _, key in learned]
+                )
+            except Exception as e:
+                logger.warning(f"Failed to update question library: {str(e)}")
+
+        # Keep high-priority fields first, as the LLM would
+        question_data.sort(
+            key=lambda q: q.get('priority') if isinstance(q.get('priority'), int) else 1,
+            reverse=True
+        )
 
-        logger.info("Questionnaire generated successfully")
+        logger.info(
+            f"Questionnaire generated successfully "
+            f"({len(library_hits)} from library, {len(unseen_fields)} fields sent to AI)"
+        )
 
         # Convert to QuestionItem format with unique IDs
         from uuid import uuid4
         from database.models import QuestionItem
 
         questions = []
-        for q_data in questionnaire_data.get('questions', []):
+        for q_data in question_data:
             question_item = QuestionItem(
                 id=str(uuid4()),
                 question=q_data.get('question', ''),
                 related_field=q_data.get('related_field', ''),
+                field_type=q_data.get('field_type'),
                 answer=None,
                 confidence=None,
                 status="unanswered"
@@ -372,7 +436,7 @@ def generate_questionnaire(
             "resume_state.last_action": "questionnaire_generated"
         }
 
-        SessionOperations.update_session(session_id, session_updates)
+        await SessionOperations.update_session(session_id, session_updates)
         logger.info(f"Session {session_id} updated with questionnaire")
 
         return {
@@ -397,7 +461,7 @@ def generate_questionnaire(
 
 
 @router.post("/answer-question")
-def answer_question(
+async def answer_question(
     request: MultiAnswerRequest,
     app_request: Request,
     current_user: dict = Depends(get_current_user)
@@ -413,7 +477,7 @@ def answer_question(
         logger.info(f"Processing {len(request.answers)} answers for session {session_id}")
 
         # Retrieve session
-        session = SessionOperations.get_session(session_id)
+        session = await SessionOperations.get_session(session_id)
 
         # Verify session ownership
         if session['user_id'] != current_user['user_id']:
@@ -428,7 +492,7 @@ def answer_question(
 
         total_questions = len(questions)
         answered_count = sum(1 for q in questions if q.get('status') == 'answered')
-        knowledge_graph_updated = False
+        knowledge_graph_batch = KnowledgeGraphBatch()
         processed_results = []
 
         # Process each answer
@@ -439,13 +503,20 @@ def answer_question(
                 continue
 
             try:
-                # Process with AI
-                processing_result = agent.process_answer(
-                    question=question_item.get('question', ''),
+                # Resolve trivial answers locally, only free-form ones go to the AI
+                processing_result = classify_answer(
                     answer=answer_text,
                     related_field=question_item.get('related_field', ''),
-                    field_type=question_item.get('field_type', 'misc')
+                    field_type=question_item.get('field_type')
                 )
+                if processing_result is None:
+                    processing_result = await run_in_threadpool(
+                        agent.process_answer,
+                        question=question_item.get('question', ''),
+                        answer=answer_text,
+                        related_field=question_item.get('related_field', ''),
+                        field_type=question_item.get('field_type') or 'misc'
+                    )
 
                 # Update question entry
                 question_item['answer'] = answer_text
@@ -458,40 +529,11 @@ def answer_question(
                     "summary": processing_result.get('summary', '')
                 })
 
-                # Knowledge Graph update
+                # Knowledge Graph update, written once for the whole batch
                 kg_updates = processing_result.get('knowledge_graph_updates', {})
                 category = kg_updates.get('category')
-                data = kg_updates.get('data')
-
-                if category and data:
-                    try:
-                        user = UserOperations.get_user_by_id(current_user['user_id'])
-                        current_kg = user.get('knowledge_graph', {})
-                        kg_update_ops = {}
-
-                        if category == 'skills' and isinstance(data, list):
-                            current_skills = set(current_kg.get('skills', []))
-                            new_skills = [s for s in data if s not in current_skills]
-                            if new_skills:
-                                kg_update_ops["knowledge_graph.skills"] = list(current_skills) + new_skills
-
-                        elif category in ['education', 'work_experience', 'projects', 'certifications', 'research_work']:
-                            if isinstance(data, dict) and data:
-                                current_items = current_kg.get(category, [])
-                                kg_update_ops[f"knowledge_graph.{category}"] = current_items + [data]
-
-                        elif category == 'misc' and isinstance(data, dict):
-                            current_misc = current_kg.get('misc', {})
-                            current_misc.update(data)
-                            kg_update_ops["knowledge_graph.misc"] = current_misc
-
-                        if kg_update_ops:
-                            UserOperations.update_user(current_user['email'], kg_update_ops)
-                            knowledge_graph_updated = True
-                            logger.info(f"Knowledge graph updated for category: {category}")
-
-                    except Exception as kg_err:
-                        logger.error(f"Failed to update knowledge graph for {question_id}: {kg_err}")
+                data = normalize_item(category, kg_updates.get('data'))
+                knowledge_graph_batch.add(category, data)
 
             except Exception as err:
                 logger.error(f"Error processing answer for {question_id}: {err}")
@@ -517,7 +559,19 @@ def answer_question(
         if completion >= 100:
             session_updates["resume_state.stage"] = ResumeStage.READY_FOR_RESUME.value
 
-        SessionOperations.update_session(session_id, session_updates)
+        async def update_knowledge_graph() -> bool:
+            try:
+                return await KnowledgeGraphOperations.apply(current_user['user_id'], knowledge_graph_batch)
+            except Exception as kg_err:
+                logger.error(f"Failed to update knowledge graph for session {session_id}: {kg_err}")
+                return False
+
+        # The user and the session are in different collections, so both
+        # updates are sent at once
+        knowledge_graph_updated, _ = await asyncio.gather(
+            update_knowledge_graph(),
+            SessionOperations.update_session(session_id, session_updates)
+        )
 
         logger.info(f"Batch answers processed for session {session_id}: {answered_count}/{total_questions}")
 
@@ -542,8 +596,9 @@ def answer_question(
         raise HTTPException(status_code=500, detail=f"Failed to process answers: {str(e)}")
 
 @router.post("/optimize")
-def optimize_knowledge_graph(
+async def optimize_knowledge_graph(
     app_request: Request,
+    normalize_only: bool = False,
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -555,6 +610,10 @@ def optimize_knowledge_graph(
     - Verbose skill descriptions → proper skills array
     - Certifications in misc → certifications section
 
+    Dates, degrees and company/institution names are always normalized locally.
+    With normalize_only=true only that local pass runs and the AI is skipped,
+    which is enough for formatting-only fixes.
+
     The user's knowledge graph is automatically updated with the optimized structure.
     """
     try:
@@ -563,7 +622,7 @@ def optimize_knowledge_graph(
         logger.info(f"Optimizing knowledge graph for user: {email}")
 
         # Get current user data
-        user = UserOperations.get_user_by_id(user_id)
+        user = await UserOperations.get_user_by_id(user_id)
         current_kg = user.get('knowledge_graph', {})
 
         # Check if knowledge graph is empty
@@ -573,29 +632,38 @@ def optimize_knowledge_graph(
                 detail="Knowledge graph is empty. Add some data first using /api/v1/users/knowledge-graph/add"
             )
 
-        # Get the agent from app state
-        agent: ResumeAgent = app_request.app.state.agent
+        if normalize_only:
+            # Formatting-only fixes don't need the AI
+            restructured_graph, changes_made = normalize_knowledge_graph(current_kg)
+            suggestions = []
+        else:
+            # Get the agent from app state
+            agent: ResumeAgent = app_request.app.state.agent
 
-        # Optimize the knowledge graph
-        optimization_result = agent.optimize_knowledge_graph(current_kg)
+            # Optimize the knowledge graph
+            optimization_result = await run_in_threadpool(agent.optimize_knowledge_graph, current_kg)
 
-        if "error" in optimization_result:
-            logger.warning(f"AI optimization failed: {optimization_result['error']}")
-            raise HTTPException(
-                status_code=500,
-                detail="Failed to optimize knowledge graph with AI"
-            )
+            if "error" in optimization_result:
+                logger.warning(f"AI optimization failed: {optimization_result['error']}")
+                raise HTTPException(
+                    status_code=500,
+                    detail="Failed to optimize knowledge graph with AI"
+                )
 
-        restructured_graph = optimization_result.get('restructured_graph', {})
-        changes_made = optimization_result.get('changes_made', [])
-        suggestions = optimization_result.get('suggestions', [])
+            restructured_graph, normalization_changes = normalize_knowledge_graph(
+                optimization_result.get('restructured_graph', {})
+            )
+            changes_made = optimization_result.get('changes_made', []) + normalization_changes
+            suggestions = optimization_result.get('suggestions', [])
 
-        # Update user's knowledge graph with optimized structure
+        # Update user's knowledge graph with optimized structure, unless it
+        # was changed while the AI was working on it
         if changes_made:
-            update_operations = {
-                "knowledge_graph": restructured_graph
-            }
-            UserOperations.update_user(email, update_operations)
+            if not await KnowledgeGraphOperations.replace(user_id, current_kg, restructured_graph):
+                raise HTTPException(
+                    status_code=409,
+                    detail="Knowledge graph was modified during optimization, please retry"
+                )
             logger.info(f"Knowledge graph updated with {len(changes_made)} changes")
         else:
             logger.info("No changes needed - knowledge graph is already well-structured")
@@ -614,6 +682,8 @@ def optimize_knowledge_graph(
         raise
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except PromptTooLargeError as e:
+        raise HTTPException(status_code=413, detail=f"Knowledge graph is too large to optimize: {str(e)}")
     except Exception as e:
         logger.error(f"Error optimizing knowledge graph: {str(e)}")
         raise HTTPException(
@@ -623,7 +693,7 @@ def optimize_knowledge_graph(
 
 
 @router.post("/parse-text")
-def parse_text_to_knowledge_graph(
+async def parse_text_to_knowledge_graph(
     request: ParseTextRequest,
     app_request: Request,
     current_user: dict = Depends(get_current_user)
@@ -684,7 +754,7 @@ def parse_text_to_knowledge_graph(
         agent = app_request.app.state.agent
 
         # Parse the free-form text
-        parse_result = agent.parse_free_text_to_knowledge_graph(request.text)
+        parse_result = await run_in_threadpool(agent.parse_free_text_to_knowledge_graph, request.text)
 
         # Check for parsing errors
         if "error" in parse_result:
@@ -694,60 +764,19 @@ def parse_text_to_knowledge_graph(
             )
 
         category = parse_result.get('category')
-        data = parse_result.get('data')
+        data = normalize_item(category, parse_result.get('data'))
         confidence = parse_result.get('confidence', 0.0)
         reasoning = parse_result.get('reasoning', '')
 
         logger.info(f"Parsed text into category: {category} with confidence: {confidence}")
 
-        # Get current user data
-        user = UserOperations.get_user_by_id(user_id)
-        knowledge_graph = user.get('knowledge_graph', {})
-
-        # Add parsed data to appropriate knowledge graph category
-        knowledge_graph_updated = False
-
-        if category == "skills":
-            # Skills is an array of strings
-            current_skills = knowledge_graph.get('skills', [])
-            if isinstance(data, list):
-                # Add new skills, avoiding duplicates
-                for skill in data:
-                    if skill not in current_skills:
-                        current_skills.append(skill)
-                        knowledge_graph_updated = True
-                knowledge_graph['skills'] = current_skills
-
-        elif category in ["education", "work_experience", "projects", "certifications", "research_work"]:
-            # These are arrays of objects
-            current_items = knowledge_graph.get(category, [])
-            if not isinstance(current_items, list):
-                current_items = []
-
-            # Add the new item
-            current_items.append(data)
-            knowledge_graph[category] = current_items
-            knowledge_graph_updated = True
-
-        elif category == "misc":
-            # Misc is a dictionary
-            current_misc = knowledge_graph.get('misc', {})
-            if isinstance(data, dict):
-                current_misc.update(data)
-            else:
-                # If data is not a dict, store it with a generated key
-                import time
-                key = f"item_{int(time.time())}"
-                current_misc[key] = data
-            knowledge_graph['misc'] = current_misc
-            knowledge_graph_updated = True
-
-        # Update user's knowledge graph
+        if category == "misc" and not isinstance(data, dict):
+            # If data is not a dict, store it with a generated key
+            data = {f"item_{int(time.time())}": data}
+
+        # Add parsed data to the appropriate knowledge graph category
+        knowledge_graph_updated = await KnowledgeGraphOperations.add_item(user_id, category, data)
         if knowledge_graph_updated:
-            update_operations = {
-                "knowledge_graph": knowledge_graph
-            }
-            UserOperations.update_user(email, update_operations)
             logger.info(f"Knowledge graph updated with new {category} data")
 
         return {
@@ -1,22 +1,25 @@
-from fastapi import APIRouter, HTTPException, Response, Depends
+from fastapi import APIRouter, Cookie, Header, HTTPException, Response, Depends
 from loguru import logger
 from database.models import SignupRequest, LoginRequest, UserResponse
 from database.operations import UserOperations
-from utils.auth import create_access_token
+from typing import Optional
+from utils.auth import create_access_token, revoke_access_token
 from utils.dependencies import get_current_user as get_current_user_dependency
+from utils.passwords import PasswordHasherBusyError, TooManyAttemptsError, login_throttle
+import math
 
 router = APIRouter(prefix="/api/v1/auth", tags=["auth"])
 
 
 @router.post("/signup")
-def signup(request: SignupRequest, response: Response):
+async def signup(request: SignupRequest, response: Response):
     """
     Sign up a new user with email and password
     Creates a user with default values for other fields
     """
     try:
         logger.info(f"Signing up new user: {request.email}")
-        result = UserOperations.create_user_with_password(request.email, request.password)
+        result = await UserOperations.create_user_with_password(request.email, request.password)
 
         # Create access token
         access_token = create_access_token(
@@ -44,13 +47,15 @@ def signup(request: SignupRequest, response: Response):
 
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except PasswordHasherBusyError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e:
         logger.error(f"Error signing up user: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to sign up user: {str(e)}")
 
 
 @router.post("/login")
-def login(request: LoginRequest, response: Response):
+async def login(request: LoginRequest, response: Response):
     """
     Login user with email and password
     Sets JWT access token in cookie
@@ -58,8 +63,11 @@ def login(request: LoginRequest, response: Response):
     try:
         logger.info(f"Logging in user: {request.email}")
 
+        # Throttle attempts per email before any bcrypt work
+        login_throttle.check(request.email)
+
         # Authenticate user
-        user = UserOperations.authenticate_user(request.email, request.password)
+        user = await UserOperations.authenticate_user(request.email, request.password)
         if not user:
             raise HTTPException(status_code=401, detail="Invalid email or password")
 
@@ -89,26 +97,47 @@ def login(request: LoginRequest, response: Response):
 
     except HTTPException:
         raise
+    except TooManyAttemptsError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
+    except PasswordHasherBusyError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e:
         logger.error(f"Error logging in user: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to login: {str(e)}")
 
 
 @router.get("/me")
-def get_current_user(current_user: dict = Depends(get_current_user_dependency)):
+async def get_current_user(current_user: dict = Depends(get_current_user_dependency)):
     """
     Get current authenticated user details from JWT token.
     Supports both cookie and Authorization header (Bearer token).
     """
-    return current_user
+    try:
+        user = await UserOperations.get_user_by_id(current_user["user_id"])
+        # Remove hashed_password from response
+        user.pop("hashed_password", None)
+        return user
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
 
 
 @router.post("/logout")
-def logout(response: Response):
+def logout(
+    response: Response,
+    access_token: Optional[str] = Cookie(None),
+    authorization: Optional[str] = Header(None)
+):
     """
     Logout user by removing the access token cookie
+    The token (from the cookie or Authorization header) is revoked until it expires
     """
     try:
+        token = access_token
+        if not token and authorization and authorization.startswith("Bearer "):
+            token = authorization.replace("Bearer ", "").strip()
+        if token:
+            revoke_access_token(token)
+
         # Remove cookie with same settings as when it was set
         response.delete_cookie(
             key="access_token",
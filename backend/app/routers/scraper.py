@@ -0,0 +1,40 @@
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
+from loguru import logger
+from pydantic import BaseModel
+from services.scraper import SCRAPER_BATCH_TIMEOUT, fetch_websites_content
+from typing import List, Optional
+from utils.dependencies import get_current_user
+import json
+
+router = APIRouter(prefix="/api/v1/scraper", tags=["scraper"])
+
+MAX_BATCH_URLS = 100
+
+
+class BatchScrapeRequest(BaseModel):
+    urls: List[str]
+    timeout: Optional[float] = None  # Seconds for the whole batch, capped at SCRAPER_BATCH_TIMEOUT
+
+
+@router.post("/batch")
+async def scrape_batch(request: BatchScrapeRequest, current_user: dict = Depends(get_current_user)):
+    """
+    Scrape many company websites at once.
+
+    Results are streamed back as NDJSON, one line per URL, in the order they
+    complete. URLs not done when the batch times out get an error line.
+    """
+    if not request.urls:
+        raise HTTPException(status_code=400, detail="No URLs provided")
+    if len(request.urls) > MAX_BATCH_URLS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_URLS} URLs per batch")
+
+    timeout = min(request.timeout or SCRAPER_BATCH_TIMEOUT, SCRAPER_BATCH_TIMEOUT)
+    logger.info(f"Scraping {len(request.urls)} URLs for user_id: {current_user['user_id']}")
+
+    async def lines():
+        async for result in fetch_websites_content(request.urls, timeout=timeout):
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
@@ -1,13 +1,19 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Response
+from fastapi.responses import StreamingResponse
 from loguru import logger
-from database.operations import SessionOperations, UserOperations
-from typing import Dict, Any
+from database.operations import SessionOperations, UserOperations, VersionMismatchError
+from database.resume_data import VIEW_FIELDS, ResumeDataOperations
+from typing import AsyncIterator, Dict, Any, Optional
 from utils.dependencies import get_current_user
+from utils.etag import etag_matches, if_match_versions, make_etag, not_modified
+from utils.responses import ORJSONResponse, dumps
 
 router = APIRouter(prefix="/api/v1/sessions", tags=["sessions"])
 
+MAX_SESSIONS_PAGE_SIZE = 100
+
 @router.post("/new")
-def create_session(current_user: dict = Depends(get_current_user)):
+async def create_session(current_user: dict = Depends(get_current_user)):
     """
     Create a new blank session for the authenticated user.
 
@@ -17,7 +23,7 @@ def create_session(current_user: dict = Depends(get_current_user)):
     try:
         user_id = current_user['user_id']
         logger.info(f"Creating new blank session for user_id: {user_id}")
-        result = SessionOperations.create_session(user_id)
+        result = await SessionOperations.create_session(user_id)
         return result
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -26,11 +32,25 @@ def create_session(current_user: dict = Depends(get_current_user)):
         raise HTTPException(status_code=500, detail=f"Failed to create session: {str(e)}")
 
 @router.put("")
-def update_session(session_id: str, updates: Dict[str, Any]):
+async def update_session(
+    session_id: str,
+    updates: Dict[str, Any],
+    response: Response,
+    if_match: Optional[str] = Header(None)
+):
+    """
+    Update session fields.
+
+    Send the ETag of the session that was edited in If-Match to get a 412
+    instead of overwriting changes made since.
+    """
     try:
         logger.info(f"Updating session with session_id: {session_id}")
-        result = SessionOperations.update_session(session_id, updates)
+        result = await SessionOperations.update_session(session_id, updates, if_match_versions(if_match))
+        response.headers["ETag"] = make_etag(result.pop('version'))
         return result
+    except VersionMismatchError as e:
+        raise HTTPException(status_code=412, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
@@ -38,17 +58,23 @@ def update_session(session_id: str, updates: Dict[str, Any]):
         raise HTTPException(status_code=500, detail=f"Failed to update session: {str(e)}")
 
 @router.get("/{session_id}")
-def get_session(session_id: str):
+async def get_session(session_id: str, if_none_match: Optional[str] = Header(None)):
     """
     Get session details by session_id.
 
     Returns complete session information including job details, resume state,
-    questionnaire, and timestamps.
+    questionnaire, and timestamps. The ETag is the session's version: send it
+    back in If-None-Match to get an empty 304 while the session is unchanged.
     """
     try:
         logger.info(f"Retrieving session with session_id: {session_id}")
-        session = SessionOperations.get_session(session_id)
-        return session
+        session = await SessionOperations.get_session(session_id)
+
+        etag = make_etag(session.get('version', 0))
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        # The session document is serialized as is, without jsonable_encoder
+        return ORJSONResponse(session, headers={"ETag": etag})
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
@@ -56,27 +82,38 @@ def get_session(session_id: str):
         raise HTTPException(status_code=500, detail=f"Failed to retrieve session: {str(e)}")
 
 @router.get("/user/all")
-def get_user_sessions(current_user: dict = Depends(get_current_user)):
+async def get_user_sessions(
+    limit: int = Query(20, ge=1, le=MAX_SESSIONS_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
     """
-    Get all sessions for the authenticated user.
+    List the authenticated user's sessions, most recently active first.
 
     Uses authentication (cookie or Authorization header) to identify the user.
-    Returns all sessions sorted by last_active (most recent first).
+    Only summary fields are returned (session_id, resume_name, job_role,
+    company_name, stage, last_active). Pass the returned next_cursor to get
+    the next page; it is null on the last page.
     """
     try:
         user_id = current_user['user_id']
-        logger.info(f"Retrieving all sessions for user_id: {user_id}")
-        result = SessionOperations.get_user_sessions(user_id)
-        return result
+        logger.info(f"Listing sessions for user_id: {user_id}")
+        result = await SessionOperations.list_user_sessions(user_id, limit, cursor)
+        return ORJSONResponse(result)
     except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error retrieving user sessions: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to retrieve user sessions: {str(e)}")
 
 
 @router.get("/{session_id}/resume-data")
-def get_resume_data(session_id: str, current_user: dict = Depends(get_current_user)):
+async def get_resume_data(
+    session_id: str,
+    verify: bool = Query(True, description="Rebuild the resume data if it is behind the profile or the session"),
+    if_none_match: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user)
+):
     """
     Get complete resume data for a session.
 
@@ -88,84 +125,31 @@ def get_resume_data(session_id: str, current_user: dict = Depends(get_current_us
     - Job details (target role, company, requirements)
     - Resume metadata (name, description)
     - Session status and stage
+
+    The data is read from a document materialized on write, checked against the
+    current profile and session versions in the same lookup. Its ETag is made of
+    the profile and session versions it was built from: send it back in
+    If-None-Match to get an empty 304 while neither changed.
     """
     try:
         user_id = current_user['user_id']
         logger.info(f"Retrieving resume data for session {session_id} and user {user_id}")
 
-        # Get session data
-        session = SessionOperations.get_session(session_id)
+        resume_data = await ResumeDataOperations.get(session_id, verify=verify)
 
         # Verify session belongs to current user
-        if session['user_id'] != user_id:
+        if resume_data.pop('user_id') != user_id:
             raise HTTPException(status_code=403, detail="Not authorized to access this session")
 
-        # Get user data
-        user = UserOperations.get_user_by_id(user_id)
-
-        # Remove sensitive data
-        user.pop('hashed_password', None)
-
-        # Structure the resume data
-        resume_data = {
-            # Personal Information
-            "personal_info": {
-                "name": user.get('name', ''),
-                "email": user.get('resume_email', '') or user.get('email', ''),
-                "phone": user.get('phone', ''),
-                "address": user.get('address', ''),
-                "current_job_title": user.get('current_job_title', ''),
-                "socials": user.get('socials', {})
-            },
-
-            # Professional Profile
-            "professional_profile": {
-                "education": user.get('knowledge_graph', {}).get('education', []),
-                "work_experience": user.get('knowledge_graph', {}).get('work_experience', []),
-                "projects": user.get('knowledge_graph', {}).get('projects', []),
-                "skills": user.get('knowledge_graph', {}).get('skills', []),
-                "certifications": user.get('knowledge_graph', {}).get('certifications', []),
-                "research_work": user.get('knowledge_graph', {}).get('research_work', []),
-                "misc": user.get('knowledge_graph', {}).get('misc', {})
-            },
-
-            # Target Job Information
-            "target_job": {
-                "job_role": session.get('job_details', {}).get('job_role', ''),
-                "company_name": session.get('job_details', {}).get('company_name', ''),
-                "company_url": session.get('job_details', {}).get('company_url', ''),
-                "job_description": session.get('job_details', {}).get('job_description', ''),
-                "parsed_requirements": session.get('job_details', {}).get('parsed_requirements', []),
-                "extracted_keywords": session.get('job_details', {}).get('extracted_keywords', [])
-            },
-
-            # Resume Metadata
-            "resume_metadata": {
-                "resume_name": session.get('resume_name', ''),
-                "resume_description": session.get('resume_description', ''),
-                "session_id": session.get('session_id', ''),
-                "created_at": session.get('created_at'),
-                "last_active": session.get('last_active')
-            },
-
-            # Analysis & Status
-            "analysis": {
-                "stage": session.get('resume_state', {}).get('stage', 'init'),
-                "missing_fields": session.get('resume_state', {}).get('missing_fields', []),
-                "required_fields": session.get('resume_state', {}).get('required_fields', []),
-                "ai_context": session.get('resume_state', {}).get('ai_context', {}),
-                "last_action": session.get('resume_state', {}).get('last_action', '')
-            },
-
-            # Questionnaire (if applicable)
-            "questionnaire": {
-                "questions": session.get('questionnaire', {}).get('questions', []),
-                "completion": session.get('questionnaire', {}).get('completion', 0.0)
-            }
-        }
+        etag = make_etag(resume_data['user_version'], resume_data['session_version'])
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
 
         logger.info(f"Resume data retrieved successfully for session {session_id}")
-        return resume_data
+        return ORJSONResponse(
+            {key: value for key, value in resume_data.items() if key not in VIEW_FIELDS},
+            headers={"ETag": etag}
+        )
 
     except HTTPException:
         raise
@@ -177,7 +161,10 @@ def get_resume_data(session_id: str, current_user: dict = Depends(get_current_us
 
 
 @router.get("/user/all/resume-data")
-def get_all_resume_data(current_user: dict = Depends(get_current_user)):
+async def get_all_resume_data(
+    current_user: dict = Depends(get_current_user),
+    accept: Optional[str] = Header(None)
+):
     """
     Get complete resume data for ALL sessions of the authenticated user.
 
@@ -190,91 +177,45 @@ def get_all_resume_data(current_user: dict = Depends(get_current_user)):
     - Questionnaire data
 
     Sessions are sorted by last_active (most recent first).
+
+    With "Accept: application/x-ndjson" the resume data is streamed instead,
+    one JSON object per line. The first line is the user's profile (personal
+    information and professional profile), sent once; every following line
+    is the session-specific part of one session's resume data.
     """
     try:
         user_id = current_user['user_id']
         logger.info(f"Retrieving resume data for all sessions of user {user_id}")
 
-        # Get all user sessions
-        sessions = SessionOperations.get_user_sessions(user_id)
+        # User data is fetched once, it is the same for all sessions
+        profile = await UserOperations.get_resume_profile(user_id)
 
-        # Get user data once (same for all sessions)
-        user = UserOperations.get_user_by_id(user_id)
-        user.pop('hashed_password', None)
+        if accept and "application/x-ndjson" in accept:
+            return StreamingResponse(
+                _stream_resume_data(user_id, profile),
+                media_type="application/x-ndjson"
+            )
 
         # Build resume data for each session
         all_resume_data = []
-
-        for session in sessions.get('sessions', []):
-            resume_data = {
+        async for session_data in SessionOperations.iter_user_resume_data(user_id):
+            session_data.pop('user_id', None)
+            all_resume_data.append({
                 # Session ID at top level for easy access
-                "session_id": session.get('session_id', ''),
-
-                # Personal Information (same across all sessions)
-                "personal_info": {
-                    "name": user.get('name', ''),
-                    "email": user.get('resume_email', '') or user.get('email', ''),
-                    "phone": user.get('phone', ''),
-                    "address": user.get('address', ''),
-                    "current_job_title": user.get('current_job_title', ''),
-                    "socials": user.get('socials', {})
-                },
-
-                # Professional Profile (same across all sessions)
-                "professional_profile": {
-                    "education": user.get('knowledge_graph', {}).get('education', []),
-                    "work_experience": user.get('knowledge_graph', {}).get('work_experience', []),
-                    "projects": user.get('knowledge_graph', {}).get('projects', []),
-                    "skills": user.get('knowledge_graph', {}).get('skills', []),
-                    "certifications": user.get('knowledge_graph', {}).get('certifications', []),
-                    "research_work": user.get('knowledge_graph', {}).get('research_work', []),
-                    "misc": user.get('knowledge_graph', {}).get('misc', {})
-                },
-
-                # Target Job Information (unique per session)
-                "target_job": {
-                    "job_role": session.get('job_details', {}).get('job_role', ''),
-                    "company_name": session.get('job_details', {}).get('company_name', ''),
-                    "company_url": session.get('job_details', {}).get('company_url', ''),
-                    "job_description": session.get('job_details', {}).get('job_description', ''),
-                    "parsed_requirements": session.get('job_details', {}).get('parsed_requirements', []),
-                    "extracted_keywords": session.get('job_details', {}).get('extracted_keywords', [])
-                },
-
-                # Resume Metadata (unique per session)
-                "resume_metadata": {
-                    "resume_name": session.get('resume_name', ''),
-                    "resume_description": session.get('resume_description', ''),
-                    "session_id": session.get('session_id', ''),
-                    "created_at": session.get('created_at'),
-                    "last_active": session.get('last_active')
-                },
-
-                # Analysis & Status (unique per session)
-                "analysis": {
-                    "stage": session.get('resume_state', {}).get('stage', 'init'),
-                    "missing_fields": session.get('resume_state', {}).get('missing_fields', []),
-                    "required_fields": session.get('resume_state', {}).get('required_fields', []),
-                    "ai_context": session.get('resume_state', {}).get('ai_context', {}),
-                    "last_action": session.get('resume_state', {}).get('last_action', '')
-                },
-
-                # Questionnaire (unique per session)
-                "questionnaire": {
-                    "questions": session.get('questionnaire', {}).get('questions', []),
-                    "completion": session.get('questionnaire', {}).get('completion', 0.0)
-                }
-            }
-
-            all_resume_data.append(resume_data)
+                "session_id": session_data.pop('session_id', ''),
+                # Personal Information and Professional Profile (same across all sessions)
+                **profile,
+                # Target Job, Resume Metadata, Analysis & Status, Questionnaire (unique per session)
+                **session_data
+            })
 
         logger.info(f"Retrieved resume data for {len(all_resume_data)} sessions")
 
-        return {
+        return ORJSONResponse({
             "user_id": user_id,
             "total_sessions": len(all_resume_data),
             "resume_data": all_resume_data
-        }
+        })
 
     except HTTPException:
         raise
@@ -283,3 +224,22 @@ def get_all_resume_data(current_user: dict = Depends(get_current_user)):
     except Exception as e:
         logger.error(f"Error retrieving all resume data: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to retrieve all resume data: {str(e)}")
+
+
+async def _stream_resume_data(user_id: str, profile: Dict[str, Any]) -> AsyncIterator[bytes]:
+    """Stream the resume data of all of a user's sessions as NDJSON, after a profile header record"""
+    yield dumps({"type": "profile", "user_id": user_id, **profile}) + b"\n"
+
+    total_sessions = 0
+    try:
+        async for session_data in SessionOperations.iter_user_resume_data(user_id):
+            session_data.pop('user_id', None)
+            yield dumps({"type": "resume", **session_data}) + b"\n"
+            total_sessions += 1
+    except Exception as e:
+        # Headers are already sent, so errors are reported in the stream
+        logger.error(f"Error streaming resume data: {str(e)}")
+        yield dumps({"type": "error", "error": f"Failed to retrieve all resume data: {str(e)}"}) + b"\n"
+        return
+
+    logger.info(f"Streamed resume data for {total_sessions} sessions")
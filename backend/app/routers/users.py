@@ -1,10 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Header, Response
 from loguru import logger
 from database.models import User
-from database.operations import UserOperations
+from database.operations import UserOperations, VersionMismatchError
 from typing import Dict, Any, List, Optional
 from pydantic import BaseModel
 from utils.dependencies import get_current_user
+from utils.etag import etag_matches, if_match_versions, make_etag, not_modified
+from utils.responses import ORJSONResponse
+from utils.normalize import normalize_item, normalize_skills, normalize_knowledge_graph, normalize_knowledge_graph_field
 
 router = APIRouter(prefix="/api/v1/users", tags=["users"])
 
@@ -19,16 +22,27 @@ class KnowledgeGraphUpdate(BaseModel):
     misc: Optional[Dict] = None
 
 @router.get("")
-def get_user(current_user: dict = Depends(get_current_user)):
+async def get_user(
+    if_none_match: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user)
+):
     """
     Get current authenticated user's profile.
     Uses authentication (cookie or Authorization header) to identify the user.
+
+    The ETag is the user's version: send it back in If-None-Match to get an
+    empty 304 while the profile is unchanged.
     """
     try:
         email = current_user['email']
         logger.info(f"Fetching user with email: {email}")
-        result = UserOperations.get_user(email)
-        return result
+        result = await UserOperations.get_user(email)
+
+        etag = make_etag(result.get('version', 0))
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        # The user document is serialized as is, without jsonable_encoder
+        return ORJSONResponse(result, headers={"ETag": etag})
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
@@ -36,16 +50,33 @@ def get_user(current_user: dict = Depends(get_current_user)):
         raise HTTPException(status_code=500, detail=f"Failed to fetch user: {str(e)}")
 
 @router.put("")
-def update_user(updates: Dict[str, Any], current_user: dict = Depends(get_current_user)):
+async def update_user(
+    updates: Dict[str, Any],
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user)
+):
     """
     Update current authenticated user's profile.
     Uses authentication (cookie or Authorization header) to identify the user.
+
+    Send the ETag of the profile that was edited in If-Match to get a 412
+    instead of overwriting changes made since.
     """
     try:
         email = current_user['email']
         logger.info(f"Updating user with email: {email}")
-        result = UserOperations.update_user(email, updates)
+        if isinstance(updates.get('knowledge_graph'), dict):
+            updates['knowledge_graph'], _ = normalize_knowledge_graph(updates['knowledge_graph'])
+        # Dotted paths ("knowledge_graph.education.0") get the same normalization
+        for field, value in updates.items():
+            if field.startswith('knowledge_graph.'):
+                updates[field] = normalize_knowledge_graph_field(field, value)
+        result = await UserOperations.update_user(email, updates, if_match_versions(if_match))
+        response.headers["ETag"] = make_etag(result.pop('version'))
         return result
+    except VersionMismatchError as e:
+        raise HTTPException(status_code=412, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
@@ -54,7 +85,7 @@ def update_user(updates: Dict[str, Any], current_user: dict = Depends(get_curren
 
 
 @router.post("/knowledge-graph/add")
-def add_to_knowledge_graph(
+async def add_to_knowledge_graph(
     updates: KnowledgeGraphUpdate,
     current_user: dict = Depends(get_current_user)
 ):
@@ -89,27 +120,27 @@ def add_to_knowledge_graph(
         update_operations = {}
 
         if updates.education is not None:
-            update_operations["knowledge_graph.education"] = updates.education
+            update_operations["knowledge_graph.education"] = [normalize_item("education", item) for item in updates.education]
             set_items['education'] = len(updates.education)
 
         if updates.work_experience is not None:
-            update_operations["knowledge_graph.work_experience"] = updates.work_experience
+            update_operations["knowledge_graph.work_experience"] = [normalize_item("work_experience", item) for item in updates.work_experience]
             set_items['work_experience'] = len(updates.work_experience)
 
         if updates.research_work is not None:
-            update_operations["knowledge_graph.research_work"] = updates.research_work
+            update_operations["knowledge_graph.research_work"] = [normalize_item("research_work", item) for item in updates.research_work]
             set_items['research_work'] = len(updates.research_work)
 
         if updates.projects is not None:
-            update_operations["knowledge_graph.projects"] = updates.projects
+            update_operations["knowledge_graph.projects"] = [normalize_item("projects", item) for item in updates.projects]
             set_items['projects'] = len(updates.projects)
 
         if updates.certifications is not None:
-            update_operations["knowledge_graph.certifications"] = updates.certifications
+            update_operations["knowledge_graph.certifications"] = [normalize_item("certifications", item) for item in updates.certifications]
             set_items['certifications'] = len(updates.certifications)
 
         if updates.skills is not None:
-            update_operations["knowledge_graph.skills"] = updates.skills
+            update_operations["knowledge_graph.skills"] = normalize_skills(updates.skills)
             set_items['skills'] = len(updates.skills)
 
         if updates.misc is not None:
@@ -120,7 +151,7 @@ def add_to_knowledge_graph(
             raise HTTPException(status_code=400, detail="No items provided to set")
 
         # Update the user
-        result = UserOperations.update_user(email, update_operations)
+        result = await UserOperations.update_user(email, update_operations)
 
         logger.info(f"Successfully set knowledge graph items: {set_items}")
 
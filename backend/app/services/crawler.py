@@ -0,0 +1,297 @@
+import asyncio
+import httpx
+import json
+import re
+import time
+from collections import OrderedDict
+from loguru import logger
+from smolagents import tool
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+import os
+
+from utils.metrics import metrics
+from .http_client import http_client
+from .scraper import fetch_website_content, validate_url
+
+# Extra pages fetched besides the landing page
+CRAWLER_MAX_PAGES = int(os.getenv("CRAWLER_MAX_PAGES", "4"))
+
+# Seconds for the whole crawl, robots.txt included
+CRAWLER_TIME_BUDGET = float(os.getenv("CRAWLER_TIME_BUDGET", "8"))
+
+# Size caps of the merged summary
+CRAWLER_MAX_CHARS = int(os.getenv("CRAWLER_MAX_CHARS", "10000"))
+CRAWLER_MAX_HEADINGS = 20
+CRAWLER_MAX_PARAGRAPHS = 30
+
+ROBOTS_CACHE_TTL = float(os.getenv("ROBOTS_CACHE_TTL", "3600"))
+ROBOTS_CACHE_MAX_ENTRIES = int(os.getenv("ROBOTS_CACHE_MAX_ENTRIES", "1000"))
+ROBOTS_USER_AGENT = "*"
+
+# Page kinds worth crawling, in order of preference, with the path tried when
+# the landing page does not link to one
+PAGE_KINDS = [
+    ("about", re.compile(r'about|company|who-we-are|mission|our-story', re.IGNORECASE), "/about"),
+    ("careers", re.compile(r'careers?|jobs|join|work-with-us|hiring', re.IGNORECASE), "/careers"),
+    ("engineering", re.compile(r'engineering|tech(nology)?|developers?|blog', re.IGNORECASE), "/engineering"),
+    ("culture", re.compile(r'culture|values|team|people|life-at', re.IGNORECASE), None),
+]
+
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+# Shorter text shared with the landing page is not treated as navigation or footer
+MIN_SHARED_CHARS = 20
+
+
+class RobotsCache:
+    """
+    Per-origin robots.txt rules, cached for ROBOTS_CACHE_TTL, least recently
+    used origins evicted past max_entries.
+    Must be used on the HTTP client's loop.
+    """
+
+    def __init__(self, ttl: float = ROBOTS_CACHE_TTL, max_entries: int = ROBOTS_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._rules: OrderedDict[str, Tuple[float, RobotFileParser]] = OrderedDict()
+
+    async def allowed(self, url: str) -> bool:
+        """
+        Whether robots.txt allows fetching url
+
+        Args:
+            url: Page URL
+
+        Returns:
+            False if the site's robots.txt disallows the URL
+        """
+        parsed = urlparse(url)
+        origin = f"{parsed.scheme}://{parsed.netloc}"
+        cached = self._rules.get(origin)
+        if cached is None or cached[0] < time.time():
+            cached = (time.time() + self.ttl, await self._fetch(origin))
+            self._rules[origin] = cached
+        self._rules.move_to_end(origin)
+        while len(self._rules) > self.max_entries:
+            self._rules.popitem(last=False)
+        return cached[1].can_fetch(ROBOTS_USER_AGENT, url)
+
+    async def _fetch(self, origin: str) -> RobotFileParser:
+        # Same rules as RobotFileParser.read: 401/403 disallow all, other errors allow all
+        rules = RobotFileParser(f"{origin}/robots.txt")
+        try:
+            response = await http_client.request("GET", rules.url)
+            if response.status_code in (401, 403):
+                rules.disallow_all = True
+            elif response.status_code >= 400:
+                rules.allow_all = True
+            else:
+                rules.parse(response.text.splitlines())
+        except httpx.HTTPError as e:
+            logger.warning(f"Failed to fetch {rules.url}: {str(e)}")
+            rules.allow_all = True
+        return rules
+
+
+robots_cache = RobotsCache()
+
+
+def select_pages(website_url: str, links: List[str], max_pages: int = CRAWLER_MAX_PAGES) -> List[str]:
+    """
+    Pick the same-site pages worth crawling, one per page kind
+
+    Args:
+        website_url: Landing page URL
+        links: Absolute links found on the landing page
+        max_pages: Maximum number of pages
+
+    Returns:
+        Page URLs, in order of preference
+    """
+    landing = urlparse(website_url)
+    host = landing.netloc.lower().removeprefix("www.")
+    origin = f"{landing.scheme}://{landing.netloc}"
+
+    candidates = []
+    for link in links:
+        parsed = urlparse(link)
+        if parsed.netloc.lower().removeprefix("www.") != host:
+            continue
+        if parsed.path.rstrip("/") == landing.path.rstrip("/"):
+            continue
+        candidates.append(link)
+
+    pages = []
+    for _, pattern, fallback in PAGE_KINDS:
+        # Prefer the shortest matching path ("/about" over "/about/press/2019")
+        matches = sorted(
+            (link for link in candidates if pattern.search(urlparse(link).path) and link not in pages),
+            key=lambda link: len(urlparse(link).path)
+        )
+        if matches:
+            pages.append(matches[0])
+        elif fallback:
+            pages.append(origin + fallback)
+
+    return pages[:max_pages]
+
+
+async def crawl_company(
+    website_url: str,
+    max_pages: int = CRAWLER_MAX_PAGES,
+    time_budget: float = CRAWLER_TIME_BUDGET
+) -> Dict[str, Any]:
+    """
+    Crawl a company's landing page plus its about/careers/engineering pages and
+    merge them into one summary. Runs on the HTTP client's loop.
+
+    Pages still loading when the time budget runs out are dropped.
+
+    Args:
+        website_url: Company website URL
+        max_pages: Maximum number of pages fetched besides the landing page
+        time_budget: Seconds for the whole crawl
+
+    Returns:
+        Merged summary, or a dictionary with an 'error' key if the landing page failed
+    """
+    started = time.monotonic()
+    deadline = asyncio.get_running_loop().time() + time_budget
+
+    try:
+        async with asyncio.timeout_at(deadline):
+            if not await robots_cache.allowed(website_url):
+                return {'error': 'Disallowed by robots.txt', 'url': website_url}
+            landing = await fetch_website_content(website_url)
+    except TimeoutError:
+        return {'error': f'Crawl timed out after {time_budget}s', 'url': website_url}
+
+    if 'error' in landing:
+        return landing
+
+    pages = [landing]
+    tasks = [
+        asyncio.create_task(_fetch_allowed(url))
+        for url in select_pages(website_url, landing.get('links', []), max_pages)
+    ]
+    if tasks:
+        remaining = deadline - asyncio.get_running_loop().time()
+        done, pending = await asyncio.wait(tasks, timeout=max(remaining, 0))
+        for task in pending:
+            task.cancel()
+        # Let the cancelled fetches release their connections before returning
+        await asyncio.gather(*pending, return_exceptions=True)
+        metrics.increment("crawler.pages_timed_out", len(pending))
+        # Keep the preference order of select_pages
+        pages += [task.result() for task in tasks if task in done and task.result()]
+
+    metrics.observe("crawler.pages", len(pages))
+    metrics.observe("crawler.duration", time.monotonic() - started)
+    return merge_pages(pages)
+
+
+async def _fetch_allowed(url: str) -> Optional[Dict[str, Any]]:
+    """Fetch a page if robots.txt allows it, None if not allowed or failed"""
+    if not await robots_cache.allowed(url):
+        return None
+    content = await fetch_website_content(url)
+    return None if 'error' in content else content
+
+
+def merge_pages(pages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge crawled pages into one deduplicated, size-capped summary
+
+    Args:
+        pages: Page contents, landing page first
+
+    Returns:
+        Summary with the landing page's title and description, the crawled
+        pages, and their headings, paragraphs and text without repeats
+        (navigation, footers, ...)
+    """
+    landing = pages[0]
+    headings, paragraphs, sentences = [], [], []
+    seen_headings, seen_paragraphs, seen_sentences = set(), set(), set()
+    text_length = 0
+
+    landing_text = _strip_title(landing)
+    for page in pages:
+        for heading in page.get('headings', []):
+            if len(headings) < CRAWLER_MAX_HEADINGS and _is_new(heading['text'], seen_headings):
+                headings.append(heading)
+        for paragraph in page.get('paragraphs', []):
+            if len(paragraphs) < CRAWLER_MAX_PARAGRAPHS and _is_new(paragraph, seen_paragraphs):
+                paragraphs.append(paragraph)
+        text = _strip_title(page)
+        if page is not landing:
+            text = _strip_shared_edges(text, landing_text)
+        for sentence in SENTENCE_END.split(text):
+            if text_length < CRAWLER_MAX_CHARS and _is_new(sentence, seen_sentences):
+                sentences.append(sentence)
+                text_length += len(sentence) + 1
+
+    return {
+        'url': landing['url'],
+        'title': landing.get('title'),
+        'meta_description': landing.get('meta_description'),
+        'pages': [{'url': page['url'], 'title': page.get('title')} for page in pages],
+        'headings': headings,
+        'paragraphs': paragraphs,
+        'text_content': ' '.join(sentences)[:CRAWLER_MAX_CHARS]
+    }
+
+
+def _strip_title(page: Dict[str, Any]) -> str:
+    """Page text without the page title it starts with"""
+    text = page.get('text_content', '')
+    title = page.get('title') or ''
+    return text[len(title):].lstrip() if title and text.startswith(title) else text
+
+
+def _strip_shared_edges(text: str, landing_text: str) -> str:
+    """Remove the header and footer text a page shares with the landing page"""
+    def shared_prefix(a: str, b: str) -> int:
+        prefix = os.path.commonprefix([a, b])
+        # Do not cut a word in half
+        if prefix and prefix[-1].isalnum() and len(prefix) < len(a) and a[len(prefix)].isalnum():
+            prefix = prefix[:prefix.rfind(' ') + 1]
+        return len(prefix) if len(prefix) >= MIN_SHARED_CHARS else 0
+
+    start = shared_prefix(text, landing_text)
+    end = shared_prefix(text[start:][::-1], landing_text[::-1])
+    return text[start:len(text) - end].strip()
+
+
+def _is_new(text: str, seen: set) -> bool:
+    """Whether text (ignoring case and whitespace) is not in seen yet, adding it"""
+    key = re.sub(r'\s+', ' ', text).strip().lower()
+    if not key or key in seen:
+        return False
+    seen.add(key)
+    return True
+
+
+@tool
+def get_company_content(website_url: str) -> str:
+    """
+    Get a company's website content from its landing page and its about, careers and engineering pages
+
+    Args:
+        website_url: the url of the company's website
+    """
+    if not validate_url(website_url):
+        return json.dumps({
+            'error': 'Invalid URL provided',
+            'url': website_url
+        })
+
+    try:
+        return json.dumps(http_client.run(crawl_company(website_url)))
+    except Exception as e:
+        return json.dumps({
+            'error': f'Crawling failed: {str(e)}',
+            'url': website_url
+        })
@@ -0,0 +1,287 @@
+import codecs
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional
+import os
+
+try:
+    from lxml import etree
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+# Stop reading a page after this many bytes
+SCRAPER_MAX_BYTES = int(os.getenv("SCRAPER_MAX_BYTES", str(2 * 1024 * 1024)))
+
+# "auto" uses lxml when installed, "lxml" or "html.parser" force a driver
+SCRAPER_PARSER = os.getenv("SCRAPER_PARSER", "auto")
+
+# Pages already in memory are fed in chunks so parsing can stop early
+FEED_CHUNK_SIZE = 64 * 1024
+
+MAX_HEADINGS = 10
+MAX_PARAGRAPHS = 15
+MAX_TEXT_CHARS = 5000
+MAX_LINKS = 100
+
+HEADING_TAGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+SKIPPED_TAGS = {"script", "style", "template"}
+
+# Block elements that implicitly close an open paragraph ("<p>one<p>two", "<p>a<div>b")
+BLOCK_TAGS = {
+    "p", "li", "ul", "ol", "dl", "dt", "dd", "div", "table", "form", "pre", "blockquote", "hr",
+    "section", "article", "aside", "header", "footer", "nav", "main", "figure", "address",
+    *HEADING_TAGS,
+}
+# Elements that implicitly close an open heading ("<h3>title<p>text")
+HEADING_CLOSING_TAGS = {"p", "li", *HEADING_TAGS}
+
+
+class ContentCollector:
+    """
+    Collects title, meta description, headings, paragraphs, text and links in a single pass.
+
+    Parser-agnostic: it implements the lxml parser target interface (start, end,
+    data, close), and HTMLCollectorParser drives it from the stdlib parser, so
+    both drivers produce the same output. Paragraphs and headings left open are
+    closed when a block starts, the way lxml does, since the stdlib parser
+    reports no implicit end tags. `done` turns true once every limit is
+    reached, letting the caller stop reading the page.
+    """
+
+    def __init__(self):
+        self.title: Optional[str] = None
+        self.meta_description: Optional[str] = None
+        self.headings: List[Dict[str, Any]] = []
+        self.paragraphs: List[str] = []
+        self.links: List[str] = []
+        self.chunks: List[str] = []
+        self.text_length = 0
+        self.done = False
+
+        self._skip_depth = 0
+        self._head_done = False
+        # Open title/heading/paragraph captures: [tag, text parts]
+        self._captures: List[list] = []
+        # Text of the current, not yet complete line
+        self._line: List[str] = []
+
+    def start(self, tag: str, attrs: Dict[str, Optional[str]]) -> None:
+        if self.done:
+            return
+        tag = tag.lower()
+
+        if tag in BLOCK_TAGS:
+            self._close_implicitly(tag)
+
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag == "title" and self.title is None:
+            self._captures.append([tag, []])
+        elif tag == "meta" and self.meta_description is None and attrs.get("name") == "description":
+            self.meta_description = (attrs.get("content") or "").strip()
+        elif tag == "a" and attrs.get("href") and len(self.links) < MAX_LINKS:
+            self.links.append(attrs["href"].strip())
+        elif tag in HEADING_TAGS or tag == "p":
+            self._head_done = True
+            self._captures.append([tag, []])
+        elif tag == "body":
+            self._head_done = True
+
+    def end(self, tag: str) -> None:
+        if self.done:
+            return
+        tag = tag.lower()
+
+        if tag in SKIPPED_TAGS:
+            self._skip_depth = max(self._skip_depth - 1, 0)
+            return
+        if tag == "head":
+            self._head_done = True
+
+        # Close the innermost matching capture (and anything left open inside it)
+        for i in range(len(self._captures) - 1, -1, -1):
+            if self._captures[i][0] == tag:
+                self._finish_from(i)
+                break
+
+        self._check_done()
+
+    def data(self, text: str) -> None:
+        if self.done or self._skip_depth:
+            return
+        for capture in self._captures:
+            capture[1].append(text)
+
+        if self.text_length < MAX_TEXT_CHARS:
+            lines = text.split("\n")
+            self._line.append(lines[0])
+            for line in lines[1:]:
+                self._add_line("".join(self._line))
+                self._line = [line]
+
+    def close(self) -> Dict[str, Any]:
+        self._finish_from(0)
+        if self._line:
+            self._add_line("".join(self._line))
+            self._line = []
+        return self.result()
+
+    def result(self) -> Dict[str, Any]:
+        """Extracted content, without url and status_code. Links are raw hrefs."""
+        return {
+            "title": self.title,
+            "meta_description": self.meta_description,
+            "headings": self.headings[:MAX_HEADINGS],
+            "paragraphs": self.paragraphs[:MAX_PARAGRAPHS],
+            "text_content": " ".join(self.chunks)[:MAX_TEXT_CHARS],
+            "links": self.links
+        }
+
+    def _close_implicitly(self, tag: str) -> None:
+        # Outermost open paragraph or heading the new block closes
+        for i, capture in enumerate(self._captures):
+            if capture[0] == "p" or (capture[0] in HEADING_TAGS and tag in HEADING_CLOSING_TAGS):
+                self._finish_from(i)
+                break
+
+    def _finish_from(self, index: int) -> None:
+        # Finish the captures from index on, in document order
+        for capture in self._captures[index:]:
+            self._finish(*capture)
+        del self._captures[index:]
+
+    def _finish(self, tag: str, parts: List[str]) -> None:
+        text = "".join(parts).strip()
+        if tag == "title":
+            if self.title is None:
+                self.title = text
+        elif tag == "p":
+            if text and len(self.paragraphs) < MAX_PARAGRAPHS:
+                self.paragraphs.append(text)
+        elif len(self.headings) < MAX_HEADINGS:
+            self.headings.append({"level": HEADING_TAGS[tag], "text": text})
+
+    def _add_line(self, line: str) -> None:
+        # Same clean-up as before: strip lines, break on double spaces
+        for phrase in line.strip().split("  "):
+            phrase = phrase.strip()
+            if phrase and self.text_length < MAX_TEXT_CHARS:
+                # Length of the chunks joined with spaces
+                self.text_length += len(phrase) + (1 if self.chunks else 0)
+                self.chunks.append(phrase)
+
+    def _check_done(self) -> None:
+        self.done = (
+            self._head_done
+            and len(self.headings) >= MAX_HEADINGS
+            and len(self.paragraphs) >= MAX_PARAGRAPHS
+            and self.text_length >= MAX_TEXT_CHARS
+        )
+
+
+class HTMLCollectorParser(HTMLParser):
+    """Drives a ContentCollector from the stdlib HTML parser"""
+
+    def __init__(self, collector: ContentCollector):
+        super().__init__(convert_charrefs=True)
+        self.collector = collector
+
+    def handle_starttag(self, tag, attrs):
+        self.collector.start(tag, dict(attrs))
+
+    def handle_endtag(self, tag):
+        self.collector.end(tag)
+
+    def handle_data(self, data):
+        self.collector.data(data)
+
+
+class ContentExtractor:
+    """
+    Incremental page extractor: feed it the response body chunk by chunk and
+    stop as soon as `done` is true.
+    """
+
+    def __init__(self, encoding: Optional[str] = None, parser: str = SCRAPER_PARSER):
+        """
+        Args:
+            encoding: Response charset, UTF-8 if unknown
+            parser: "auto", "lxml" or "html.parser"
+        """
+        self.collector = ContentCollector()
+        self.bytes_read = 0
+        self._use_lxml = parser == "lxml" or (parser == "auto" and LXML_AVAILABLE)
+
+        if self._use_lxml:
+            # lxml decodes the bytes itself
+            self._parser = etree.HTMLParser(target=self.collector, encoding=_codec(encoding))
+        else:
+            self._decoder = codecs.getincrementaldecoder(_codec(encoding))(errors="replace")
+            self._parser = HTMLCollectorParser(self.collector)
+
+    @property
+    def done(self) -> bool:
+        """Whether every limit is reached or the byte cap was hit"""
+        return self.collector.done or self.bytes_read >= SCRAPER_MAX_BYTES
+
+    def feed(self, chunk: bytes) -> None:
+        """
+        Parse the next chunk of the response body, truncated to the byte cap
+
+        Args:
+            chunk: Raw bytes
+        """
+        if self.done:
+            return
+        chunk = chunk[:SCRAPER_MAX_BYTES - self.bytes_read]
+        self.bytes_read += len(chunk)
+
+        if self._use_lxml:
+            self._parser.feed(chunk)
+        else:
+            self._parser.feed(self._decoder.decode(chunk))
+
+    def close(self) -> Dict[str, Any]:
+        """
+        Finish parsing
+
+        Returns:
+            Extracted content (title, meta_description, headings, paragraphs, text_content, links)
+        """
+        if self._use_lxml:
+            if self.bytes_read:
+                self._parser.close()
+            else:
+                self.collector.close()
+        else:
+            self._parser.feed(self._decoder.decode(b"", final=True))
+            self._parser.close()
+            self.collector.close()
+        return self.collector.result()
+
+
+def _codec(encoding: Optional[str]) -> str:
+    try:
+        return codecs.lookup(encoding).name if encoding else "utf-8"
+    except LookupError:
+        return "utf-8"
+
+
+def extract_content(html: bytes, encoding: Optional[str] = None, parser: str = SCRAPER_PARSER) -> Dict[str, Any]:
+    """
+    Extract title, meta description, headings, paragraphs and text from a whole page
+
+    Args:
+        html: Raw page
+        encoding: Page charset, UTF-8 if unknown
+        parser: "auto", "lxml" or "html.parser"
+
+    Returns:
+        Extracted content
+    """
+    extractor = ContentExtractor(encoding, parser)
+    for start in range(0, len(html), FEED_CHUNK_SIZE):
+        extractor.feed(html[start:start + FEED_CHUNK_SIZE])
+        if extractor.done:
+            break
+    return extractor.close()
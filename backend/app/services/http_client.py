@@ -0,0 +1,162 @@
+import asyncio
+import httpx
+import threading
+from contextlib import asynccontextmanager
+from loguru import logger
+from typing import Any, AsyncIterator, Coroutine, Dict, List, Optional
+from urllib.parse import urlparse
+import os
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "6"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+
+class HTTPClient:
+    """
+    Process-wide pooled async HTTP client.
+
+    The httpx client lives on a dedicated event loop thread so that the same
+    connection pool serves sync callers (smolagents tools running in worker
+    threads) and async callers (FastAPI endpoints) alike.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        # Per-host semaphore and number of requests holding or waiting for it,
+        # dropped once that number is back to 0 so user-supplied hosts don't pile up
+        self._host_limits: Dict[str, List[Any]] = {}
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The client's event loop, started on first use"""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="http-client", daemon=True
+                )
+                self._thread.start()
+                logger.info(f"HTTP client started (http2={HTTP2_AVAILABLE})")
+            return self._loop
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Only called on the client's loop, no locking needed
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                headers=DEFAULT_HEADERS,
+                follow_redirects=True,
+                max_redirects=5,
+                timeout=httpx.Timeout(10.0),
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+                )
+            )
+        return self._client
+
+    @asynccontextmanager
+    async def _host_slot(self, url: str) -> AsyncIterator[None]:
+        # Only used on the client's loop, no locking needed
+        host = urlparse(url).netloc.lower()
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = self._host_limits[host] = [asyncio.Semaphore(HTTP_MAX_CONNECTIONS_PER_HOST), 0]
+        limit[1] += 1
+        try:
+            async with limit[0]:
+                yield
+        finally:
+            limit[1] -= 1
+            if not limit[1]:
+                del self._host_limits[host]
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs) -> AsyncIterator[httpx.Response]:
+        """
+        Stream a request through the shared pool, respecting the per-host limit.
+        Must run on the client's loop (see run / arun).
+
+        Args:
+            method: HTTP method
+            url: Request URL
+            **kwargs: Extra httpx request arguments (headers, timeout...)
+
+        Yields:
+            The streaming httpx response
+        """
+        async with self._host_slot(url):
+            async with self._get_client().stream(method, url, **kwargs) as response:
+                yield response
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Send a request through the shared pool and read the whole body.
+        Must run on the client's loop (see run / arun).
+        """
+        async with self.stream(method, url, **kwargs) as response:
+            await response.aread()
+            return response
+
+    def run(self, coro: Coroutine) -> Any:
+        """
+        Run a coroutine on the client's loop from synchronous code
+
+        Args:
+            coro: Coroutine using this client
+
+        Returns:
+            The coroutine's result
+        """
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("HTTPClient.run cannot be called from the client's own loop")
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    async def arun(self, coro: Coroutine) -> Any:
+        """
+        Run a coroutine on the client's loop from another event loop
+
+        Args:
+            coro: Coroutine using this client
+
+        Returns:
+            The coroutine's result
+        """
+        if threading.current_thread() is self._thread:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self.loop))
+
+    def close(self) -> None:
+        """Close pooled connections and stop the loop thread"""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        if self._client is not None:
+            asyncio.run_coroutine_threadsafe(self._client.aclose(), loop).result()
+            self._client = None
+        self._host_limits = {}
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join()
+        loop.close()
+        logger.info("HTTP client closed")
+
+
+http_client = HTTPClient()
@@ -0,0 +1,130 @@
+import asyncio
+import httpx
+from loguru import logger
+from typing import List, Optional
+import os
+
+OLLAMA_API_BASE = os.getenv("OLLAMA_API_BASE", "http://localhost:11434")
+
+# Must match the num_ctx the models are called with, otherwise Ollama reloads
+# the model on the first real request
+OLLAMA_NUM_CTX = 8192
+
+# How long Ollama keeps a model loaded after a request, and how often we ping it
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+OLLAMA_KEEP_ALIVE_INTERVAL = float(os.getenv("OLLAMA_KEEP_ALIVE_INTERVAL", "240"))
+
+# Model loads can take minutes on cold disks
+OLLAMA_WARMUP_TIMEOUT = float(os.getenv("OLLAMA_WARMUP_TIMEOUT", "600"))
+
+
+def ollama_model_name(model: str) -> str:
+    """
+    Strip the LiteLLM provider prefix from an Ollama model id
+
+    Args:
+        model: LiteLLM model id (e.g. "ollama_chat/gpt-oss")
+
+    Returns:
+        Model name as Ollama knows it (e.g. "gpt-oss")
+    """
+    return model.split("/", 1)[1] if "/" in model else model
+
+
+class OllamaWarmer:
+    """
+    Loads Ollama models in the background at startup and keeps them resident.
+
+    Non-Ollama models are ignored, so the warmer is ready immediately when no
+    Ollama model is configured.
+    """
+
+    def __init__(
+        self,
+        models: List[str],
+        api_base: str = OLLAMA_API_BASE,
+        keep_alive: str = OLLAMA_KEEP_ALIVE,
+        interval: float = OLLAMA_KEEP_ALIVE_INTERVAL
+    ):
+        """
+        Args:
+            models: LiteLLM model ids used by the app
+            api_base: Ollama server URL
+            keep_alive: Ollama keep_alive duration sent with every request
+            interval: Seconds between keep-alive pings
+        """
+        self.models = sorted({ollama_model_name(m) for m in models if "ollama" in m})
+        self.api_base = api_base.rstrip("/")
+        self.keep_alive = keep_alive
+        self.interval = interval
+        self._ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        """Whether every configured Ollama model has been loaded"""
+        return self._ready.is_set()
+
+    async def start(self) -> None:
+        """Start warming up in the background without blocking startup"""
+        if not self.models:
+            self._ready.set()
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the keep-alive loop"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        async with httpx.AsyncClient(base_url=self.api_base, timeout=OLLAMA_WARMUP_TIMEOUT) as client:
+            # Warm-up: retry until every model answered a tiny prompt
+            delay = 1.0
+            pending = list(self.models)
+            while pending:
+                results = await asyncio.gather(*(self._warm_up(client, m) for m in pending))
+                pending = [m for m, ok in zip(pending, results) if not ok]
+                if pending:
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 60.0)
+
+            self._ready.set()
+            logger.info(f"Ollama models warmed up: {', '.join(self.models)}")
+
+            # Keep-alive: an empty prompt only refreshes the model's keep_alive
+            while True:
+                await asyncio.sleep(self.interval)
+                await asyncio.gather(*(self._ping(client, m) for m in self.models))
+
+    async def _warm_up(self, client: httpx.AsyncClient, model: str) -> bool:
+        try:
+            logger.info(f"Warming up Ollama model: {model}")
+            response = await client.post("/api/generate", json={
+                "model": model,
+                "prompt": "hi",
+                "stream": False,
+                "keep_alive": self.keep_alive,
+                "options": {"num_predict": 1, "num_ctx": OLLAMA_NUM_CTX}
+            })
+            response.raise_for_status()
+            return True
+        except httpx.HTTPError as e:
+            logger.warning(f"Failed to warm up Ollama model {model}: {str(e)}")
+            return False
+
+    async def _ping(self, client: httpx.AsyncClient, model: str) -> None:
+        try:
+            response = await client.post("/api/generate", json={
+                "model": model,
+                "keep_alive": self.keep_alive,
+                "options": {"num_ctx": OLLAMA_NUM_CTX}
+            })
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            logger.warning(f"Ollama keep-alive failed for {model}: {str(e)}")
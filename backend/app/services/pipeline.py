@@ -2,19 +2,33 @@ from smolagents import (
     ToolCallingAgent,
     LiteLLMModel,
 )
+from loguru import logger
+from typing import AsyncIterator, List
+import asyncio
+import threading
+import time
 import os
 
-from .scraper import get_website_content
+from ai.tokens import OPERATION_BUDGETS, count_tokens, fit_input, fit_prompt, truncate_job_description, truncate_text
+from database.models import JobQuestionsRequest
+from utils.metrics import metrics
+from utils.prompt import format_company_content, generate_prompt
+from utils.questions import QuestionStreamParser, parse_questions
+from .crawler import crawl_company, get_company_content
+from .http_client import http_client
+from .scraper import get_website_content, validate_url
+from .ollama import OLLAMA_API_BASE, OLLAMA_NUM_CTX
 
 
 class JobQuestionsPipeline:
     def __init__(self, model: str = "ollama_chat/gpt-oss"):
 
+        self.model_id = model
         if "ollama" in model:
             self.model = LiteLLMModel(
                 model_id = model,
-                api_base = "http://localhost:11434",
-                num_ctx = 8192
+                api_base = OLLAMA_API_BASE,
+                num_ctx = OLLAMA_NUM_CTX
             )
         elif "gemini" in model:
             self.model = LiteLLMModel(
@@ -22,7 +36,130 @@ class JobQuestionsPipeline:
                 api_key = os.getenv("GEMINI_API_KEY")
             )
 
+        # Agents keep the memory of their current run, so each worker thread
+        # reuses its own agent instead of sharing one between concurrent runs
+        self._agents = threading.local()
+
     @property
     def agent(self) -> ToolCallingAgent:
-        return ToolCallingAgent(tools = [get_website_content], model = self.model)
+        agent = getattr(self._agents, "agent", None)
+        if agent is None:
+            agent = ToolCallingAgent(tools = [get_company_content, get_website_content], model = self.model)
+            self._agents.agent = agent
+        return agent
+
+    async def generate_questions(self, req: JobQuestionsRequest, prefetch: bool = True) -> List[str]:
+        """
+        Generate tailored questions for a job
+
+        Args:
+            req: Job details
+            prefetch: Crawl the company website while the prompt is assembled
+                and answer with a single completion. Otherwise the agent
+                decides to call get_company_content itself, which costs an
+                extra LLM round-trip.
+
+        Returns:
+            List of questions
+        """
+        started = time.monotonic()
+
+        if prefetch:
+            prompt = await self._prefetch_prompt(req)
+            response = await asyncio.to_thread(self._complete, prompt)
+        else:
+            response = await asyncio.to_thread(self.agent.run, generate_prompt(req))
+
+        mode = "prefetch" if prefetch else "agent"
+        metrics.observe(f"job_questions.{mode}.duration", time.monotonic() - started)
+        return parse_questions(str(response))
+
+    async def stream_questions(self, req: JobQuestionsRequest) -> AsyncIterator[str]:
+        """
+        Generate tailored questions for a job, yielding each question as soon
+        as the model has finished writing it
+
+        Args:
+            req: Job details
+
+        Yields:
+            Questions
+        """
+        started = time.monotonic()
+        prompt = await asyncio.to_thread(self._fit_prompt, await self._prefetch_prompt(req))
+
+        loop = asyncio.get_running_loop()
+        chunks: asyncio.Queue = asyncio.Queue()
+        stopped = threading.Event()
+
+        def produce():
+            # Runs in a worker thread: LiteLLM streams with a blocking iterator
+            try:
+                for delta in self.model.generate_stream([{"role": "user", "content": prompt}]):
+                    if stopped.is_set():
+                        break
+                    if delta.content:
+                        loop.call_soon_threadsafe(chunks.put_nowait, delta.content)
+            except Exception as e:
+                loop.call_soon_threadsafe(chunks.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(chunks.put_nowait, None)
+
+        producer = loop.run_in_executor(None, produce)
+        parser = QuestionStreamParser()
+        first = True
+        try:
+            while (chunk := await chunks.get()) is not None:
+                if isinstance(chunk, Exception):
+                    raise chunk
+                for question in parser.feed(chunk):
+                    if first:
+                        metrics.observe("job_questions.stream.first_question", time.monotonic() - started)
+                        first = False
+                    yield question
+            for question in parser.close():
+                yield question
+        finally:
+            # Also runs when the client disconnects mid-stream
+            stopped.set()
+            await producer
+
+        metrics.observe("job_questions.stream.duration", time.monotonic() - started)
+
+    async def _prefetch_prompt(self, req: JobQuestionsRequest) -> str:
+        """Crawl the company website while the prompt is assembled, and inject it"""
+        budget = OPERATION_BUDGETS["job_questions"]
+        truncate = asyncio.to_thread(
+            fit_input, "job_questions", "job_description", req.job_description,
+            budget // 2, truncate_job_description, self._count_tokens
+        )
+        if validate_url(req.company_url):
+            job_description, summary = await asyncio.gather(truncate, http_client.arun(crawl_company(req.company_url)))
+        else:
+            # Same error as the get_company_content tool, the prompt says the company details are not available
+            logger.warning(f"Not crawling invalid company URL: {req.company_url}")
+            job_description = await truncate
+            summary = {'error': 'Invalid URL provided', 'url': req.company_url}
+        company_content = await asyncio.to_thread(
+            fit_input, "job_questions", "company_content", format_company_content(summary),
+            budget - self._count_tokens(job_description), truncate_text, self._count_tokens
+        )
+        return generate_prompt(req.model_copy(update={"job_description": job_description}), company_content)
+
+    def _fit_prompt(self, prompt: str) -> str:
+        """Make sure the prompt fits the context window"""
+        prompt, tokens_before, tokens_after = fit_prompt(self.model_id, prompt)
+        metrics.observe("prompt_tokens.job_questions.pre", tokens_before)
+        metrics.observe("prompt_tokens.job_questions.post", tokens_after)
+        if tokens_after < tokens_before:
+            logger.warning(f"Truncated job_questions prompt from {tokens_before} to {tokens_after} tokens")
+            metrics.increment("prompt_tokens.job_questions.truncated")
+        return prompt
+
+    def _complete(self, prompt: str) -> str:
+        """Run a single completion"""
+        response = self.model([{"role": "user", "content": self._fit_prompt(prompt)}])
+        return response.content if hasattr(response, "content") else str(response)
 
+    def _count_tokens(self, text: str) -> int:
+        return count_tokens(self.model_id, text)
@@ -1,8 +1,238 @@
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urlparse
+import asyncio
+import httpx
+import ipaddress
+import time
+from loguru import logger
+from typing import AsyncIterator, Dict, List
+from urllib.parse import urldefrag, urljoin, urlparse
 from smolagents import tool
 import json
+import os
+
+from utils.metrics import metrics
+from .extractor import ContentExtractor
+from .http_client import http_client
+from .scraper_cache import (
+    SCRAPER_CACHE_HARD_TTL,
+    SCRAPER_CACHE_SOFT_TTL,
+    normalize_url,
+    scraper_cache,
+)
+
+# Limits of batch scraping (fetch_websites_content)
+SCRAPER_BATCH_TIMEOUT = float(os.getenv("SCRAPER_BATCH_TIMEOUT", "30"))
+SCRAPER_BATCH_CONCURRENCY = int(os.getenv("SCRAPER_BATCH_CONCURRENCY", "16"))
+SCRAPER_BATCH_PER_HOST = int(os.getenv("SCRAPER_BATCH_PER_HOST", "2"))
+
+metrics.register_ratio("scraper_cache.hit_ratio", "scraper_cache.hits", "scraper_cache.misses")
+
+
+async def _extract_response(website_url: str, response: httpx.Response) -> dict:
+    """
+    Extract content from a streaming response, reading no more of the body than needed
+
+    Args:
+        website_url: URL the page was fetched from
+        response: Streaming httpx response
+
+    Returns:
+        Content dictionary returned by get_website_content
+    """
+    extractor = ContentExtractor(response.charset_encoding)
+    async for chunk in response.aiter_bytes():
+        # Parse off the event loop
+        await asyncio.to_thread(extractor.feed, chunk)
+        if extractor.done:
+            break
+
+    content = await asyncio.to_thread(extractor.close)
+    metrics.observe("scraper.bytes_read", extractor.bytes_read)
+    content['links'] = _resolve_links(str(response.url), content['links'])
+    return {'url': website_url, **content, 'status_code': response.status_code}
+
+
+def _resolve_links(base_url: str, hrefs: List[str]) -> List[str]:
+    """Resolve hrefs against the page URL, keeping unique http(s) links without fragments"""
+    links = []
+    for href in hrefs:
+        link = urldefrag(urljoin(base_url, href)).url
+        if urlparse(link).scheme in ('http', 'https') and link not in links:
+            links.append(link)
+    return links
+
+
+async def _fetch_content(website_url: str) -> dict:
+    """
+    Fetch and extract a page through the scraper cache (runs on the HTTP client's loop)
+
+    Fresh entries are served from the cache. Entries past the soft TTL are
+    revalidated with a conditional GET, and served stale when the upstream
+    request fails before the hard TTL.
+
+    Args:
+        website_url: the url of the website to scrape
+
+    Returns:
+        Content dictionary
+
+    Raises:
+        httpx.HTTPError: If the request fails and no usable cached copy exists
+    """
+    key = normalize_url(website_url)
+    entry = await scraper_cache.get(key)
+    now = time.time()
+
+    if entry and now - entry["fetched_at"] < SCRAPER_CACHE_SOFT_TTL:
+        metrics.increment("scraper_cache.hits")
+        return dict(entry["content"], url=website_url)
+
+    headers = {}
+    if entry and entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry and entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+
+    try:
+        async with http_client.stream("GET", website_url, headers=headers) as response:
+            if response.status_code == 304 and entry:
+                metrics.increment("scraper_cache.revalidated")
+                metrics.increment("scraper_cache.hits")
+                entry["fetched_at"] = now
+                await scraper_cache.set(key, entry)
+                return dict(entry["content"], url=website_url)
+
+            response.raise_for_status()
+            metrics.increment("scraper_cache.misses")
+            content = await _extract_response(website_url, response)
+
+    except httpx.HTTPError as e:
+        if entry and now - entry["fetched_at"] < SCRAPER_CACHE_HARD_TTL:
+            logger.warning(f"Serving stale content for {key}: {str(e)}")
+            metrics.increment("scraper_cache.stale")
+            metrics.increment("scraper_cache.hits")
+            return dict(entry["content"], url=website_url)
+        raise
+
+    await scraper_cache.set(key, {
+        "content": content,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "fetched_at": now
+    })
+    return content
+
+
+def validate_url(website_url: str) -> bool:
+    """
+    Whether website_url is an absolute http(s) URL that is safe to fetch
+
+    URLs come from users, so localhost and IP addresses that are not public
+    (private, loopback, link-local such as cloud metadata endpoints) are
+    rejected to keep the server from being used to reach internal services.
+    Hostnames are not resolved.
+    """
+    parsed_url = urlparse(website_url)
+    if parsed_url.scheme not in ("http", "https") or not parsed_url.hostname:
+        return False
+
+    host = parsed_url.hostname
+    if host == "localhost" or host.endswith(".localhost"):
+        return False
+    try:
+        return ipaddress.ip_address(host).is_global
+    except ValueError:
+        # A hostname, not an IP address
+        return True
+
+
+async def fetch_website_content(website_url: str) -> dict:
+    """
+    Get the website content by scraping the website, for async callers
+
+    Args:
+        website_url: the url of the website to scrape
+
+    Returns:
+        Content dictionary (including the page's links), or a dictionary with an 'error' key
+    """
+    try:
+        # Validate URL
+        if not validate_url(website_url):
+            return {
+                'error': 'Invalid URL provided',
+                'url': website_url
+            }
+
+        return await http_client.arun(_fetch_content(website_url))
+
+    except httpx.HTTPError as e:
+        return {
+            'error': f'Request failed: {str(e)}',
+            'url': website_url
+        }
+    except Exception as e:
+        return {
+            'error': f'Scraping failed: {str(e)}',
+            'url': website_url
+        }
+
+
+async def fetch_websites_content(
+    website_urls: List[str],
+    timeout: float = SCRAPER_BATCH_TIMEOUT,
+    max_concurrency: int = SCRAPER_BATCH_CONCURRENCY,
+    max_per_host: int = SCRAPER_BATCH_PER_HOST
+) -> AsyncIterator[dict]:
+    """
+    Scrape many websites concurrently, yielding each result as soon as it is ready
+
+    All fetches share one deadline; URLs still loading when it passes are
+    yielded as errors. Duplicate URLs are fetched once.
+
+    Args:
+        website_urls: URLs to scrape
+        timeout: Seconds for the whole batch
+        max_concurrency: Maximum fetches in flight
+        max_per_host: Maximum fetches in flight per host
+
+    Yields:
+        Content dictionaries (without links), or dictionaries with an 'error' key
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    slots = asyncio.Semaphore(max_concurrency)
+    host_slots: Dict[str, asyncio.Semaphore] = {}
+
+    async def fetch(website_url: str) -> dict:
+        host = urlparse(website_url).netloc.lower()
+        host_slot = host_slots.setdefault(host, asyncio.Semaphore(max_per_host))
+        # Wait for the host first so a busy host does not hold global slots
+        async with host_slot, slots:
+            content = await fetch_website_content(website_url)
+        return {k: v for k, v in content.items() if k != 'links'}
+
+    tasks = {asyncio.create_task(fetch(url)): url for url in dict.fromkeys(website_urls)}
+    pending = set(tasks)
+    try:
+        while pending:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+
+        metrics.increment("scraper.batch_timed_out", len(pending))
+        for task in pending:
+            yield {
+                'error': f'Timed out after {timeout}s',
+                'url': tasks[task]
+            }
+    finally:
+        # Also runs when the consumer stops early (e.g. client disconnected)
+        for task in pending:
+            task.cancel()
+
 
 @tool
 def get_website_content(website_url: str) -> str:
@@ -14,80 +244,19 @@ def get_website_content(website_url: str) -> str:
     """
     try:
         # Validate URL
-        parsed_url = urlparse(website_url)
-        if not parsed_url.scheme or not parsed_url.netloc:
+        if not validate_url(website_url):
             return json.dumps({
                 'error': 'Invalid URL provided',
                 'url': website_url
             })
 
-        # Fetch the webpage
-        session = requests.Session()
-        session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
-
-        # Set max redirects to 5 to avoid redirect loops
-        session.max_redirects = 5
-
-        # Try the request with allow_redirects and verify SSL
-        response = session.get(
-            website_url,
-            timeout=10,
-            allow_redirects=True,
-            verify=True
-        )
-        response.raise_for_status()
-
-        # Parse the HTML
-        soup = BeautifulSoup(response.content, 'html.parser')
-
-        # Extract title
-        title_tag = soup.find('title')
-        title = title_tag.get_text().strip() if title_tag else None
-
-        # Extract meta description
-        meta_desc = soup.find('meta', attrs={'name': 'description'})
-        meta_description = meta_desc.get('content').strip() if meta_desc else None
-
-        # Extract headings
-        headings = []
-        for i in range(1, 7):
-            for heading in soup.find_all(f'h{i}'):
-                headings.append({
-                    'level': i,
-                    'text': heading.get_text().strip()
-                })
-
-        # Extract paragraphs
-        paragraphs = []
-        for p in soup.find_all('p'):
-            text = p.get_text().strip()
-            if text:
-                paragraphs.append(text)
-
-        # Get clean text content
-        for script in soup(["script", "style"]):
-            script.decompose()
-        text = soup.get_text()
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        clean_text = ' '.join(chunk for chunk in chunks if chunk)
-
-        # Return JSON blob
-        content = {
-            'url': website_url,
-            'title': title,
-            'meta_description': meta_description,
-            'headings': headings[:10],  # Limit to first 10 headings
-            'paragraphs': paragraphs[:15],  # Limit to first 15 paragraphs
-            'text_content': clean_text[:5000],  # Limit to 5000 characters
-            'status_code': response.status_code
-        }
+        # Fetch the webpage through the shared pool and cache
+        content = http_client.run(_fetch_content(website_url))
 
-        return json.dumps(content)
+        # Return JSON blob, links are only used by the crawler
+        return json.dumps({k: v for k, v in content.items() if k != 'links'})
 
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         return json.dumps({
             'error': f'Request failed: {str(e)}',
             'url': website_url
@@ -0,0 +1,109 @@
+import asyncio
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from loguru import logger
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+import os
+
+from database.client import mongodb
+
+# "memory" (per-process LRU) or "mongo" (shared by all workers)
+SCRAPER_CACHE_BACKEND = os.getenv("SCRAPER_CACHE_BACKEND", "memory")
+
+# After the soft TTL an entry is revalidated with a conditional GET; until the
+# hard TTL it is still served when the upstream request fails
+SCRAPER_CACHE_SOFT_TTL = float(os.getenv("SCRAPER_CACHE_SOFT_TTL", "3600"))
+SCRAPER_CACHE_HARD_TTL = float(os.getenv("SCRAPER_CACHE_HARD_TTL", str(7 * 24 * 3600)))
+
+SCRAPER_CACHE_MAX_ENTRIES = int(os.getenv("SCRAPER_CACHE_MAX_ENTRIES", "1000"))
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+TRACKING_PARAMS = ("utm_", "gclid", "fbclid")
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize a URL into a cache key
+
+    Lowercases scheme and host, drops default ports, fragments, tracking
+    parameters and trailing slashes, and sorts the query string.
+
+    Args:
+        url: URL as given by the user or the LLM
+
+    Returns:
+        Normalized URL
+    """
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or "").lower()
+    if parsed.port and parsed.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parsed.port}"
+
+    path = parsed.path.rstrip("/") or "/"
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if not k.lower().startswith(TRACKING_PARAMS)
+    ))
+    return urlunparse((scheme, host, path, "", query, ""))
+
+
+class MemoryCacheStore:
+    """
+    In-process LRU store for scraped pages.
+    """
+
+    def __init__(self, max_entries: int = SCRAPER_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return dict(entry) if entry is not None else None
+
+    async def set(self, key: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = dict(entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class MongoCacheStore:
+    """
+    Store for scraped pages in the scraper_cache collection, shared across workers.
+    Entries past the hard TTL are removed by a TTL index on expires_at
+    (see database.indexes).
+    """
+
+    def _collection(self):
+        return mongodb.db.scraper_cache
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(
+            lambda: self._collection().find_one({"key": key}, {"_id": 0, "expires_at": 0})
+        )
+
+    async def set(self, key: str, entry: Dict[str, Any]) -> None:
+        document = dict(entry, key=key)
+        document["expires_at"] = datetime.utcnow() + timedelta(seconds=SCRAPER_CACHE_HARD_TTL)
+        await asyncio.to_thread(
+            lambda: self._collection().replace_one({"key": key}, document, upsert=True)
+        )
+
+
+def create_cache_store():
+    """Create the scraper cache store selected by SCRAPER_CACHE_BACKEND"""
+    if SCRAPER_CACHE_BACKEND == "mongo":
+        logger.info("Using MongoDB scraper cache")
+        return MongoCacheStore()
+    return MemoryCacheStore()
+
+
+scraper_cache = create_cache_store()
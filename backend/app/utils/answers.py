@@ -0,0 +1,105 @@
+import re
+from typing import Optional
+from utils.metrics import metrics
+
+NEGATIVE_ANSWERS = {
+    "no", "none", "nope", "nah", "nil", "nothing", "never", "n/a", "na", "not applicable",
+    "not really", "no experience", "no i don't", "no i do not", "i don't", "i do not",
+    "don't have", "do not have", "not yet", "-"
+}
+
+AFFIRMATIVE_ANSWERS = {"yes", "yeah", "yep", "yup", "sure", "of course", "definitely"}
+
+NUMERIC_ANSWER = re.compile(r'^\d+(\.\d+)?\+?(\s*(years?|yrs?|months?|%))?$')
+LIST_SEPARATOR = re.compile(r'\s*(?:,|;|\band\b|&)\s*')
+SKILL_ITEM = re.compile(r'^[A-Za-z0-9][A-Za-z0-9+#./\- ]{0,39}$')
+
+# Words that make a list item a phrase rather than a skill name ("I know Python",
+# "some Go", "only basics"): pronouns, verbs, fillers and stopwords
+NON_SKILL_WORDS = {
+    "i", "i'm", "i've", "don't", "me", "my", "we", "our", "you", "your", "he", "she", "it",
+    "they", "them", "their",
+    "know", "knew", "use", "used", "using", "have", "has", "had", "am", "is", "are", "was", "were",
+    "be", "been", "do", "does", "did", "work", "worked", "working", "like", "learn", "learned",
+    "learnt", "tried", "familiar", "can", "could",
+    "some", "only", "really", "just", "also", "very", "bit", "little", "lot", "lots", "basics",
+    "basic", "maybe", "kind", "sort", "etc", "stuff", "things", "thing", "much", "more", "most",
+    "a", "an", "the", "of", "with", "in", "on", "at", "to", "for", "but", "or", "not", "so", "too",
+    "yes", "no",
+}
+
+metrics.register_ratio("answer_fast_path.hit_ratio", "answer_fast_path.hits", "answer_fast_path.misses")
+
+
+def _misc_key(related_field: str) -> str:
+    """Turn a field name into a key MongoDB accepts inside knowledge_graph.misc"""
+    return related_field.strip().replace('.', '_').lstrip('$') or "answer"
+
+
+def _is_skill_name(item: str) -> bool:
+    """Whether a list item looks like a bare skill name ("Docker", "C++", "Machine Learning")"""
+    if not SKILL_ITEM.match(item) or len(item.split()) > 3:
+        return False
+    lowered = item.lower()
+    if lowered in NEGATIVE_ANSWERS or lowered in AFFIRMATIVE_ANSWERS:
+        return False
+    return not any(word.strip("'") in NON_SKILL_WORDS for word in lowered.split())
+
+
+def classify_answer(answer: str, related_field: str, field_type: Optional[str] = None) -> Optional[dict]:
+    """
+    Resolve trivial questionnaire answers without an LLM call.
+
+    Handles negatives ("no", "none", "N/A"), bare numbers ("5", "3 years"),
+    plain "yes" to a skill question and comma-separated skill lists.
+
+    Args:
+        answer: The user's answer
+        related_field: The field the question is related to
+        field_type: Type of field (skill, education, certification, experience, project)
+
+    Returns:
+        Result with the same shape as ResumeAgent.process_answer, or None if the
+        answer is free-form and needs the LLM
+    """
+    normalized = re.sub(r'\s+', ' ', (answer or '').strip().lower()).rstrip('.!')
+    normalized = normalized.replace('’', "'")
+    is_skill = (field_type or '').lower() in ("skill", "skills")
+    result = None
+
+    if not normalized or normalized in NEGATIVE_ANSWERS:
+        result = {
+            "knowledge_graph_updates": {"category": "misc", "data": {}},
+            "confidence": 0.1,
+            "summary": f"No {related_field} information provided"
+        }
+
+    elif NUMERIC_ANSWER.match(normalized):
+        result = {
+            "knowledge_graph_updates": {
+                "category": "misc",
+                "data": {_misc_key(related_field): answer.strip()}
+            },
+            "confidence": 0.6,
+            "summary": f"Recorded {answer.strip()} for {related_field}"
+        }
+
+    elif is_skill and normalized in AFFIRMATIVE_ANSWERS and related_field:
+        result = {
+            "knowledge_graph_updates": {"category": "skills", "data": [related_field.strip()]},
+            "confidence": 0.6,
+            "summary": f"Added {related_field.strip()} skill"
+        }
+
+    elif is_skill:
+        items = [item.strip() for item in LIST_SEPARATOR.split(answer.strip().rstrip('.')) if item.strip()]
+        # A single item that isn't a skill name sends the whole answer to the LLM
+        if len(items) >= 2 and all(_is_skill_name(item) for item in items):
+            result = {
+                "knowledge_graph_updates": {"category": "skills", "data": items},
+                "confidence": 0.8,
+                "summary": f"Added skills: {', '.join(items)}"
+            }
+
+    metrics.increment("answer_fast_path.hits" if result else "answer_fast_path.misses")
+    return result
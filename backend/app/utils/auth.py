@@ -1,7 +1,20 @@
+"""
+Password hashing and JWT access tokens.
+
+Verified tokens are cached in memory (TokenCache), and so are the tokens
+revoked by logging out. The revocation list is per worker process: with
+several workers, a token revoked on one of them is still accepted by the
+others until it expires (ACCESS_TOKEN_EXPIRE_DAYS). Run a single worker
+where a logout must take effect everywhere at once.
+"""
 import bcrypt
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional
 import os
 from dotenv import load_dotenv
 
@@ -12,20 +25,27 @@ SECRET_KEY = os.getenv("SECRET_KEY", "random-key-lol")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_DAYS = 30
 
+# bcrypt cost of new hashes, existing ones are rehashed on login when it changes
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
 
-def hash_password(password: str) -> str:
+# Verified tokens kept per worker, so a token's signature is checked once
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000"))
+
+
+def hash_password(password: str, rounds: int = BCRYPT_ROUNDS) -> str:
     """
     Hash a plain password using bcrypt
 
     Args:
         password: Plain text password
+        rounds: bcrypt cost
 
     Returns:
         Hashed password
     """
     # Convert password to bytes and generate salt
     password_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=rounds)
     hashed = bcrypt.hashpw(password_bytes, salt)
     # Return as string for storage
     return hashed.decode('utf-8')
@@ -48,6 +68,95 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(password_bytes, hashed_bytes)
 
 
+def bcrypt_rounds(hashed_password: str) -> int:
+    """
+    Get the cost a bcrypt hash was made with
+
+    Args:
+        hashed_password: Hashed password, e.g. "$2b$12$..."
+
+    Returns:
+        bcrypt cost
+    """
+    return int(hashed_password.split("$")[2])
+
+
+class TokenCache:
+    """
+    Per-process cache of verified JWT payloads keyed by token digest, and
+    the tokens revoked by logging out.
+
+    Entries are only served until the token's own exp. Revocations are not
+    shared between workers.
+    """
+
+    def __init__(self, max_entries: int = TOKEN_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._payloads: OrderedDict = OrderedDict()
+        self._revoked: Dict[bytes, float] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, digest: bytes) -> Optional[dict]:
+        """
+        Get the payload of a verified token
+
+        Args:
+            digest: Token digest
+
+        Returns:
+            Copy of the payload, or None if unknown or expired
+        """
+        with self._lock:
+            payload = self._payloads.get(digest)
+            if payload is None:
+                return None
+            if payload["exp"] <= time.time():
+                del self._payloads[digest]
+                return None
+            self._payloads.move_to_end(digest)
+            return dict(payload)
+
+    def set(self, digest: bytes, payload: dict) -> None:
+        """
+        Cache the payload of a verified token
+
+        Args:
+            digest: Token digest
+            payload: Decoded payload, with exp
+        """
+        with self._lock:
+            self._payloads[digest] = dict(payload)
+            self._payloads.move_to_end(digest)
+            while len(self._payloads) > self.max_entries:
+                self._payloads.popitem(last=False)
+
+    def revoke(self, digest: bytes, exp: float) -> None:
+        """
+        Revoke a token until it expires on its own
+
+        Args:
+            digest: Token digest
+            exp: Expiry of the token (Unix timestamp)
+        """
+        now = time.time()
+        with self._lock:
+            self._payloads.pop(digest, None)
+            # Expired tokens are rejected by the signature check anyway
+            self._revoked = {d: e for d, e in self._revoked.items() if e > now}
+            self._revoked[digest] = exp
+
+    def is_revoked(self, digest: bytes) -> bool:
+        with self._lock:
+            return digest in self._revoked
+
+
+token_cache = TokenCache()
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Create a JWT access token
@@ -80,10 +189,33 @@ def decode_access_token(token: str) -> Optional[dict]:
         token: JWT token string
 
     Returns:
-        Decoded token payload or None if invalid
+        Decoded token payload or None if invalid or revoked
     """
+    digest = token_cache.digest(token)
+    if token_cache.is_revoked(digest):
+        return None
+
+    payload = token_cache.get(digest)
+    if payload is not None:
+        return payload
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except JWTError:
         return None
+
+    if "exp" in payload:
+        token_cache.set(digest, payload)
+    return payload
+
+
+def revoke_access_token(token: str) -> None:
+    """
+    Revoke a JWT access token, so it is rejected until it expires
+
+    Args:
+        token: JWT token string
+    """
+    payload = decode_access_token(token)
+    if payload and "exp" in payload:
+        token_cache.revoke(token_cache.digest(token), payload["exp"])
@@ -2,10 +2,11 @@ from fastapi import Cookie, Header, HTTPException
 from typing import Optional
 from utils.auth import decode_access_token
 from database.operations import UserOperations
+from utils.user_cache import principal_cache
 from loguru import logger
 
 
-def get_current_user(
+async def get_current_user(
     access_token: Optional[str] = Cookie(None),
     authorization: Optional[str] = Header(None)
 ):
@@ -22,7 +23,8 @@ def get_current_user(
         authorization: Authorization header with Bearer token
 
     Returns:
-        User dict without hashed_password
+        User principal dict with user_id and email (the full user is fetched
+        by the endpoints that need it)
 
     Raises:
         HTTPException: 401 if not authenticated or token invalid
@@ -68,14 +70,14 @@ def get_current_user(
             detail="Invalid token payload"
         )
 
-    # Get user from database
-    try:
-        user = UserOperations.get_user_by_id(user_id)
-        # Remove hashed_password from response
-        user.pop("hashed_password", None)
+    # Get user from cache or database
+    user = principal_cache.get(user_id)
+    if user is None:
+        try:
+            user = await UserOperations.get_principal(user_id)
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        principal_cache.set(user)
 
-        logger.info(f"Current user authenticated: {user['email']}")
-        return user
-
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
+    logger.info(f"Current user authenticated: {user['email']}")
+    return user
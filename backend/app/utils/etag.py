@@ -0,0 +1,57 @@
+from fastapi import Response
+from typing import List, Optional
+
+
+def make_etag(*versions: int) -> str:
+    """
+    Build a strong ETag from document versions
+
+    Args:
+        versions: Versions of the documents a response is built from
+
+    Returns:
+        Quoted ETag, e.g. "3" or "3.12"
+    """
+    return '"' + ".".join(str(version) for version in versions) + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header matches an ETag (weak comparison)
+
+    Args:
+        if_none_match: If-None-Match header
+        etag: Current ETag
+
+    Returns:
+        True if the client's copy is current
+    """
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in (tag.removeprefix("W/") for tag in tags)
+
+
+def if_match_versions(if_match: Optional[str]) -> Optional[List[int]]:
+    """
+    Parse the versions an If-Match header allows a write on (strong comparison)
+
+    Args:
+        if_match: If-Match header
+
+    Returns:
+        Versions allowed (possibly none), or None if any version is allowed
+    """
+    if not if_match or if_match.strip() == "*":
+        return None
+    versions = []
+    for tag in if_match.split(","):
+        tag = tag.strip()
+        if tag.startswith('"') and tag.endswith('"') and tag[1:-1].isdigit():
+            versions.append(int(tag[1:-1]))
+    return versions
+
+
+def not_modified(etag: str) -> Response:
+    """Empty 304 response for a client whose copy is current"""
+    return Response(status_code=304, headers={"ETag": etag})
@@ -0,0 +1,67 @@
+from collections import defaultdict
+from threading import Lock
+from typing import Dict
+
+
+class Metrics:
+    """
+    Process-wide counters exported through the /metrics endpoint.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._ratios: Dict[str, tuple] = {}
+
+    def increment(self, name: str, value: float = 1) -> None:
+        """
+        Increment a counter
+
+        Args:
+            name: Counter name (dotted, e.g. "answer_fast_path.hits")
+            value: Amount to add
+        """
+        with self._lock:
+            self._counters[name] += value
+
+    def observe(self, name: str, value: float) -> None:
+        """
+        Record a sample, exported as {name}.count, {name}.sum and {name}.max
+
+        Args:
+            name: Metric name (dotted, e.g. "prompt_tokens.analyze_job_requirements.pre")
+            value: Sample value
+        """
+        with self._lock:
+            self._counters[f"{name}.count"] += 1
+            self._counters[f"{name}.sum"] += value
+            self._counters[f"{name}.max"] = max(self._counters[f"{name}.max"], value)
+
+    def register_ratio(self, name: str, hits: str, misses: str) -> None:
+        """
+        Export hits / (hits + misses) of two counters under name
+
+        Args:
+            name: Name of the exported ratio
+            hits: Counter counted as hits
+            misses: Counter counted as misses
+        """
+        with self._lock:
+            self._ratios[name] = (hits, misses)
+
+    def snapshot(self) -> Dict[str, float]:
+        """
+        Get the current value of every counter and ratio
+
+        Returns:
+            Dictionary of metric name to value
+        """
+        with self._lock:
+            result = dict(self._counters)
+            for name, (hits, misses) in self._ratios.items():
+                total = self._counters[hits] + self._counters[misses]
+                result[name] = self._counters[hits] / total if total else 0.0
+        return result
+
+
+metrics = Metrics()
@@ -0,0 +1,307 @@
+import re
+from typing import Any, Dict, List, Tuple
+
+# Knowledge graph categories holding lists of objects
+ITEM_CATEGORIES = ["education", "work_experience", "projects", "certifications", "research_work"]
+
+DATE_FIELDS = ["start_date", "end_date", "date"]
+
+PRESENT_WORDS = {"present", "current", "currently", "now", "ongoing", "today", "till date", "to date", "till now"}
+
+MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12
+}
+
+DEGREES = {
+    "bs": "Bachelor of Science",
+    "bsc": "Bachelor of Science",
+    "bachelor of science": "Bachelor of Science",
+    "ba": "Bachelor of Arts",
+    "bachelor of arts": "Bachelor of Arts",
+    "btech": "Bachelor of Technology",
+    "bachelor of technology": "Bachelor of Technology",
+    "be": "Bachelor of Engineering",
+    "beng": "Bachelor of Engineering",
+    "bachelor of engineering": "Bachelor of Engineering",
+    "bca": "Bachelor of Computer Applications",
+    "bba": "Bachelor of Business Administration",
+    "bachelor": "Bachelor's Degree",
+    "bachelors": "Bachelor's Degree",
+    "bachelors degree": "Bachelor's Degree",
+    "ms": "Master of Science",
+    "msc": "Master of Science",
+    "master of science": "Master of Science",
+    "ma": "Master of Arts",
+    "master of arts": "Master of Arts",
+    "mtech": "Master of Technology",
+    "master of technology": "Master of Technology",
+    "meng": "Master of Engineering",
+    "master of engineering": "Master of Engineering",
+    "mba": "Master of Business Administration",
+    "master of business administration": "Master of Business Administration",
+    "mca": "Master of Computer Applications",
+    "master": "Master's Degree",
+    "masters": "Master's Degree",
+    "masters degree": "Master's Degree",
+    "phd": "PhD",
+    "doctorate": "PhD",
+    "doctor of philosophy": "PhD",
+    "associate": "Associate Degree",
+    "associates": "Associate Degree",
+    "associates degree": "Associate Degree",
+    "high school": "High School Diploma",
+    "high school diploma": "High School Diploma"
+}
+
+LEGAL_SUFFIX = re.compile(
+    r',?\s+(inc|llc|ltd|limited|pvt\.?\s*ltd|private limited|corp|gmbh|plc)\.?$',
+    re.IGNORECASE
+)
+LOWERCASE_WORDS = {"of", "and", "the", "at", "for", "in", "de"}
+
+# Words kept uppercase when capitalizing a lowercase name ("mit" → "MIT")
+ACRONYMS = {
+    "ibm", "aws", "mit", "ucla", "nyu", "usc", "cmu", "ucl", "lse", "eth", "epfl", "nus", "ntu",
+    "iit", "iim", "nit", "bits", "iiit", "hp", "ge", "gm", "bmw", "sap", "amd", "tcs", "hcl",
+    "kpmg", "pwc", "ey", "bcg", "hsbc", "ubs", "rbc", "nasa", "nih", "bbc", "cnn", "nbc", "usa",
+    "uk", "us", "ai", "it",
+}
+
+ISO_DATE = re.compile(r'^(\d{4})[-/.](\d{1,2})(?:[-/.]\d{1,2})?$')
+MONTH_FIRST_DATE = re.compile(r'^(\d{1,2})[-/.](\d{4})$')
+YEAR = re.compile(r'^(?:\w+\s+)?(\d{4})$')
+MONTH_NAME_DATE = re.compile(r'^(?:\d{1,2}(?:st|nd|rd|th)?\s+)?([a-z]{3,9})\.?,?\s+(?:\d{1,2}(?:st|nd|rd|th)?,?\s+)?(\d{4})$')
+
+
+def normalize_date(value: Any) -> Any:
+    """
+    Normalize a date to the knowledge graph format (YYYY-MM, YYYY or "present")
+
+    Args:
+        value: Date as written by the user or the LLM (e.g. "June 2022", "06/2022", "Current")
+
+    Returns:
+        Normalized date, or the original value stripped if it cannot be parsed
+    """
+    if not isinstance(value, str):
+        return value
+
+    text = re.sub(r'\s+', ' ', value.strip().lower())
+    if not text:
+        return ""
+    if text in PRESENT_WORDS:
+        return "present"
+
+    match = ISO_DATE.match(text)
+    if match and 1 <= int(match.group(2)) <= 12:
+        return f"{match.group(1)}-{int(match.group(2)):02d}"
+
+    match = MONTH_FIRST_DATE.match(text)
+    if match and 1 <= int(match.group(1)) <= 12:
+        return f"{match.group(2)}-{int(match.group(1)):02d}"
+
+    match = MONTH_NAME_DATE.match(text)
+    if match and match.group(1)[:3] in MONTHS:
+        return f"{match.group(2)}-{MONTHS[match.group(1)[:3]]:02d}"
+
+    # Bare year, or a season/quarter before it ("Summer 2021")
+    match = YEAR.match(text)
+    if match:
+        return match.group(1)
+
+    return value.strip()
+
+
+def canonicalize_degree(value: Any) -> Tuple[Any, str]:
+    """
+    Canonicalize a degree name, splitting off the field of study if present
+
+    Args:
+        value: Degree as written (e.g. "B.Tech in CSE", "MS", "bachelors")
+
+    Returns:
+        Tuple of (canonical degree, field of study found in the degree or "")
+    """
+    if not isinstance(value, str):
+        return value, ""
+
+    degree, field = value.strip(), ""
+    match = re.match(r'^(.*?)\s+in\s+(.+)$', degree, re.IGNORECASE)
+    if _degree_key(degree) not in DEGREES and match and _degree_key(match.group(1)) in DEGREES:
+        degree, field = match.group(1), match.group(2).strip()
+
+    return DEGREES.get(_degree_key(degree), degree), field
+
+
+def _degree_key(value: str) -> str:
+    """Lookup key for DEGREES: lowercase without dots, apostrophes or extra spaces"""
+    key = re.sub(r"[.'’]", "", value.lower())
+    key = re.sub(r'\s+', ' ', key).strip()
+    return key.replace(" ", "") if len(key.replace(" ", "")) <= 5 else key
+
+
+def clean_entity_name(value: Any) -> Any:
+    """
+    Clean up a company or institution name
+
+    Collapses whitespace, strips quotes, trailing punctuation and legal suffixes
+    (Inc., LLC, Ltd, ...), and capitalizes names written entirely in lowercase
+    (known acronyms and lone 2-3 letter names are uppercased).
+
+    Args:
+        value: Company or institution name
+
+    Returns:
+        Cleaned name
+    """
+    if not isinstance(value, str):
+        return value
+
+    name = re.sub(r'\s+', ' ', value).strip().strip('"\'').strip(' ,;')
+    name = LEGAL_SUFFIX.sub('', name).strip(' ,')
+
+    if name and name == name.lower():
+        words = name.split(' ')
+        if len(words) == 1 and 2 <= len(name) <= 3:
+            # A lone short word is most likely an acronym ("ibm", "ey")
+            name = name.upper()
+        else:
+            name = ' '.join(
+                word.upper() if word in ACRONYMS
+                else word if i > 0 and word in LOWERCASE_WORDS
+                else word[:1].upper() + word[1:]
+                for i, word in enumerate(words)
+            )
+
+    return name
+
+
+def normalize_item(category: str, data: Any) -> Any:
+    """
+    Normalize a knowledge graph item before it is written
+
+    Args:
+        category: Knowledge graph category (education, work_experience, skills, ...)
+        data: Item data for that category
+
+    Returns:
+        Normalized copy of data
+    """
+    if category == "skills" and isinstance(data, list):
+        return normalize_skills(data)
+
+    if category not in ITEM_CATEGORIES or not isinstance(data, dict):
+        return data
+
+    item = dict(data)
+    for field in DATE_FIELDS:
+        if field in item:
+            item[field] = normalize_date(item[field])
+
+    if category == "education":
+        if "institution" in item:
+            item["institution"] = clean_entity_name(item["institution"])
+        if "degree" in item:
+            item["degree"], field_of_study = canonicalize_degree(item["degree"])
+            if field_of_study and not item.get("field"):
+                item["field"] = field_of_study
+
+    elif category == "work_experience" and "company" in item:
+        item["company"] = clean_entity_name(item["company"])
+
+    elif category == "certifications" and "issuer" in item:
+        item["issuer"] = clean_entity_name(item["issuer"])
+
+    return item
+
+
+def normalize_knowledge_graph_field(path: str, value: Any) -> Any:
+    """
+    Normalize a value written to a dotted knowledge graph path
+
+    Args:
+        path: Update path, e.g. "knowledge_graph.education",
+            "knowledge_graph.education.0" or "knowledge_graph.education.0.institution"
+        value: Value written to that path
+
+    Returns:
+        Normalized copy of value
+    """
+    parts = path.split(".")
+    if len(parts) < 2 or parts[0] != "knowledge_graph":
+        return value
+
+    category = parts[1]
+    if len(parts) == 2:
+        if category == "skills" and isinstance(value, list):
+            return normalize_skills(value)
+        if category in ITEM_CATEGORIES and isinstance(value, list):
+            return [normalize_item(category, item) for item in value]
+        return value
+
+    if category not in ITEM_CATEGORIES or not parts[2].isdigit():
+        return value
+    if len(parts) == 3:
+        return normalize_item(category, value)
+    if len(parts) == 4:
+        return normalize_item(category, {parts[3]: value})[parts[3]]
+    return value
+
+
+def normalize_skills(skills: List[Any]) -> List[Any]:
+    """
+    Strip skill names and drop case-insensitive duplicates, keeping the first spelling
+
+    Args:
+        skills: List of skill names
+
+    Returns:
+        Deduplicated list of skill names
+    """
+    seen = set()
+    result = []
+    for skill in skills:
+        if isinstance(skill, str):
+            skill = re.sub(r'\s+', ' ', skill).strip()
+            if not skill or skill.lower() in seen:
+                continue
+            seen.add(skill.lower())
+        result.append(skill)
+    return result
+
+
+def normalize_knowledge_graph(knowledge_graph: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Normalize every item of a knowledge graph
+
+    Args:
+        knowledge_graph: The user's knowledge graph
+
+    Returns:
+        Tuple of (normalized knowledge graph, list of changes made)
+    """
+    normalized = dict(knowledge_graph)
+    changes = []
+
+    for category in ITEM_CATEGORIES:
+        items = knowledge_graph.get(category)
+        if not isinstance(items, list):
+            continue
+        normalized[category] = []
+        for index, item in enumerate(items):
+            new_item = normalize_item(category, item)
+            if isinstance(item, dict):
+                for field, new_value in new_item.items():
+                    old_value = item.get(field)
+                    if old_value != new_value:
+                        changes.append(f"Normalized {category}[{index}].{field}: '{old_value or ''}' → '{new_value}'")
+            normalized[category].append(new_item)
+
+    skills = knowledge_graph.get("skills")
+    if isinstance(skills, list):
+        normalized["skills"] = normalize_skills(skills)
+        if len(normalized["skills"]) != len(skills) or normalized["skills"] != skills:
+            changes.append(f"Cleaned up skills ({len(skills)} → {len(normalized['skills'])} entries)")
+
+    return normalized, changes
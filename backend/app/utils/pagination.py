@@ -0,0 +1,44 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict
+
+
+def encode_cursor(position: Dict[str, Any]) -> str:
+    """
+    Encode the sort key of the last item of a page into an opaque cursor
+
+    Args:
+        position: Sort key fields of the last item (datetimes are supported)
+
+    Returns:
+        URL-safe cursor token
+    """
+    values = {
+        key: {"$date": value.isoformat()} if isinstance(value, datetime) else value
+        for key, value in position.items()
+    }
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """
+    Decode a cursor created by encode_cursor
+
+    Args:
+        cursor: Cursor token
+
+    Returns:
+        Sort key fields of the last item of the previous page
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return {
+            key: datetime.fromisoformat(value["$date"]) if isinstance(value, dict) else value
+            for key, value in values.items()
+        }
+    except (ValueError, TypeError, KeyError, AttributeError):
+        raise ValueError("Invalid cursor")
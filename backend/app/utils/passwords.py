@@ -0,0 +1,213 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from loguru import logger
+from typing import Optional
+import os
+
+from utils.auth import BCRYPT_ROUNDS, bcrypt_rounds, hash_password, verify_password
+from utils.metrics import metrics
+
+# bcrypt runs in its own processes, so a login burst neither holds the GIL
+# nor takes the threadpool the other endpoints run on
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Hashes queued or running before new ones are rejected with a 429
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", str(PASSWORD_HASH_WORKERS * 8)))
+
+# Login attempts allowed per email within the window
+LOGIN_MAX_ATTEMPTS = int(os.getenv("LOGIN_MAX_ATTEMPTS", "10"))
+LOGIN_ATTEMPT_WINDOW = float(os.getenv("LOGIN_ATTEMPT_WINDOW", "60"))
+LOGIN_THROTTLE_MAX_EMAILS = 10000
+
+
+class PasswordHasherBusyError(Exception):
+    """Raised when too many password hashes are already pending"""
+
+
+class TooManyAttemptsError(Exception):
+    """Raised when an email has used up its login attempts"""
+
+    def __init__(self, retry_after: float):
+        super().__init__("Too many login attempts, try again later")
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    """
+    Bounded process pool for bcrypt, with admission control: once
+    max_pending hashes are queued, new ones fail fast instead of piling up.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        """
+        Args:
+            workers: Number of worker processes
+            max_pending: Maximum number of hashes queued or running
+        """
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    async def hash(self, password: str) -> str:
+        """
+        Hash a password with the configured bcrypt cost
+
+        Args:
+            password: Plain text password
+
+        Returns:
+            Hashed password
+        """
+        return await self._run(hash_password, password, BCRYPT_ROUNDS)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """
+        Verify a password against its hash
+
+        Args:
+            password: Plain text password
+            hashed_password: Hashed password from database
+
+        Returns:
+            True if password matches, False otherwise
+        """
+        return await self._run(verify_password, password, hashed_password)
+
+    @staticmethod
+    def needs_rehash(hashed_password: str) -> bool:
+        """Whether a hash was made with another cost than BCRYPT_ROUNDS"""
+        return bcrypt_rounds(hashed_password) != BCRYPT_ROUNDS
+
+    def start(self) -> None:
+        """
+        Start the worker processes
+
+        Call this at startup before the app starts other threads (MongoDB
+        monitors, the HTTP client's loop), so the workers can be forked.
+        """
+        with self._lock:
+            executor = self._get_executor()
+        # A forking pool starts all its workers with the first job
+        executor.submit(os.getpid).result()
+        logger.info(f"Password hashing pool started with {self.workers} workers")
+
+    def close(self) -> None:
+        """Stop the worker processes"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(cancel_futures=True)
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                metrics.increment("password_hasher.rejected")
+                raise PasswordHasherBusyError("Too many requests, try again later")
+            self._pending += 1
+            executor = self._get_executor()
+
+        started = time.monotonic()
+        try:
+            try:
+                return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+            except BrokenProcessPool:
+                # A worker died (e.g. killed by the OOM killer) and took the pool
+                # with it: replace the pool and retry once
+                metrics.increment("password_hasher.pool_broken")
+                logger.warning("Password hashing pool is broken, restarting it")
+                with self._lock:
+                    executor = self._replace_executor(executor)
+                return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+            metrics.observe("password_hasher.duration", time.monotonic() - started)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Forked workers share the app's memory and start instantly, but
+            # forking is only safe while no other thread runs: a lock held by
+            # one (e.g. a thread a library starts on import) would be copied
+            # locked into the worker. Otherwise the workers come from a
+            # forkserver, at the cost of re-importing the main module.
+            start_method = "fork" if _thread_count() == 1 else "forkserver"
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context(start_method))
+            logger.info(f"Password hashing pool created ({start_method})")
+        return self._executor
+
+    def _replace_executor(self, broken: ProcessPoolExecutor) -> ProcessPoolExecutor:
+        # Concurrent jobs failing on the same pool only replace it once
+        if self._executor is broken:
+            self._executor = None
+            broken.shutdown(wait=False)
+        return self._get_executor()
+
+
+def _thread_count() -> int:
+    """Threads of this process, including ones started by C extensions"""
+    try:
+        return len(os.listdir("/proc/self/task"))
+    except OSError:
+        # No procfs: only threads started from Python are known
+        return threading.active_count()
+
+
+class LoginThrottle:
+    """
+    Sliding window of login attempts per email, so one account can't be
+    used to keep the hashing pool busy or to guess its password.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = LOGIN_MAX_ATTEMPTS,
+        window: float = LOGIN_ATTEMPT_WINDOW,
+        max_emails: int = LOGIN_THROTTLE_MAX_EMAILS
+    ):
+        """
+        Args:
+            max_attempts: Attempts allowed per email within the window
+            window: Window length in seconds
+            max_emails: Number of emails tracked, the least recent are forgotten
+        """
+        self.max_attempts = max_attempts
+        self.window = window
+        self.max_emails = max_emails
+        self._attempts: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check(self, email: str) -> None:
+        """
+        Record a login attempt
+
+        Args:
+            email: Email the attempt is for
+
+        Raises:
+            TooManyAttemptsError: If the email has no attempts left in the window
+        """
+        now = time.monotonic()
+        key = email.strip().lower()
+        with self._lock:
+            attempts = self._attempts.pop(key, None) or deque()
+            while attempts and attempts[0] <= now - self.window:
+                attempts.popleft()
+
+            self._attempts[key] = attempts
+            while len(self._attempts) > self.max_emails:
+                self._attempts.popitem(last=False)
+
+            if len(attempts) >= self.max_attempts:
+                metrics.increment("login_throttle.rejected")
+                raise TooManyAttemptsError(retry_after=attempts[0] + self.window - now)
+            attempts.append(now)
+
+
+password_hasher = PasswordHasher()
+login_throttle = LoginThrottle()
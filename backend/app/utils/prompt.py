@@ -1,18 +1,33 @@
 from database.models import JobQuestionsRequest
+from typing import Any, Dict, Optional
 
 
-def generate_prompt(req: JobQuestionsRequest) -> str:
-    """Generate a prompt for the LLM based on the JobQuestionsRequest"""
+def generate_prompt(req: JobQuestionsRequest, company_content: Optional[str] = None) -> str:
+    """
+    Generate a prompt for the LLM based on the JobQuestionsRequest
 
-    prompt = f"""
-Tool Call: get_website_content with the following url {req.company_url}
+    Args:
+        req: Job details
+        company_content: Pre-fetched company summary (see format_company_content).
+            Without it the prompt asks the agent to call get_company_content.
+
+    Returns:
+        The prompt
+    """
+    if company_content is None:
+        tool_call = f"Tool Call: get_company_content with the following url {req.company_url}\n\n"
+        company_summary = "Use the company details fetched from the website (landing, about, careers and engineering pages) by the get_company_content tool call."
+    else:
+        tool_call = ""
+        company_summary = f"Company details fetched from {req.company_url}:\n{company_content}"
 
-Read a job description, job role, and company summary, then generate a tailored set of concise, information-gathering questions for the user. The goal is to collect all the specific details needed to craft a strong, customized resume for this role.
+    prompt = f"""
+{tool_call}Read a job description, job role, and company summary, then generate a tailored set of concise, information-gathering questions for the user. The goal is to collect all the specific details needed to craft a strong, customized resume for this role.
 
 **Job Role:** {req.job_role}
 **Company:** {req.company_name}
 **Job Description:** {req.job_description}
-**Company Summary:** Use the company details fetched from the website by the get_website_content tool call.
+**Company Summary:** {company_summary}
 **Instructions:**
 
 1. Analyze context: Carefully review the job description, job role, and company summary to identify required skills, experiences, and cultural fit.
@@ -40,4 +55,29 @@ Produce a numbered list of concise, user-facing questions. Generate a maximum of
 Questions:
     """
 
-    return prompt
\ No newline at end of file
+    return prompt
+
+
+def format_company_content(summary: Dict[str, Any]) -> str:
+    """
+    Render a crawled company summary (see services.crawler.crawl_company) as prompt text
+
+    Args:
+        summary: Crawl result
+
+    Returns:
+        Company details for the prompt
+    """
+    if 'error' in summary:
+        return f"Not available ({summary['error']}). Rely on the job description."
+
+    lines = []
+    if summary.get('title'):
+        lines.append(f"Title: {summary['title']}")
+    if summary.get('meta_description'):
+        lines.append(f"Description: {summary['meta_description']}")
+    if summary.get('headings'):
+        lines.append("Sections: " + "; ".join(h['text'] for h in summary['headings'] if h['text']))
+    if summary.get('text_content'):
+        lines.append(f"Content: {summary['text_content']}")
+    return "\n".join(lines)
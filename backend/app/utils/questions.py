@@ -1,50 +1,184 @@
 import re
+from typing import Any, Dict, List, Optional, Tuple
 
-def parse_questions(response_text: str) -> list:
+
+def normalize_field_key(name: str, field_type: str = None) -> str:
     """
-    Parse questions from AI response text and return a clean list of questions
+    Build the question library key for a missing field
 
     Args:
-        response_text: The raw response text containing numbered questions
+        name: Field name (e.g. "Docker", "Bachelor's Degree")
+        field_type: Field type (skill, education, certification, experience, project)
 
     Returns:
-        List of question strings
+        Normalized "type/name" key shared across sessions
+    """
+    normalized_name = re.sub(r'\s+', ' ', (name or '').strip().lower()).rstrip('.?!:')
+    normalized_type = (field_type or 'misc').strip().lower()
+    return f"{normalized_type}/{normalized_name}"
+
+
+def match_questions_to_fields(
+    questions: List[Dict[str, Any]],
+    fields: List[Dict[str, Any]]
+) -> List[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]:
+    """
+    Pair generated questions with the missing fields they were asked for
+
+    The model may reword a field in related_field ("Docker" comes back as
+    "Docker containers"), so questions are matched on the normalized name,
+    then on names whose words contain one another's, and the rest in order when as many
+    questions as fields are left. Each field is matched at most once.
+
+    Args:
+        questions: Questions as returned by ResumeAgent.generate_questionnaire
+        fields: Missing fields the questions were generated for
+
+    Returns:
+        (question, field) pairs in question order, field is None if unmatched
+    """
+    def name(value: Any) -> str:
+        return normalize_field_key(value or "").split("/", 1)[1]
+
+    field_names = [name(field.get("name")) for field in fields]
+    matches: List[Optional[int]] = [None] * len(questions)
+    free = set(range(len(fields)))
+
+    for same in (
+        lambda asked, answered: asked == answered,
+        lambda asked, answered: bool(asked and answered) and (
+            set(asked.split()) <= set(answered.split()) or set(answered.split()) <= set(asked.split())
+        ),
+    ):
+        for i, question in enumerate(questions):
+            if matches[i] is not None:
+                continue
+            answered = name(question.get("related_field"))
+            index = next((j for j in sorted(free) if same(field_names[j], answered)), None)
+            if index is not None:
+                matches[i] = index
+                free.discard(index)
+
+    unmatched = [i for i, match in enumerate(matches) if match is None]
+    if len(unmatched) == len(free):
+        for i, index in zip(unmatched, sorted(free)):
+            matches[i] = index
+
+    return [
+        (question, fields[match] if match is not None else None)
+        for question, match in zip(questions, matches)
+    ]
+
+
+# Numbering (1., 2), 3 -, ...) and leftover markdown
+NUMBERING = re.compile(r'^\d+[\.\)\-\s]+')
+LEADING_STARS = re.compile(r'^\*+\s*')
+BOLD = re.compile(r'\*\*')
+
+
+class QuestionStreamParser:
+    """
+    Incremental parser for numbered question lists streamed by the model.
+
+    Feed it chunks as they arrive; every complete line yields its question
+    right away. A numbered item that does not end with '?' yet is held until
+    the next item starts, as the model may wrap it over several lines. Lines
+    that are skipped (headers, bold lines) but contain a question are kept as
+    a fallback, returned by close() only if nothing else was parsed.
     """
-    questions_list = []
 
-    # Split by lines and process each line
-    lines = response_text.strip().split('\n')
+    def __init__(self):
+        self._buffer = ""
+        self._found = False
+        self._pending: Optional[str] = None
+        self._fallback: List[str] = []
+
+    def feed(self, chunk: str) -> List[str]:
+        """
+        Parse the next chunk of the response
+
+        Args:
+            chunk: Response text, possibly ending mid-line
+
+        Returns:
+            Questions completed by this chunk
+        """
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split('\n')
+        return [question for line in lines for question in self._parse_line(line)]
+
+    def close(self) -> List[str]:
+        """
+        Parse the last line, and fall back to the skipped question lines if no question was found
+
+        Returns:
+            Remaining questions
+        """
+        line, self._buffer = self._buffer, ""
+        questions = self._parse_line(line)
+        if self._pending is not None:
+            questions.append(self._pending + '?')
+            self._pending = None
+        if not self._found:
+            return self._fallback
+        return questions
 
-    for line in lines:
+    def _parse_line(self, line: str) -> List[str]:
         line = line.strip()
+        questions = []
+        if self._pending is not None:
+            if line and not self._starts_item(line):
+                # The pending item wraps onto this line
+                return self._hold(f"{self._pending} {BOLD.sub('', line).strip()}")
+            questions.append(self._pending + '?')
+            self._pending = None
 
         # Skip empty lines and category headers
         if not line or line.endswith(':') or line.startswith('**') or line.startswith('#'):
-            continue
-
-        # Remove numbering (1., 2., etc.) and clean up
-        # Handle various numbering formats: "1.", "1)", "1 -", etc.
-        cleaned_line = re.sub(r'^\d+[\.\)\-\s]+', '', line).strip()
-
-        # Remove any remaining markdown or formatting
-        cleaned_line = re.sub(r'^\*+\s*', '', cleaned_line).strip()
-        cleaned_line = re.sub(r'\*\*', '', cleaned_line).strip()
-
-        # Only add non-empty questions
-        if cleaned_line:
-            # Ensure it's a question (ends with ?)
-            if not cleaned_line.endswith('?'):
-                cleaned_line += '?'
-            questions_list.append(cleaned_line)
-
-    # If we couldn't parse properly, try a simpler approach
-    if not questions_list:
-        # Look for lines that look like questions
-        for line in lines:
-            line = line.strip()
-            if '?' in line:
-                # Clean up any numbering
-                cleaned_line = re.sub(r'^\d+[\.\)\-\s]+', '', line).strip()
-                questions_list.append(cleaned_line)
-
-    return questions_list
+            if '?' in line and not self._found:
+                self._fallback.append(NUMBERING.sub('', line).strip())
+            return questions
+
+        # Remove numbering and any remaining markdown
+        cleaned_line = NUMBERING.sub('', line).strip()
+        cleaned_line = LEADING_STARS.sub('', cleaned_line).strip()
+        cleaned_line = BOLD.sub('', cleaned_line).strip()
+
+        if not cleaned_line:
+            return questions
+
+        self._found = True
+        if NUMBERING.match(line):
+            return questions + self._hold(cleaned_line)
+
+        # Ensure it's a question (ends with ?)
+        if not cleaned_line.endswith('?'):
+            cleaned_line += '?'
+        return questions + [cleaned_line]
+
+    def _hold(self, item: str) -> List[str]:
+        """Return a numbered item once it ends with '?', hold it until then"""
+        if item.endswith('?'):
+            self._pending = None
+            return [item]
+        self._pending = item
+        return []
+
+    @staticmethod
+    def _starts_item(line: str) -> bool:
+        """Whether a line starts a new item or section instead of continuing one"""
+        return bool(NUMBERING.match(line)) or line.startswith(('*', '-', '#')) or line.endswith(':')
+
+
+def parse_questions(response_text: str) -> list:
+    """
+    Parse questions from AI response text and return a clean list of questions
+
+    Args:
+        response_text: The raw response text containing numbered questions
+
+    Returns:
+        List of question strings
+    """
+    parser = QuestionStreamParser()
+    return parser.feed(response_text) + parser.close()
@@ -0,0 +1,39 @@
+import orjson
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from typing import Any
+
+
+def _default(value: Any) -> Any:
+    # Types orjson doesn't serialize natively (pydantic models, sets, ObjectId, ...)
+    return jsonable_encoder(value, custom_encoder={ObjectId: str})
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Serialize content to JSON with orjson
+
+    datetime, date, UUID, Enum and dataclass values are serialized natively,
+    so documents read from MongoDB don't have to go through jsonable_encoder.
+
+    Args:
+        content: Content to serialize
+
+    Returns:
+        JSON bytes
+    """
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response serialized with orjson, the app's default response class
+
+    Routes returning plain dicts still go through FastAPI's jsonable_encoder
+    first. Read endpoints returning MongoDB documents return this response
+    directly to skip it.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,87 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import os
+
+from utils.metrics import metrics
+
+# How long an authenticated user's principal is reused without asking MongoDB
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+
+
+class PrincipalCache:
+    """
+    In-process TTL/LRU cache of the slim user principal (user_id, email)
+    used to authenticate requests.
+
+    Entries are invalidated explicitly when a user is updated; other workers
+    pick up changes once the TTL expires.
+    """
+
+    def __init__(self, ttl: float = USER_CACHE_TTL, max_entries: int = USER_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._user_ids_by_email: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        metrics.register_ratio("user_cache.hit_ratio", "user_cache.hits", "user_cache.misses")
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a cached principal
+
+        Args:
+            user_id: User ID
+
+        Returns:
+            Copy of the principal, or None if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(user_id)
+                metrics.increment("user_cache.hits")
+                return dict(entry[1])
+            if entry is not None:
+                self._remove(user_id)
+
+        metrics.increment("user_cache.misses")
+        return None
+
+    def set(self, principal: Dict[str, Any]) -> None:
+        """
+        Cache a principal
+
+        Args:
+            principal: Dictionary with user_id and email
+        """
+        with self._lock:
+            self._remove(principal["user_id"])
+            self._entries[principal["user_id"]] = (time.monotonic() + self.ttl, dict(principal))
+            self._user_ids_by_email[principal["email"]] = principal["user_id"]
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, user_id: Optional[str] = None, email: Optional[str] = None) -> None:
+        """
+        Drop a cached principal
+
+        Args:
+            user_id: User ID
+            email: User email, if the user ID is not at hand
+        """
+        with self._lock:
+            if user_id is None and email is not None:
+                user_id = self._user_ids_by_email.get(email)
+            if user_id is not None:
+                self._remove(user_id)
+
+    def _remove(self, user_id: str) -> None:
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            self._user_ids_by_email.pop(entry[1]["email"], None)
+
+
+principal_cache = PrincipalCache()
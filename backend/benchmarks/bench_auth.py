@@ -0,0 +1,114 @@
+"""
+Benchmark request authentication: the get_current_user dependency every
+protected endpoint runs, from the bearer token to the user principal. Each
+scenario runs concurrent requests on one event loop, as in a worker:
+
+- no caches: JWT signature check and a MongoDB lookup per request
+- token cache: verified tokens are reused, the principal is still looked up
+- token + principal caches (warmed with every user): the steady state of
+  logged in users
+- principal cache 1/2: half the users fit, requests mostly miss and evict
+
+Runs against MONGODB_URI (or --uri) in a scratch database that is seeded
+with synthetic users (with the app's indexes), and dropped at the end.
+
+Usage (from backend/):
+    uv run python benchmarks/bench_auth.py [--users 1000] [--requests 20000] [--concurrency 50]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+
+from loguru import logger
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from database.client import mongodb  # noqa: E402
+from database.indexes import INDEXES  # noqa: E402
+from utils.auth import TokenCache, create_access_token  # noqa: E402
+from utils.dependencies import get_current_user  # noqa: E402
+from utils.metrics import metrics  # noqa: E402
+from utils.user_cache import PrincipalCache  # noqa: E402
+import utils.auth  # noqa: E402
+import utils.dependencies  # noqa: E402
+
+
+async def run(label: str, headers: list, requests: int, concurrency: int) -> None:
+    """Authenticate requests spread over concurrent tasks, and print the throughput"""
+    per_task = requests // concurrency
+
+    async def worker(task: int) -> None:
+        offset = task * len(headers) // concurrency
+        for i in range(per_task):
+            await get_current_user(access_token=None, authorization=headers[(offset + i) % len(headers)])
+
+    commands = metrics.snapshot().get("mongodb.commands", 0)
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(task) for task in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    total = per_task * concurrency
+    round_trips = (metrics.snapshot().get("mongodb.commands", 0) - commands) / total
+    print(
+        f"{label:<30}{total / elapsed:>10,.0f} req/s  {elapsed / total * 1e6:>8.1f} us/req  "
+        f"{round_trips:>5.2f} round-trips/req"
+    )
+
+
+def use_caches(token_entries: int, principal_entries: int) -> None:
+    """Replace the token and principal caches with empty ones of the given sizes"""
+    utils.auth.token_cache = TokenCache(max_entries=token_entries)
+    utils.dependencies.principal_cache = PrincipalCache(max_entries=principal_entries)
+
+
+async def benchmark(args) -> None:
+    mongodb.uri = args.uri
+    await mongodb.connect()
+    await mongodb.async_client.drop_database(args.database)
+    mongodb.async_db = mongodb.async_client[args.database]
+    try:
+        users = [{"user_id": str(uuid.uuid4()), "email": f"user{i}@example.com"} for i in range(args.users)]
+        await mongodb.async_db.users.create_indexes(INDEXES["users"])
+        await mongodb.async_db.users.insert_many([dict(user) for user in users])
+        headers = [
+            f"Bearer {create_access_token({'sub': user['user_id'], 'email': user['email']})}" for user in users
+        ]
+        print(f"{args.users} users, {args.requests} requests, {args.concurrency} concurrent\n")
+
+        use_caches(0, 0)
+        await run("no caches", headers, args.requests, args.concurrency)
+
+        use_caches(args.users, 0)
+        await run("token cache", headers, args.requests, args.concurrency)
+
+        use_caches(args.users, args.users)
+        for header in headers:
+            await get_current_user(access_token=None, authorization=header)
+        await run("token + principal caches", headers, args.requests, args.concurrency)
+
+        use_caches(args.users, max(args.users // 2, 1))
+        await run("principal cache 1/2", headers, args.requests, args.concurrency)
+    finally:
+        await mongodb.async_client.drop_database(args.database)
+        await mongodb.close()
+
+
+def main():
+    # get_current_user logs every request at debug level
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", default=os.getenv("MONGODB_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--database", default="resume_maker_bench")
+    parser.add_argument("--users", type=int, default=1000, help="Distinct users authenticated in turn")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(benchmark(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark page extraction on a large page: the stdlib and lxml drivers of
+services.extractor, and the BeautifulSoup tree walk they replaced (when bs4
+is installed). The extractor stops reading once its limits are reached,
+which is part of what is measured.
+
+Usage (from backend/):
+    uv run python benchmarks/bench_extractor.py [--size-mb 2.5] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from services.extractor import LXML_AVAILABLE, extract_content  # noqa: E402
+
+
+def make_page(size: int) -> bytes:
+    """Synthetic company page of roughly size bytes"""
+    head = (
+        "<html><head><title>Acme Corp</title>"
+        '<meta name="description" content="We build things"></head><body>'
+        "<nav><a href='/about'>About</a><a href='/careers'>Careers</a></nav>"
+    )
+    section = (
+        "<section><h2>Section {i}</h2><p>Acme builds <b>distributed</b> systems for "
+        "{i} customers.<p>We are hiring engineers<ul><li>Python<li>Go</ul>"
+        "<div class='card'><a href='/jobs/{i}'>Job {i}</a><span>Remote</span></div>"
+        "<script>var x = {i};</script></section>\n"
+    )
+    parts, length, i = [head], len(head), 0
+    while length < size:
+        part = section.format(i=i)
+        parts.append(part)
+        length += len(part)
+        i += 1
+    parts.append("</body></html>")
+    return "".join(parts).encode()
+
+
+def bs4_extract(html: bytes) -> dict:
+    """The BeautifulSoup extraction used before services.extractor"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    title_tag = soup.find("title")
+    headings = []
+    for level in range(1, 7):
+        for heading in soup.find_all(f"h{level}"):
+            headings.append({"level": level, "text": heading.get_text().strip()})
+    paragraphs = [p.get_text().strip() for p in soup.find_all("p") if p.get_text().strip()]
+    for script in soup(["script", "style"]):
+        script.decompose()
+    lines = (line.strip() for line in soup.get_text().splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return {
+        "title": title_tag.get_text().strip() if title_tag else None,
+        "headings": headings[:10],
+        "paragraphs": paragraphs[:15],
+        "text_content": " ".join(chunk for chunk in chunks if chunk)[:5000],
+    }
+
+
+def measure(name: str, fn, html: bytes, repeat: int) -> None:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(html)
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    fn(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{name:<14} best {min(timings) * 1000:9.1f} ms   peak {peak / 1024 / 1024:7.1f} MB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=float, default=2.5, help="Page size in MB")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per extractor, the best is reported")
+    args = parser.parse_args()
+
+    html = make_page(int(args.size_mb * 1024 * 1024))
+    print(f"Page: {len(html) / 1024 / 1024:.1f} MB")
+
+    measure("html.parser", lambda page: extract_content(page, parser="html.parser"), html, args.repeat)
+    if LXML_AVAILABLE:
+        measure("lxml", lambda page: extract_content(page, parser="lxml"), html, args.repeat)
+    else:
+        print("lxml           not installed (uv sync --extra lxml)")
+    try:
+        import bs4  # noqa: F401
+        measure("beautifulsoup", bs4_extract, html, max(1, args.repeat // 5))
+    except ImportError:
+        print("beautifulsoup  not installed (pip install beautifulsoup4)")
+
+
+if __name__ == "__main__":
+    main()
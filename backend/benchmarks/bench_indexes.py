@@ -0,0 +1,167 @@
+"""
+Benchmark the app's MongoDB queries without and with the index registry
+(database.indexes): median latency, and the winning plan with the keys and
+documents examined from explain().
+
+Runs against MONGODB_URI (or --uri) in a scratch database that is seeded
+with synthetic users, sessions, resume data and question library entries,
+and dropped at the end.
+
+Usage (from backend/):
+    uv run python benchmarks/bench_indexes.py [--users 2000] [--sessions-per-user 10] [--repeat 50]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from pymongo import MongoClient  # noqa: E402
+from database.indexes import INDEXES  # noqa: E402
+
+
+def seed(db, users: int, sessions_per_user: int) -> dict:
+    """Insert synthetic documents, returns sample keys to query"""
+    now = datetime.utcnow()
+    user_docs, session_docs, resume_docs = [], [], []
+    for i in range(users):
+        user_id = str(uuid.uuid4())
+        user_docs.append({
+            "user_id": user_id,
+            "email": f"user{i}@example.com",
+            "name": f"User {i}",
+            "version": 1,
+            "knowledge_graph": {"skills": ["Python", "Go"]},
+        })
+        for j in range(sessions_per_user):
+            session_id = str(uuid.uuid4())
+            last_active = now - timedelta(minutes=i * sessions_per_user + j)
+            session_docs.append({
+                "session_id": session_id,
+                "user_id": user_id,
+                "resume_name": f"Resume {j}",
+                "last_active": last_active,
+                "version": 1,
+            })
+            resume_docs.append({
+                "session_id": session_id,
+                "user_id": user_id,
+                "user_version": 1,
+                "session_version": 1,
+            })
+    library_docs = [
+        {"key": f"field_{i}", "usage_count": i % 50, "last_used": now - timedelta(minutes=i)}
+        for i in range(users)
+    ]
+
+    db.users.insert_many(user_docs)
+    db.sessions.insert_many(session_docs)
+    db.resume_data.insert_many(resume_docs)
+    db.question_library.insert_many(library_docs)
+
+    middle = user_docs[users // 2]
+    return {
+        "email": middle["email"],
+        "user_id": middle["user_id"],
+        "session_id": session_docs[len(session_docs) // 2]["session_id"],
+        "key": library_docs[users // 2]["key"],
+    }
+
+
+def queries(sample: dict) -> list:
+    """(label, collection, filter, sort, limit) of the queries the indexes serve"""
+    return [
+        ("users by email (login)", "users", {"email": sample["email"]}, None, 1),
+        ("users by user_id (principal)", "users", {"user_id": sample["user_id"]}, None, 1),
+        ("sessions by session_id", "sessions", {"session_id": sample["session_id"]}, None, 1),
+        (
+            "session list page", "sessions", {"user_id": sample["user_id"]},
+            [("last_active", -1), ("session_id", -1)], 20
+        ),
+        ("resume_data by session_id", "resume_data", {"session_id": sample["session_id"]}, None, 1),
+        ("resume_data by user_id (refresh)", "resume_data", {"user_id": sample["user_id"]}, None, 0),
+        ("question_library by key", "question_library", {"key": sample["key"]}, None, 1),
+        ("question_library eviction", "question_library", {}, [("usage_count", 1), ("last_used", 1)], 100),
+    ]
+
+
+def _cursor(db, collection: str, query: dict, sort, limit: int):
+    cursor = db[collection].find(query)
+    if sort:
+        cursor = cursor.sort(sort)
+    return cursor.limit(limit)
+
+
+def _stages(plan: dict) -> str:
+    """Winning plan as a chain of stages, innermost last"""
+    plan = plan.get("queryPlan", plan)
+    stages = []
+    while plan:
+        stages.append(plan["stage"])
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0]
+    return " < ".join(stages)
+
+
+def measure(db, sample: dict, repeat: int) -> dict:
+    """Median latency and plan of every query"""
+    results = {}
+    for label, collection, query, sort, limit in queries(sample):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            list(_cursor(db, collection, query, sort, limit))
+            timings.append(time.perf_counter() - started)
+
+        explain = _cursor(db, collection, query, sort, limit).explain()
+        stats = explain.get("executionStats", {})
+        results[label] = {
+            "ms": statistics.median(timings) * 1000,
+            "plan": _stages(explain["queryPlanner"]["winningPlan"]),
+            "keys": stats.get("totalKeysExamined"),
+            "docs": stats.get("totalDocsExamined"),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", default=os.getenv("MONGODB_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--database", default="resume_maker_bench")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--sessions-per-user", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    client = MongoClient(args.uri)
+    client.drop_database(args.database)
+    db = client[args.database]
+    try:
+        sample = seed(db, args.users, args.sessions_per_user)
+        print(
+            f"{args.users} users, {args.users * args.sessions_per_user} sessions, "
+            f"median of {args.repeat} runs\n"
+        )
+
+        before = measure(db, sample, args.repeat)
+        for collection, indexes in INDEXES.items():
+            db[collection].create_indexes(indexes)
+        after = measure(db, sample, args.repeat)
+
+        for label in before:
+            print(label)
+            for name, result in (("before", before[label]), ("after", after[label])):
+                print(
+                    f"  {name:<7}{result['ms']:>9.3f} ms  keys {result['keys']!s:>7}  "
+                    f"docs {result['docs']!s:>7}  {result['plan']}"
+                )
+    finally:
+        client.drop_database(args.database)
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+Benchmark response serialization of the app's largest responses, with
+datetimes as read from MongoDB: FastAPI's default JSONResponse after
+jsonable_encoder, against utils.responses.dumps (orjson).
+
+Payloads:
+- resume-data: a materialized resume data document (GET
+  /api/v1/sessions/{session_id}/resume-data) of an experienced user, with the
+  shape documented in API_DOCS.md: a long career with detailed descriptions,
+  a full job description with its parsed requirements, and an answered
+  questionnaire. --scale repeats the profile's lists for even longer careers.
+- sessions: a page of GET /api/v1/sessions/user/all (--page-size sessions).
+
+The synthetic text is generated from a fixed seed, so runs are comparable.
+
+Usage (from backend/):
+    uv run python benchmarks/bench_responses.py [--payload resume-data] [--scale 1] [--page-size 100] [--repeat 2000]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from utils.responses import dumps  # noqa: E402
+
+WORDS = (
+    "designed built migrated scaled led owned reduced improved automated shipped mentored launched "
+    "distributed service pipeline platform latency throughput reliability cost team customers "
+    "Python Go Kubernetes PostgreSQL MongoDB Kafka Redis AWS GCP Terraform React TypeScript gRPC "
+    "observability incident on-call roadmap architecture API billing search payments analytics "
+    "across within using for the with from into by over 30% 2x 99.99% millions daily"
+).split()
+
+SKILLS = [
+    "Python", "Go", "Java", "TypeScript", "SQL", "Kubernetes", "Docker", "Terraform", "AWS", "GCP",
+    "PostgreSQL", "MongoDB", "Redis", "Kafka", "gRPC", "GraphQL", "React", "FastAPI", "Django", "Spark",
+    "Airflow", "Prometheus", "Grafana", "OpenTelemetry", "Linux", "CI/CD", "System Design", "Microservices",
+    "Event Sourcing", "Elasticsearch", "RabbitMQ", "Celery", "NumPy", "Pandas", "PyTorch", "Rust",
+    "Bash", "Nginx", "Istio", "Helm",
+]
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+def bullets(rng: random.Random, count: int) -> str:
+    return "\n".join(f"- {sentence(rng, rng.randint(14, 24))}" for _ in range(count))
+
+
+def requirement(rng: random.Random, name: str) -> dict:
+    return {
+        "name": name,
+        "type": rng.choice(["skill", "experience", "education", "certification"]),
+        "description": sentence(rng, 10),
+        "priority": rng.randint(1, 5),
+        "confidence": round(rng.uniform(0.6, 1.0), 2),
+    }
+
+
+def resume_data_payload(scale: int) -> dict:
+    """Materialized resume data of a senior engineer applying to a detailed job posting"""
+    rng = random.Random(0)
+    now = datetime(2025, 11, 2, 12, 0, 0)
+
+    work_experience = [
+        {
+            "company": f"Company {i}",
+            "position": rng.choice(["Software Engineer", "Senior Software Engineer", "Staff Engineer", "Tech Lead"]),
+            "location": rng.choice(["San Francisco, CA", "New York, NY", "Remote", "Berlin, Germany"]),
+            "start_date": f"{2024 - 2 * i}-0{rng.randint(1, 9)}",
+            "end_date": "present" if i == 0 else f"{2026 - 2 * i}-0{rng.randint(1, 9)}",
+            "description": bullets(rng, 6),
+            "technologies": rng.sample(SKILLS, 8),
+        }
+        for i in range(8)
+    ]
+    projects = [
+        {
+            "name": f"Project {i}",
+            "description": bullets(rng, 3),
+            "technologies": rng.sample(SKILLS, 6),
+            "url": f"https://github.com/johndoe/project-{i}",
+        }
+        for i in range(12)
+    ]
+    profile = {
+        "education": [
+            {
+                "institution": f"University {i}",
+                "degree": degree,
+                "field": "Computer Science",
+                "start_date": f"{2008 + 2 * i}-09",
+                "end_date": f"{2012 + 2 * i}-06",
+                "gpa": "3.8",
+                "description": sentence(rng, 20),
+            }
+            for i, degree in enumerate(["Bachelor of Science", "Master of Science"])
+        ],
+        "work_experience": work_experience,
+        "projects": projects,
+        "skills": SKILLS,
+        "certifications": [
+            {"name": f"Certification {i}", "issuer": rng.choice(["AWS", "Google Cloud", "CNCF"]), "date": f"202{i}-05"}
+            for i in range(6)
+        ],
+        "research_work": [
+            {"title": sentence(rng, 8), "venue": "Workshop on Systems", "year": "2019", "description": bullets(rng, 2)}
+            for _ in range(2)
+        ],
+        "misc": {"languages": ["English", "Spanish"], "volunteering": sentence(rng, 16)},
+    }
+    for category, items in profile.items():
+        if isinstance(items, list):
+            profile[category] = items * scale
+
+    requirements = [requirement(rng, name) for name in rng.sample(SKILLS, 25)]
+    job_description = "\n\n".join(
+        f"{heading}\n{bullets(rng, 6)}"
+        for heading in ["About the role", "What you'll do", "Requirements", "Nice to have", "About us", "Benefits"]
+    )
+    questions = [
+        {
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "question": sentence(rng, 14).rstrip(".") + "?",
+            "related_field": rng.choice(SKILLS),
+            "field_type": "skill",
+            "answer": " ".join(sentence(rng, 18) for _ in range(3)),
+            "confidence": 0.9,
+            "status": "answered",
+        }
+        for _ in range(15)
+    ]
+
+    return {
+        "personal_info": {
+            "name": "John Doe",
+            "email": "john.doe@gmail.com",
+            "phone": "+1234567890",
+            "address": "San Francisco, CA",
+            "current_job_title": "Staff Software Engineer",
+            "socials": {
+                "linkedin": "https://linkedin.com/in/johndoe",
+                "github": "https://github.com/johndoe",
+                "website": "https://johndoe.dev",
+            },
+        },
+        "professional_profile": profile,
+        "target_job": {
+            "job_role": "Principal Backend Engineer",
+            "company_name": "Tech Corp",
+            "company_url": "https://techcorp.com/jobs/123",
+            "job_description": job_description,
+            "parsed_requirements": requirements,
+            "extracted_keywords": rng.sample(SKILLS, 30),
+        },
+        "resume_metadata": {
+            "resume_name": "Tech Corp Principal Backend Engineer Resume",
+            "resume_description": "Tailored for Principal Backend Engineer at Tech Corp",
+            "session_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "created_at": now - timedelta(days=3),
+            "last_active": now,
+        },
+        "analysis": {
+            "stage": "ready_for_resume",
+            "missing_fields": requirements[:5],
+            "required_fields": requirements,
+            "ai_context": {
+                "summary": " ".join(sentence(rng, 20) for _ in range(4)),
+                "total_missing": 5,
+                "total_matched": 20,
+            },
+            "last_action": "requirements_compared",
+        },
+        "questionnaire": {"questions": questions, "completion": 100.0},
+    }
+
+
+def sessions_payload(page_size: int) -> dict:
+    """A page of session summaries, as returned by SessionOperations.list_user_sessions"""
+    rng = random.Random(0)
+    now = datetime(2025, 11, 2, 12, 0, 0)
+    return {
+        "user_id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "sessions": [
+            {
+                "session_id": str(uuid.UUID(int=rng.getrandbits(128))),
+                "resume_name": f"Company {i} Backend Engineer Resume",
+                "job_role": rng.choice(["Backend Engineer", "Senior Software Engineer", "Staff Engineer"]),
+                "company_name": f"Company {i}",
+                "stage": rng.choice(["init", "job_analyzed", "questionnaire_pending", "ready_for_resume"]),
+                "last_active": now - timedelta(hours=i),
+            }
+            for i in range(page_size)
+        ],
+        "next_cursor": "eyJsYXN0X2FjdGl2ZSI6ICIyMDI1LTEwLTI4VDA4OjAwOjAwIn0",
+    }
+
+
+def measure(serialize, payload: dict, repeat: int) -> float:
+    """Seconds per serialization"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        serialize(payload)
+    return (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--payload", choices=["resume-data", "sessions"], default="resume-data")
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    if args.payload == "resume-data":
+        payload = resume_data_payload(args.scale)
+    else:
+        payload = sessions_payload(args.page_size)
+    serializers = {
+        # What a route returning the document went through before
+        "jsonable_encoder + JSONResponse": lambda content: JSONResponse(jsonable_encoder(content)).body,
+        "orjson (utils.responses.dumps)": dumps,
+    }
+
+    # Same JSON either way, up to whitespace
+    bodies = [json.loads(serializer(payload)) for serializer in serializers.values()]
+    assert all(body == bodies[0] for body in bodies)
+
+    print(f"{args.payload} payload: {len(dumps(payload)):,} bytes, {args.repeat} runs\n")
+    baseline = None
+    for label, serializer in serializers.items():
+        seconds = measure(serializer, payload, args.repeat)
+        baseline = baseline or seconds
+        print(f"{label:<34}{seconds * 1e6:>10.1f} us  {baseline / seconds:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import pytest
+
+from utils.answers import classify_answer
+
+
+@pytest.mark.parametrize("answer, skills", [
+    ("Docker, Kubernetes", ["Docker", "Kubernetes"]),
+    ("Python, Java and Go", ["Python", "Java", "Go"]),
+    ("C++ & C#", ["C++", "C#"]),
+    ("React; Node.js; Machine Learning", ["React", "Node.js", "Machine Learning"]),
+])
+def test_skill_list(answer, skills):
+    result = classify_answer(answer, "Languages", "skill")
+    assert result["knowledge_graph_updates"] == {"category": "skills", "data": skills}
+
+
+@pytest.mark.parametrize("answer", [
+    "not really, only basics",
+    "Yes, Docker and Kubernetes",
+    "I know Python, Java",
+    "Python, Java and some Go",
+    "No, but I used Docker",
+])
+def test_phrases_are_not_skill_lists(answer):
+    assert classify_answer(answer, "Languages", "skill") is None
+
+
+def test_yes_to_skill_question():
+    result = classify_answer("Yes", "Docker", "skill")
+    assert result["knowledge_graph_updates"] == {"category": "skills", "data": ["Docker"]}
+
+
+@pytest.mark.parametrize("answer", ["no", "N/A", "None.", "I don't"])
+def test_negative_answers(answer):
+    result = classify_answer(answer, "Certifications", "certification")
+    assert result["knowledge_graph_updates"] == {"category": "misc", "data": {}}
+
+
+def test_numeric_answer():
+    result = classify_answer("3 years", "Python experience", "experience")
+    assert result["knowledge_graph_updates"] == {"category": "misc", "data": {"Python experience": "3 years"}}
+
+
+def test_free_form_answer_needs_llm():
+    assert classify_answer("I built a payment service at Stripe in Go", "Projects", "project") is None
@@ -0,0 +1,184 @@
+import os
+
+# Use the model map bundled with litellm instead of fetching it
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.robotparser import RobotFileParser
+
+import pytest
+
+import services.scraper as scraper
+from services.crawler import RobotsCache, crawl_company, merge_pages, select_pages
+from services.http_client import http_client
+from utils.metrics import metrics
+
+NAV = "<nav><p>Home About Careers Engineering Team Contact us today</p></nav>"
+FOOTER = "<footer><p>Copyright Acme Corporation, all rights reserved worldwide.</p></footer>"
+
+
+def page(title: str, body: str) -> str:
+    return f"<html><head><title>{title}</title></head><body>{NAV}{body}{FOOTER}</body></html>"
+
+
+SITE = {
+    "/": page("Acme", """
+        <h1>Acme builds rockets</h1>
+        <p>Acme builds reusable rockets for small satellites.</p>
+        <a href="/about">About</a>
+        <a href="/about/press/2019">Press</a>
+        <a href="/careers">Careers</a>
+        <a href="/engineering">Engineering</a>
+        <a href="/team">Team</a>
+        <a href="https://elsewhere.example/about">Partner</a>
+    """),
+    "/about": page("About Acme", """
+        <h1>Acme builds rockets</h1>
+        <h2>Our mission</h2>
+        <p>We were founded in 2015 by rocket engineers.</p>
+    """),
+    "/careers": page("Careers", "<h2>Open roles</h2><p>We are hiring.</p>"),
+    "/team": page("Team", "<h2>Our values</h2><p>We ship small and often.</p>"),
+}
+ROBOTS = "User-agent: *\nDisallow: /careers\n"
+SLOW_PATH = "/engineering"
+
+
+class FixtureSite(BaseHTTPRequestHandler):
+    requests = []
+    # Holds the slow page until the test is over
+    release = threading.Event()
+
+    def do_GET(self):
+        FixtureSite.requests.append(self.path)
+        if self.path == SLOW_PATH:
+            FixtureSite.release.wait(5)
+            return
+        if self.path == "/robots.txt":
+            status, content_type, body = 200, "text/plain", ROBOTS
+        elif self.path in SITE:
+            status, content_type, body = 200, "text/html; charset=utf-8", SITE[self.path]
+        else:
+            status, content_type, body = 404, "text/plain", "not found"
+
+        payload = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def site_url(monkeypatch):
+    # The fixture site runs on loopback, which validate_url rejects
+    monkeypatch.setattr(scraper, "validate_url", lambda url: True)
+    FixtureSite.requests = []
+    FixtureSite.release.clear()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureSite)
+    # Join the request threads on close
+    server.daemon_threads = False
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    FixtureSite.release.set()
+    # Stop the HTTP client's loop thread too, the next test gets a fresh one
+    http_client.close()
+    server.shutdown()
+    server.server_close()
+
+
+def test_select_pages_one_per_kind():
+    links = [
+        "https://acme.example/about/press/2019",
+        "https://acme.example/about",
+        "https://www.acme.example/jobs",
+        "https://elsewhere.example/engineering",
+        "https://acme.example/",
+    ]
+    assert select_pages("https://acme.example/", links) == [
+        "https://acme.example/about",
+        "https://www.acme.example/jobs",
+        # Not linked from the landing page, the usual path is tried
+        "https://acme.example/engineering",
+    ]
+    assert len(select_pages("https://acme.example/", links, max_pages=1)) == 1
+
+
+def test_merge_pages_drops_repeated_text():
+    landing = {
+        "url": "https://acme.example/",
+        "title": "Acme",
+        "headings": [{"level": 1, "text": "Acme"}],
+        "paragraphs": ["Shared navigation text for every page."],
+        "text_content": "Acme Shared navigation text for every page. Rockets for satellites.",
+    }
+    about = {
+        "url": "https://acme.example/about",
+        "title": "About",
+        "headings": [{"level": 1, "text": "acme"}, {"level": 2, "text": "Mission"}],
+        "paragraphs": ["Shared navigation text for every page.", "Founded in 2015."],
+        "text_content": "About Shared navigation text for every page. Founded in 2015.",
+    }
+    merged = merge_pages([landing, about])
+
+    assert merged["pages"] == [
+        {"url": "https://acme.example/", "title": "Acme"},
+        {"url": "https://acme.example/about", "title": "About"},
+    ]
+    assert [heading["text"] for heading in merged["headings"]] == ["Acme", "Mission"]
+    assert merged["paragraphs"] == ["Shared navigation text for every page.", "Founded in 2015."]
+    assert merged["text_content"].count("Shared navigation") == 1
+    assert "Founded in 2015." in merged["text_content"]
+
+
+def test_crawl_fixture_site(site_url):
+    before = metrics.snapshot().get("crawler.pages_timed_out", 0)
+    started = time.monotonic()
+    summary = http_client.run(crawl_company(f"{site_url}/", time_budget=1.0))
+
+    # The slow page is dropped when the budget runs out
+    assert time.monotonic() - started < 1.9
+    assert metrics.snapshot()["crawler.pages_timed_out"] - before == 1
+
+    # Landing page first, then the selected pages in preference order; the
+    # careers page is disallowed by robots.txt, the partner site is not crawled
+    assert [page["url"] for page in summary["pages"]] == [f"{site_url}/", f"{site_url}/about", f"{site_url}/team"]
+    assert "/careers" not in FixtureSite.requests
+    assert "/about/press/2019" not in FixtureSite.requests
+    assert FixtureSite.requests.count("/robots.txt") == 1
+
+    assert summary["title"] == "Acme"
+    headings = [heading["text"] for heading in summary["headings"]]
+    assert headings == ["Acme builds rockets", "Our mission", "Our values"]
+    assert "founded in 2015" in summary["text_content"]
+    # Navigation and footer shared by every page appear once
+    assert summary["text_content"].count("Contact us today") == 1
+    assert summary["text_content"].count("all rights reserved") == 1
+
+
+def test_robots_cache_evicts_least_recently_used(monkeypatch):
+    fetched = []
+
+    async def fetch(origin):
+        fetched.append(origin)
+        rules = RobotFileParser()
+        rules.allow_all = True
+        return rules
+
+    cache = RobotsCache(max_entries=2)
+    monkeypatch.setattr(cache, "_fetch", fetch)
+
+    async def visit():
+        for origin in ("https://a.example", "https://b.example", "https://a.example", "https://c.example"):
+            assert await cache.allowed(f"{origin}/page")
+
+    asyncio.run(visit())
+    assert list(cache._rules) == ["https://a.example", "https://c.example"]
+    assert fetched == ["https://a.example", "https://b.example", "https://c.example"]
@@ -0,0 +1,47 @@
+import pytest
+
+from services.extractor import extract_content
+
+MALFORMED_PAGES = [
+    b"<p>one<p>two<p>three",
+    b"<h3>h<p>inside</h3>",
+    b"<p>a<div>b</div>c</p>",
+    b"<h2><div>T</div></h2><p>x</p>",
+    b"<p>one<ul><li>i</ul>two",
+    b"<h1>a<h2>b</h2>",
+    b"<h2>a<li>b</h2>",
+    b"<title>T</title><p>x<h1>y</h1><p>z</p>",
+    b"<div><p>one<p>two</div><p>three",
+    b"<p>a<table><tr><td>b</table>",
+]
+
+
+def test_implicitly_closed_paragraphs_in_document_order():
+    result = extract_content(b"<p>one<p>two<p>three", parser="html.parser")
+    assert result["paragraphs"] == ["one", "two", "three"]
+
+
+def test_paragraph_closes_heading():
+    result = extract_content(b"<h3>h<p>inside</h3>", parser="html.parser")
+    assert result["headings"] == [{"level": 3, "text": "h"}]
+    assert result["paragraphs"] == ["inside"]
+
+
+def test_extracts_page():
+    page = (
+        b"<html><head><title> Acme </title><meta name='description' content='We build'></head>"
+        b"<body><h1>Welcome</h1><script>var x;</script><p>About us</p><a href='/jobs'>Jobs</a></body></html>"
+    )
+    result = extract_content(page, parser="html.parser")
+    assert result["title"] == "Acme"
+    assert result["meta_description"] == "We build"
+    assert result["headings"] == [{"level": 1, "text": "Welcome"}]
+    assert result["paragraphs"] == ["About us"]
+    assert result["links"] == ["/jobs"]
+    assert "var x" not in result["text_content"]
+
+
+@pytest.mark.parametrize("page", MALFORMED_PAGES)
+def test_drivers_agree_on_malformed_html(page):
+    pytest.importorskip("lxml")
+    assert extract_content(page, parser="lxml") == extract_content(page, parser="html.parser")
@@ -0,0 +1,83 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from services.http_client import HTTPClient
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = f"hello {self.path}".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client():
+    client = HTTPClient()
+    yield client
+    client.close()
+
+
+def test_request_from_sync_caller(client, server_url):
+    response = client.run(client.request("GET", f"{server_url}/a"))
+    assert response.status_code == 200
+    assert response.text == "hello /a"
+    # Nothing holds the host's semaphore anymore, so it is dropped
+    assert client._host_limits == {}
+
+
+def test_stream_reads_incrementally(client, server_url):
+    async def read():
+        chunks = []
+        async with client.stream("GET", f"{server_url}/stream") as response:
+            async for chunk in response.aiter_bytes():
+                chunks.append(chunk)
+        return response.status_code, b"".join(chunks)
+
+    assert client.run(read()) == (200, b"hello /stream")
+
+
+def test_arun_from_running_loop(client, server_url):
+    async def main():
+        responses = await asyncio.gather(*(
+            client.arun(client.request("GET", f"{server_url}/{i}")) for i in range(10)
+        ))
+        return [response.text for response in responses]
+
+    assert asyncio.run(main()) == [f"hello /{i}" for i in range(10)]
+    assert client._host_limits == {}
+
+
+def test_run_rejects_calls_from_client_loop(client):
+    async def nested():
+        coro = asyncio.sleep(0)
+        with pytest.raises(RuntimeError):
+            client.run(coro)
+
+    client.run(nested())
+
+
+def test_host_limits_are_dropped_per_host(client, server_url):
+    other_url = server_url.replace("127.0.0.1", "localhost")
+    client.run(client.request("GET", f"{server_url}/a"))
+    client.run(client.request("GET", f"{other_url}/b"))
+    assert client._host_limits == {}
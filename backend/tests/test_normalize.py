@@ -0,0 +1,46 @@
+import pytest
+
+from utils.normalize import clean_entity_name, normalize_knowledge_graph_field
+
+
+@pytest.mark.parametrize("name, cleaned", [
+    ("amazon web services", "Amazon Web Services"),
+    ("the new york times co", "The New York Times Co"),
+    ("university of california", "University of California"),
+    ("mit", "MIT"),
+    ("ibm", "IBM"),
+    ("ey", "EY"),
+    ("aws", "AWS"),
+    ("ibm research", "IBM Research"),
+    ("iit bombay", "IIT Bombay"),
+    ("bank of america", "Bank of America"),
+    ("Google LLC", "Google"),
+    ("  Acme,  Inc. ", "Acme"),
+    ("eBay", "eBay"),
+])
+def test_clean_entity_name(name, cleaned):
+    assert clean_entity_name(name) == cleaned
+
+
+def test_dotted_category_is_normalized():
+    items = normalize_knowledge_graph_field(
+        "knowledge_graph.work_experience",
+        [{"company": "amazon web services", "start_date": "June 2022"}]
+    )
+    assert items == [{"company": "Amazon Web Services", "start_date": "2022-06"}]
+
+
+def test_dotted_item_and_field_are_normalized():
+    assert normalize_knowledge_graph_field(
+        "knowledge_graph.education.0", {"institution": "mit", "degree": "BS"}
+    ) == {"institution": "MIT", "degree": "Bachelor of Science"}
+    assert normalize_knowledge_graph_field("knowledge_graph.education.1.end_date", "Current") == "present"
+
+
+def test_dotted_skills_are_deduplicated():
+    assert normalize_knowledge_graph_field("knowledge_graph.skills", ["Go", " go ", "Rust"]) == ["Go", "Rust"]
+
+
+def test_other_paths_are_untouched():
+    assert normalize_knowledge_graph_field("knowledge_graph.misc.note", "mit") == "mit"
+    assert normalize_knowledge_graph_field("name", "mit") == "mit"
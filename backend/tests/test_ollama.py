@@ -0,0 +1,108 @@
+import os
+
+# Use the model map bundled with litellm instead of fetching it
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+import main
+from services.ollama import OLLAMA_NUM_CTX, OllamaWarmer
+
+
+class FakeOllama(BaseHTTPRequestHandler):
+    """Ollama /api/generate that holds warm-up prompts until the model is "loaded" """
+
+    loaded = threading.Event()
+    requests = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        FakeOllama.requests.append((self.path, body))
+        if "prompt" in body:
+            FakeOllama.loaded.wait(10)
+
+        payload = json.dumps({"model": body["model"], "response": "", "done": True}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def ollama_url():
+    FakeOllama.loaded.clear()
+    FakeOllama.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOllama)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    FakeOllama.loaded.set()
+    server.shutdown()
+    server.server_close()
+
+
+async def wait_for(condition, timeout: float = 5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+
+def test_ready_after_warm_up_then_keep_alive(ollama_url):
+    def pings():
+        return [body for _, body in FakeOllama.requests if "prompt" not in body]
+
+    async def scenario():
+        warmer = OllamaWarmer(["ollama_chat/gpt-oss", "gemini/gemini-2.5-flash"], api_base=ollama_url, interval=0.05)
+        main.app.state.warmer = warmer
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+            await warmer.start()
+            try:
+                # The model is still loading
+                await wait_for(lambda: FakeOllama.requests)
+                response = await client.get("/ready")
+                assert response.status_code == 503
+                assert response.json() == {"status": "warming_up"}
+
+                FakeOllama.loaded.set()
+                await wait_for(lambda: warmer.ready)
+                response = await client.get("/ready")
+                assert response.status_code == 200
+
+                await wait_for(lambda: len(pings()) >= 2)
+            finally:
+                await warmer.stop()
+
+        warm_up = FakeOllama.requests[0]
+        assert warm_up[0] == "/api/generate"
+        assert warm_up[1]["model"] == "gpt-oss"
+        assert warm_up[1]["options"]["num_ctx"] == OLLAMA_NUM_CTX
+        # Only the Ollama model is warmed up and pinged, with the same num_ctx
+        assert all(body["model"] == "gpt-oss" for _, body in FakeOllama.requests)
+        assert all(
+            body == {"model": "gpt-oss", "keep_alive": warmer.keep_alive, "options": {"num_ctx": OLLAMA_NUM_CTX}}
+            for body in pings()
+        )
+
+    asyncio.run(scenario())
+
+
+def test_ready_immediately_without_ollama_models():
+    async def scenario():
+        warmer = OllamaWarmer(["gemini/gemini-2.5-flash"])
+        await warmer.start()
+        assert warmer.ready
+        await warmer.stop()
+
+    asyncio.run(scenario())
@@ -0,0 +1,54 @@
+import asyncio
+import os
+import signal
+import threading
+
+import pytest
+
+from utils.auth import hash_password
+from utils.passwords import PasswordHasher
+
+ROUNDS = 4
+
+
+@pytest.fixture
+def hasher():
+    hasher = PasswordHasher(workers=2)
+    hasher.start()
+    yield hasher
+    hasher.close()
+
+
+def test_verify_in_worker(hasher):
+    assert hasher._executor._mp_context.get_start_method() == "fork"
+    hashed = hash_password("secret", ROUNDS)
+    assert asyncio.run(hasher.verify("secret", hashed))
+    assert not asyncio.run(hasher.verify("wrong", hashed))
+
+
+def test_pool_is_replaced_after_a_worker_dies(hasher):
+    hashed = hash_password("secret", ROUNDS)
+    broken = hasher._executor
+    for pid in list(broken._processes):
+        os.kill(pid, signal.SIGKILL)
+
+    assert asyncio.run(hasher.verify("secret", hashed))
+    assert hasher._executor is not broken
+    # The replacement keeps working
+    assert asyncio.run(hasher.verify("secret", hashed))
+    assert hasher._pending == 0
+
+
+def test_workers_come_from_a_forkserver_once_threads_run():
+    stop = threading.Event()
+    thread = threading.Thread(target=stop.wait)
+    thread.start()
+    hasher = PasswordHasher(workers=1)
+    try:
+        hasher.start()
+        assert hasher._executor._mp_context.get_start_method() == "forkserver"
+        assert asyncio.run(hasher.verify("secret", hash_password("secret", ROUNDS)))
+    finally:
+        hasher.close()
+        stop.set()
+        thread.join()
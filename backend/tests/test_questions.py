@@ -0,0 +1,103 @@
+import pytest
+
+from utils.questions import QuestionStreamParser, match_questions_to_fields, parse_questions
+
+
+def test_matches_reworded_fields():
+    fields = [{"name": "Kubernetes"}, {"name": "Docker"}]
+    questions = [
+        {"question": "How have you used Docker?", "related_field": "Docker containers"},
+        {"question": "Have you run Kubernetes?", "related_field": "kubernetes."},
+    ]
+    pairs = match_questions_to_fields(questions, fields)
+    assert [field["name"] for _, field in pairs] == ["Docker", "Kubernetes"]
+
+
+def test_unrelated_names_match_in_order_when_counts_agree():
+    fields = [{"name": "Bachelor's Degree in CS"}, {"name": "AWS Certification"}]
+    questions = [
+        {"question": "What did you study?", "related_field": "Education"},
+        {"question": "Which cloud certifications do you hold?", "related_field": "Cloud"},
+    ]
+    pairs = match_questions_to_fields(questions, fields)
+    assert [field["name"] for _, field in pairs] == ["Bachelor's Degree in CS", "AWS Certification"]
+
+
+def test_extra_questions_stay_unmatched():
+    fields = [{"name": "Go"}]
+    questions = [
+        {"question": "Which Go projects?", "related_field": "Go"},
+        {"question": "Anything else?", "related_field": "Other"},
+        {"question": "Hobbies?", "related_field": "Hobbies"},
+    ]
+    pairs = match_questions_to_fields(questions, fields)
+    assert pairs[0][1] == {"name": "Go"}
+    assert pairs[1][1] is None and pairs[2][1] is None
+
+
+def test_short_names_match_whole_words_only():
+    fields = [{"name": "Go"}, {"name": "Google Cloud"}]
+    questions = [
+        {"question": "GCP?", "related_field": "Google Cloud Platform"},
+        {"question": "Go?", "related_field": "Go language"},
+    ]
+    pairs = match_questions_to_fields(questions, fields)
+    assert [field["name"] for _, field in pairs] == ["Google Cloud", "Go"]
+
+
+RESPONSE = """Here are the questions:
+
+**Technical skills:**
+1. How many years have you worked with Kubernetes in production?
+2) Describe the largest system you have designed,
+   including its traffic and team size
+3. **Which CI/CD tools** have you used?
+
+## Leadership
+4. Have you mentored engineers
+   or led a team?
+5. What is your notice period"""
+
+EXPECTED = [
+    "How many years have you worked with Kubernetes in production?",
+    "Describe the largest system you have designed, including its traffic and team size?",
+    "Which CI/CD tools have you used?",
+    "Have you mentored engineers or led a team?",
+    "What is your notice period?",
+]
+
+
+def stream(text: str, size: int) -> list:
+    parser = QuestionStreamParser()
+    questions = []
+    for start in range(0, len(text), size):
+        questions += parser.feed(text[start:start + size])
+    return questions + parser.close()
+
+
+def test_parse_questions_joins_wrapped_items():
+    assert parse_questions(RESPONSE) == EXPECTED
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 16, 64])
+def test_streamed_questions_match_parse_questions(size):
+    # Chunks split numbers, markdown and items anywhere
+    assert stream(RESPONSE, size) == parse_questions(RESPONSE)
+
+
+def test_questions_are_yielded_as_soon_as_complete():
+    parser = QuestionStreamParser()
+    assert parser.feed("1. What is your role?") == []
+    assert parser.feed("\n2. Describe your last") == ["What is your role?"]
+    # Held until the next line shows whether the item continues
+    assert parser.feed(" project\n") == []
+    assert parser.feed("3. Why us?\n") == ["Describe your last project?", "Why us?"]
+    assert parser.close() == []
+
+
+def test_close_flushes_the_final_item():
+    parser = QuestionStreamParser()
+    assert parser.feed("1. Where are you based?\n2. Are you open to relocating") == ["Where are you based?"]
+    assert parser.close() == ["Are you open to relocating?"]
+    assert parser.close() == []
+
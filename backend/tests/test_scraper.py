@@ -0,0 +1,58 @@
+import os
+
+# Use the model map bundled with litellm instead of fetching it
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+
+import asyncio
+
+import pytest
+
+import services.pipeline as pipeline
+from database.models import JobQuestionsRequest
+from services.scraper import validate_url
+
+
+@pytest.mark.parametrize("url", [
+    "https://example.com",
+    "http://careers.example.com/jobs?id=1",
+    "https://93.184.216.34/",
+])
+def test_public_urls_are_valid(url):
+    assert validate_url(url)
+
+
+@pytest.mark.parametrize("url", [
+    "example.com",
+    "ftp://example.com/file",
+    "file:///etc/passwd",
+    "http://localhost:8000/metrics",
+    "http://api.localhost/",
+    "http://127.0.0.1/",
+    "http://10.0.0.5/admin",
+    "http://192.168.1.1/",
+    "http://169.254.169.254/latest/meta-data/",
+    "http://[::1]:27017/",
+    "http://0.0.0.0/",
+])
+def test_internal_and_malformed_urls_are_rejected(url):
+    assert not validate_url(url)
+
+
+def test_prefetch_skips_the_crawl_of_an_invalid_company_url(monkeypatch):
+    def crawl_company(url):
+        raise AssertionError(f"crawled {url}")
+
+    monkeypatch.setattr(pipeline, "crawl_company", crawl_company)
+    monkeypatch.setattr(pipeline, "count_tokens", lambda model_id, text: len(text) // 4 + 1)
+
+    job_pipeline = pipeline.JobQuestionsPipeline.__new__(pipeline.JobQuestionsPipeline)
+    job_pipeline.model_id = "test/model"
+    request = JobQuestionsRequest(
+        job_role="Backend Engineer",
+        company_name="Acme",
+        company_url="http://169.254.169.254/latest/meta-data/",
+        job_description="Python and MongoDB",
+    )
+
+    prompt = asyncio.run(job_pipeline._prefetch_prompt(request))
+    assert "Not available (Invalid URL provided)" in prompt
@@ -0,0 +1,114 @@
+import os
+
+# Use the model map bundled with litellm instead of fetching it
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+
+import pytest
+
+import ai.tokens as tokens
+from ai.tokens import context_window, count_tokens, fit_input, truncate_knowledge_graph, truncate_requirements, truncate_text
+from utils.metrics import metrics
+
+
+class Counter:
+    """Character-based token count that records its calls"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, text: str) -> int:
+        self.calls += 1
+        return len(text) // 4 + 1
+
+
+@pytest.fixture(autouse=True)
+def clear_context_windows():
+    context_window.cache_clear()
+    yield
+    context_window.cache_clear()
+
+
+def test_context_window_from_model_map(monkeypatch):
+    monkeypatch.setattr(tokens, "get_model_info", lambda model_id: {"max_input_tokens": 128000})
+    assert context_window("openai/gpt-4o") == 128000
+
+
+def test_context_window_falls_back_to_family(monkeypatch):
+    def unknown(model_id):
+        raise Exception("model not mapped")
+
+    monkeypatch.setattr(tokens, "get_model_info", unknown)
+    assert context_window("gemini/gemini-next") == tokens.CONTEXT_WINDOWS["gemini"]
+    assert context_window("custom/model") == tokens.DEFAULT_CONTEXT_WINDOW
+
+
+def test_context_window_of_ollama_is_num_ctx(monkeypatch):
+    monkeypatch.setattr(tokens, "get_model_info", lambda model_id: {"max_input_tokens": 128000})
+    assert context_window("ollama/llama3") == tokens.OLLAMA_NUM_CTX
+
+
+def test_truncate_requirements_drops_lowest_priority_first():
+    requirements = [
+        {"field": f"field_{i}", "description": "x" * 200, "priority": i % 3 + 1} for i in range(300)
+    ]
+    count = Counter()
+    kept = truncate_requirements(requirements, 2000, count)
+
+    assert count(str(kept)) <= 2000
+    assert kept == [item for item in requirements if item in kept]
+    dropped = [item for item in requirements if item not in kept]
+    assert max(item["priority"] for item in dropped) <= min(item["priority"] for item in kept)
+    # Each item is counted once, not the whole list once per dropped item
+    assert count.calls <= len(requirements) + 5
+
+
+def test_truncate_requirements_within_budget_unchanged():
+    requirements = [{"field": "python", "priority": 3}]
+    assert truncate_requirements(requirements, 100, Counter()) == requirements
+
+
+def test_truncate_knowledge_graph_drops_oldest_entries():
+    graph = {
+        "work_experience": [{"company": f"Company {i}", "description": "y" * 300} for i in range(100)],
+        "skills": [f"Skill {i}" for i in range(50)],
+    }
+    count = Counter()
+    result = truncate_knowledge_graph(graph, 1500, count)
+
+    assert count(str(result)) <= 1500
+    assert result["work_experience"] == graph["work_experience"][:len(result["work_experience"])]
+    assert len(graph["work_experience"]) == 100
+    assert count.calls <= 150 + 5
+
+
+def test_fit_input_records_sizes_and_truncations():
+    before = metrics.snapshot()
+
+    def delta(name):
+        return metrics.snapshot().get(name, 0) - before.get(name, 0)
+
+    count = Counter()
+    assert fit_input("test_op", "text", "short", 100, truncate_text, count) == "short"
+    assert delta("input_tokens.test_op.text.pre.count") == 1
+    assert delta("input_tokens.test_op.text.truncated") == 0
+
+    result = fit_input("test_op", "text", "x" * 4000, 100, truncate_text, count)
+    assert count(result) <= 100
+    assert delta("input_tokens.test_op.text.pre.sum") == 2 + 1001
+    assert delta("input_tokens.test_op.text.post.sum") == 2 + count(result)
+    assert delta("input_tokens.test_op.text.truncated") == 1
+
+
+def test_count_tokens_falls_back_per_model(monkeypatch):
+    def token_counter(model, text):
+        if model == "broken/model":
+            raise Exception("no tokenizer")
+        return 7
+
+    monkeypatch.setattr(tokens, "token_counter", token_counter)
+    monkeypatch.setattr(tokens, "_models_without_tokenizer", set())
+
+    assert count_tokens("broken/model", "x" * 40) == 11
+    # Other models keep their tokenizer
+    assert count_tokens("working/model", "x" * 40) == 7
+    assert tokens._models_without_tokenizer == {"broken/model"}